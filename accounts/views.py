@@ -7,6 +7,7 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
 from django.conf import settings
 from core.services.text_choices_models import OTPType, OTPPurpose
+from core.timing import ServerTimingMixin
 
 from .models import User, OTPCode
 from .serializers import (
@@ -26,7 +27,7 @@ def get_tokens_for_user(user):
     }
 
 
-class AuthViewSet(viewsets.GenericViewSet):
+class AuthViewSet(ServerTimingMixin, viewsets.GenericViewSet):
     """
     ViewSet for all authentication operations
     
@@ -42,6 +43,8 @@ class AuthViewSet(viewsets.GenericViewSet):
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    # Most queries per action (core/query_budget.py)
+    query_budgets = {'login': 2, 'me': 1, 'update_me': 2}
     
     def get_permissions(self):
         """Dynamic permissions based on action"""
@@ -104,7 +107,7 @@ class AuthViewSet(viewsets.GenericViewSet):
         permission_classes=[permissions.AllowAny],
     )
     def login(self, request):
-        serializer = LoginSerializer(data=request.data, context={"request": request})
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -123,7 +126,7 @@ class AuthViewSet(viewsets.GenericViewSet):
         """
         GET /api/auth/me/
         """
-        serializer = UserSerializer(request.user, context={'request': request})
+        serializer = self.get_serializer(request.user)
         return Response(serializer.data)
     
     @swagger_auto_schema(
@@ -148,12 +151,7 @@ class AuthViewSet(viewsets.GenericViewSet):
         }
         """
         instance = request.user
-        serializer = UserSerializer(
-            instance,
-            data=request.data,
-            partial=True,
-            context={'request': request}
-        )
+        serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
@@ -0,0 +1,197 @@
+"""
+Load benchmark: sync gunicorn workers (config.wsgi) against an ASGI server
+(config.asgi) serving the async task views, at high concurrency.
+
+Both servers are started on the configured database (DATABASE_URL, or the
+SQLite file), a benchmark user with `--tasks` tasks is created, and
+`--concurrency` keep-alive connections hammer the task list for
+`--duration` seconds. Scenarios:
+
+    wsgi          gunicorn sync workers,     GET /api/tasks/
+    asgi-async    ASGI server, async views,  GET /api/async/tasks/
+    asgi-sync     ASGI server, DRF viewset,  GET /api/tasks/ (thread per request)
+
+    pip install uvicorn
+    python -m benchmarks.bench_asgi_wsgi [--concurrency 200] [--duration 10] [--workers 4]
+
+Gunicorn sync workers serve one request at a time each, so beyond
+`--workers` connections requests queue in the listen backlog; watch p99.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+
+BENCH_EMAIL = "bench@example.com"
+
+
+def prepare(task_count):
+    """Create the benchmark user and tasks, return an access token"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    import django
+    django.setup()
+
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import AccessToken
+    from tasks.counters import reconcile
+    from tasks.models import Task
+
+    User = get_user_model()
+    user = User.objects.filter(email=BENCH_EMAIL).first()
+    if user is None:
+        user = User.objects.create_user(
+            email=BENCH_EMAIL, password="BenchPass123!", first_name="Bench", last_name="User"
+        )
+    missing = task_count - Task.objects.filter(author=user).count()
+    if missing > 0:
+        Task.objects.bulk_create(
+            Task(author=user, title=f"Tâche {i}", description="Description " * 20, is_completed=i % 3 == 0)
+            for i in range(missing)
+        )
+        reconcile([user.pk])
+    return str(AccessToken.for_user(user))
+
+
+def start_server(command, port, timeout=30):
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited: %s" % " ".join(command))
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server did not start: %s" % " ".join(command))
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    length, keep_alive = 0, True
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection":
+            keep_alive = value != "close"
+    await reader.readexactly(length)
+    return int(status_line.split()[1]), keep_alive
+
+
+async def client(port, request, deadline, latencies, errors):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            started = time.perf_counter()
+            writer.write(request)
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+            if not keep_alive:
+                # Gunicorn sync workers close the connection after each response
+                writer.close()
+                reader = writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as exc:
+            errors.append(type(exc).__name__)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, path, token, concurrency, duration):
+    request = (
+        "GET %s HTTP/1.1\r\nHost: 127.0.0.1:%d\r\nAuthorization: Bearer %s\r\n"
+        "Accept: application/json\r\nConnection: keep-alive\r\n\r\n" % (path, port, token)
+    ).encode("latin-1")
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(client(port, request, deadline, latencies, errors) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def report(name, latencies, errors, duration):
+    if len(latencies) < 2:
+        print(f"{name:<12} no successful request ({len(errors)} errors)")
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:<12} {len(latencies) / duration:9.1f} req/s   "
+        f"p50 {quantiles[49] * 1000:7.1f} ms   p95 {quantiles[94] * 1000:7.1f} ms   "
+        f"p99 {quantiles[98] * 1000:7.1f} ms   errors {len(errors)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--wsgi-port", type=int, default=8101)
+    parser.add_argument("--asgi-port", type=int, default=8102)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    token = prepare(args.tasks)
+    query = "?" + urlencode({"page_size": args.page_size})
+    servers = {
+        "wsgi": [
+            sys.executable, "-m", "gunicorn", "config.wsgi:application",
+            "--workers", str(args.workers), "--worker-class", "sync",
+            "--bind", "127.0.0.1:%d" % args.wsgi_port, "--backlog", "4096",
+        ],
+        "asgi": [
+            sys.executable, "-m", "uvicorn", "config.asgi:application",
+            "--workers", str(args.workers), "--port", str(args.asgi_port),
+            "--no-access-log", "--backlog", "4096",
+        ],
+    }
+    scenarios = [
+        ("wsgi", "wsgi", args.wsgi_port, "/api/tasks/"),
+        ("asgi-async", "asgi", args.asgi_port, "/api/async/tasks/"),
+        ("asgi-sync", "asgi", args.asgi_port, "/api/tasks/"),
+    ]
+
+    print(f"{args.concurrency} connections, {args.duration:g}s per scenario, {args.workers} workers")
+    for server in servers:
+        process = start_server(servers[server], args.wsgi_port if server == "wsgi" else args.asgi_port)
+        try:
+            for name, scenario_server, port, path in scenarios:
+                if scenario_server != server:
+                    continue
+                asyncio.run(load(port, path + query, token, 10, 1))  # warm up
+                latencies, errors = asyncio.run(load(port, path + query, token, args.concurrency, args.duration))
+                report(name, latencies, errors, args.duration)
+        finally:
+            stop_server(process)
+
+
+if __name__ == "__main__":
+    main()
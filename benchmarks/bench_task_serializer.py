@@ -0,0 +1,64 @@
+"""
+Microbenchmark: TaskSerializer(many=True) vs the TaskValuesSerializer fast
+path on list pages. Only the serialization step is timed; rows are built in
+memory, no database is needed.
+
+    python -m benchmarks.bench_task_serializer [--page-size 20] [--repeat 2000]
+"""
+import argparse
+import os
+import timeit
+import uuid
+from datetime import timedelta
+
+
+def main():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("DATABASE_URL", "")
+    import django
+    django.setup()
+
+    from django.utils import timezone
+    from rest_framework.renderers import JSONRenderer
+    from tasks.models import Task
+    from tasks.serializers import TaskSerializer, TaskValuesSerializer
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    now = timezone.now()
+    tasks = [
+        Task(
+            id=uuid.uuid4(),
+            title=f"Tâche {i}",
+            description="Description " * 10 if i % 3 else None,
+            is_completed=bool(i % 2),
+            created_at=now - timedelta(minutes=i),
+            updated_at=now - timedelta(seconds=i),
+        )
+        for i in range(args.page_size)
+    ]
+    fields = TaskValuesSerializer.fields
+    rows = [{name: getattr(task, name) for name in fields} for task in tasks]
+
+    fast = TaskValuesSerializer()
+    renderer = JSONRenderer()
+    slow_output = renderer.render(TaskSerializer(tasks, many=True).data)
+    fast_output = renderer.render(fast.to_representation([dict(row) for row in rows]))
+    assert fast_output == slow_output, "fast path output differs from TaskSerializer"
+
+    slow = timeit.timeit(lambda: TaskSerializer(tasks, many=True).data, number=args.repeat)
+    quick = timeit.timeit(lambda: fast.to_representation([dict(row) for row in rows]), number=args.repeat)
+
+    per_page = lambda total: total / args.repeat * 1e6
+    print(f"page size {args.page_size}, {args.repeat} pages, output byte-identical")
+    print(f"TaskSerializer       {per_page(slow):9.1f} µs/page")
+    print(f"TaskValuesSerializer {per_page(quick):9.1f} µs/page")
+    print(f"speedup              {slow / quick:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+API benchmark suite, skipped unless pytest is given --benchmark:
+
+    pytest benchmarks --benchmark --no-cov [--benchmark-save]
+
+A module scoped fixture seeds --benchmark-users users with
+--benchmark-tasks tasks each (bulk_create, committed to the test database
+for the module and deleted afterwards). Each scenario sends
+--benchmark-rounds requests through the test client, after a warm up, and
+records the p50/p95/p99 latency and the query count.
+
+Results are written to benchmarks/results.json. --benchmark-save writes
+them to benchmarks/baseline.json instead, which is committed. A scenario
+fails when it runs more queries than in the baseline or, for a baseline
+taken on the same dataset, when its median latency exceeds the
+baseline's by more than --benchmark-threshold.
+"""
+import gc
+import json
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BENCHMARKS_DIR = Path(__file__).parent
+BASELINE_PATH = BENCHMARKS_DIR / 'baseline.json'
+RESULTS_PATH = BENCHMARKS_DIR / 'results.json'
+BENCH_PASSWORD = 'BenchPass123!'
+WARMUP_ROUNDS = 3
+# Tracked latency: the tail percentiles of a few dozen rounds are too noisy
+LATENCY_METRICS = ['p50_ms']
+# Below this, latency differences are timer noise
+LATENCY_SLACK_MS = 1.0
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('benchmark'):
+        return
+    skip = pytest.mark.skip(reason='API benchmarks run with --benchmark')
+    for item in items:
+        if BENCHMARKS_DIR in item.path.parents:
+            item.add_marker(skip)
+
+
+def summarize(latencies, queries):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'p50_ms': round(cuts[49] * 1000, 3),
+        'p95_ms': round(cuts[94] * 1000, 3),
+        'p99_ms': round(cuts[98] * 1000, 3),
+        'queries': max(queries),
+    }
+
+
+class BenchmarkSession:
+    """Results of the run, checked against and possibly saved as the baseline"""
+
+    def __init__(self, config):
+        self.config = {
+            'users': config.getoption('benchmark_users'),
+            'tasks_per_user': config.getoption('benchmark_tasks'),
+            'rounds': config.getoption('benchmark_rounds'),
+        }
+        self.threshold = config.getoption('benchmark_threshold')
+        self.save = config.getoption('benchmark_save')
+        self.baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        self.results = {}
+
+    def measure(self, name, request):
+        """Time `request()` (a request, or any call) over the configured rounds, record and check the result"""
+        for _ in range(WARMUP_ROUNDS):
+            request()
+        latencies, queries = [], []
+        # Like timeit, keep garbage collection pauses out of the timings
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(self.config['rounds']):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = request()
+                    latencies.append(time.perf_counter() - started)
+                # Scenarios timing more than a request return what they built
+                assert getattr(response, 'status_code', 0) < 400, response.content[:500]
+                queries.append(len(captured))
+        finally:
+            gc.enable()
+        self.results[name] = result = summarize(latencies, queries)
+        self.check(name, result)
+        return result
+
+    def check(self, name, result):
+        baseline = self.baseline.get('results', {}).get(name)
+        if self.save or baseline is None:
+            return
+        failures = []
+        if result['queries'] > baseline['queries']:
+            failures.append('%d queries, baseline %d' % (result['queries'], baseline['queries']))
+        if self.baseline.get('config') == self.config:
+            for metric in LATENCY_METRICS:
+                limit = baseline[metric] * (1 + self.threshold) + LATENCY_SLACK_MS
+                if result[metric] > limit:
+                    failures.append('%s %.3f ms, baseline %.3f ms' % (metric, result[metric], baseline[metric]))
+        if failures:
+            pytest.fail('%s regressed: %s' % (name, '; '.join(failures)))
+
+    def write(self):
+        if not self.results:
+            return
+        path = BASELINE_PATH if self.save else RESULTS_PATH
+        if self.save and self.baseline.get('config') == self.config:
+            # Scenarios not run this time keep their baseline
+            results = {**self.baseline.get('results', {}), **self.results}
+        else:
+            results = self.results
+        data = {'config': self.config, 'results': dict(sorted(results.items()))}
+        path.write_text(json.dumps(data, indent=2) + '\n')
+
+
+@pytest.fixture(scope='session')
+def benchmark_session(request):
+    session = BenchmarkSession(request.config)
+    yield session
+    session.write()
+
+
+@pytest.fixture
+def benchmark(benchmark_session, settings):
+    """
+    `benchmark(name, request)` measures `request()`. The per-user response
+    cache is off, so every request does the full work.
+    """
+    settings.TASK_CACHE_TIMEOUT = 0
+    return benchmark_session.measure
+
+
+@pytest.fixture(scope='module')
+def dataset(request, django_db_setup, django_db_blocker):
+    """Users with their tasks, some completed, some mentioning « rapport »"""
+    from django.contrib.auth import get_user_model
+    from tasks.counters import reconcile
+    from tasks.models import Task
+
+    User = get_user_model()
+    user_count = request.config.getoption('benchmark_users')
+    task_count = request.config.getoption('benchmark_tasks')
+    with django_db_blocker.unblock():
+        password = make_password(BENCH_PASSWORD)
+        users = User.objects.bulk_create(
+            User(
+                email='bench%d@example.com' % index, password=password,
+                first_name='Bench', last_name='User %d' % index,
+            )
+            for index in range(user_count)
+        )
+        Task.objects.bulk_create(
+            (
+                Task(
+                    author=user,
+                    title=('Rapport %d' if index % 10 == 0 else 'Tâche %d') % index,
+                    description='Description de la tâche numéro %d. ' % index * 5,
+                    is_completed=index % 3 == 0,
+                )
+                for user in users for index in range(task_count)
+            ),
+            batch_size=1000,
+        )
+        reconcile([user.pk for user in users])
+        yield users
+        Task.objects.filter(author__in=users).delete()
+        User.objects.filter(pk__in=[user.pk for user in users]).delete()
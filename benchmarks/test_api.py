@@ -0,0 +1,83 @@
+"""
+Latency and query count of the main API endpoints on a seeded dataset,
+see benchmarks/conftest.py
+"""
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tasks.models import Task
+from .conftest import BENCH_PASSWORD
+
+pytestmark = pytest.mark.django_db
+
+# One scenario per TaskFilter option
+LIST_SCENARIOS = {
+    'task_list': {},
+    'task_list[is_completed]': {'is_completed': 'true'},
+    'task_list[pending]': {'is_completed': 'false'},
+    'task_list[start_date]': {'start_date': '2000-01-01T00:00:00Z'},
+    'task_list[end_date]': {'end_date': '2100-01-01T00:00:00Z'},
+    'task_list[search]': {'search': 'rapport'},
+    'task_list[order_by]': {'order_by': '-updated_at'},
+}
+
+
+@pytest.fixture
+def bench_user(dataset):
+    return dataset[0]
+
+
+@pytest.fixture
+def client(bench_user):
+    """Client authentifié par JWT, comme en production"""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Bearer %s' % AccessToken.for_user(bench_user))
+    return client
+
+
+@pytest.fixture
+def bench_task(bench_user):
+    return Task.objects.filter(author=bench_user).order_by('created_at').first()
+
+
+@pytest.mark.parametrize('name', LIST_SCENARIOS)
+def test_task_list(benchmark, client, name):
+    benchmark(name, lambda: client.get(reverse('task-list'), LIST_SCENARIOS[name]))
+
+
+def test_task_list_cached(benchmark, client, settings):
+    settings.TASK_CACHE_TIMEOUT = 300
+    benchmark('task_list[cached]', lambda: client.get(reverse('task-list')))
+
+
+def test_task_retrieve(benchmark, client, bench_task):
+    benchmark('task_retrieve', lambda: client.get(reverse('task-detail', kwargs={'pk': bench_task.pk})))
+
+
+def test_task_create(benchmark, client):
+    benchmark('task_create', lambda: client.post(
+        reverse('task-list'), {'title': 'Nouvelle tâche', 'description': 'Créée par le benchmark'},
+    ))
+
+
+def test_task_update(benchmark, client, bench_task):
+    url = reverse('task-detail', kwargs={'pk': bench_task.pk})
+    benchmark('task_update', lambda: client.patch(url, {'is_completed': True}))
+
+
+def test_task_export(benchmark, client):
+    def export():
+        response = client.get(reverse('task-export'), {'format': 'ndjson'})
+        # The body is built while streamed
+        b''.join(response.streaming_content)
+        return response
+    benchmark('task_export[ndjson]', export)
+
+
+def test_auth_login(benchmark, bench_user):
+    client = APIClient()
+    benchmark('auth_login', lambda: client.post(
+        reverse('auth-login'), {'email': bench_user.email, 'password': BENCH_PASSWORD},
+    ))
@@ -0,0 +1,40 @@
+"""
+Rendering time of a large task page, DRF's JSONRenderer against
+FastJSONRenderer with orjson and with its stdlib fallback, see
+core/utils/fast_json.py
+"""
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer
+from core.utils import fast_json
+from tasks.models import Task
+from tasks.serializers import TaskValuesSerializer
+
+pytestmark = pytest.mark.django_db
+
+LARGE_PAGE_SIZE = 1000
+
+
+def make_page(dataset, native_types=()):
+    """A page of LARGE_PAGE_SIZE tasks, as the list builds it"""
+    serializer = TaskValuesSerializer(native_types=native_types)
+    queryset = serializer.get_queryset(Task.objects.filter(author__in=dataset).order_by('-created_at'))
+    rows = serializer.to_representation(list(queryset[:LARGE_PAGE_SIZE]))
+    return {'meta': {'page': 1, 'page_size': LARGE_PAGE_SIZE}, 'data': rows}
+
+
+def test_render_page_drf(benchmark, dataset):
+    page = make_page(dataset)
+    benchmark('render_page[drf]', lambda: JSONRenderer().render(page))
+
+
+def test_render_page_stdlib(benchmark, dataset):
+    page = make_page(dataset)
+    benchmark('render_page[stdlib]', lambda: fast_json.stdlib_dumps(page))
+
+
+@pytest.mark.skipif(fast_json.orjson is None, reason='orjson is not installed')
+def test_render_page_orjson(benchmark, dataset):
+    page = make_page(dataset, FastJSONRenderer.native_types)
+    benchmark('render_page[orjson]', lambda: FastJSONRenderer().render(page))
@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once get_asgi_application() has set Django up
+from core.asgi import AsyncHandler, route_async_paths  # noqa: E402
+
+application = route_async_paths(django_application, AsyncHandler())
@@ -68,6 +68,8 @@ INSTALLED_APPS = [
 ] + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',
+    'core.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -77,6 +79,19 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
+]
+
+# Routes served by core.asgi.AsyncHandler under ASGI, through a natively
+# async middleware chain that never leaves the event loop
+ASYNC_PATHS = ['/api/async/', '/api/tasks/events/']
+
+ASYNC_MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',
+    'core.compression.CompressionMiddleware',
+    'core.asgi.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -106,7 +121,8 @@ if env('DATABASE_URL'):
     DATABASES = {
         'default': dj_database_url.config(
             default=env('DATABASE_URL'),
-            conn_max_age=600
+            conn_max_age=600,
+            conn_health_checks=True,
         )
     }
 else:
@@ -117,6 +133,121 @@ else:
         }
     }
 
+# Read replicas: comma separated database URLs. GET requests read from one
+# of them, except for users who wrote less than DATABASE_REPLICA_STICKY_SECONDS
+# ago; a replica lagging more than DATABASE_REPLICA_MAX_LAG_SECONDS or down
+# is skipped until the next check. See core/db_router.py.
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[])):
+    alias = 'replica_%d' % index
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600, conn_health_checks=True)
+    # Tests read what they write: replicas are the primary there
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = env.int('DATABASE_REPLICA_STICKY_SECONDS', default=5)
+DATABASE_REPLICA_MAX_LAG_SECONDS = env.float('DATABASE_REPLICA_MAX_LAG_SECONDS', default=2.0)
+# A replica may lag up to MAX_LAG + CHECK_INTERVAL: keep it below STICKY_SECONDS
+DATABASE_REPLICA_CHECK_INTERVAL = env.float('DATABASE_REPLICA_CHECK_INTERVAL', default=2.0)
+
+# Connection pool (PostgreSQL, psycopg 3): with DATABASE_POOL each process
+# keeps a pool per database instead of one persistent connection. Pooled
+# connections are checked on checkout, replaced after
+# DATABASE_POOL_MAX_LIFETIME seconds and closed after DATABASE_POOL_MAX_IDLE
+# seconds unused. Stats: /api/health/db-pools/. Fork handling: gunicorn.conf.py.
+DATABASE_POOL = env.bool('DATABASE_POOL', default=False)
+if DATABASE_POOL:
+    for alias, database in DATABASES.items():
+        if database['ENGINE'] != 'django.db.backends.postgresql':
+            continue
+        # Pooling replaces persistent connections
+        database['CONN_MAX_AGE'] = 0
+        database.setdefault('OPTIONS', {})['pool'] = {
+            'name': alias,
+            'min_size': env.int('DATABASE_POOL_MIN_SIZE', default=1),
+            'max_size': env.int('DATABASE_POOL_MAX_SIZE', default=10),
+            'timeout': env.float('DATABASE_POOL_TIMEOUT', default=10.0),
+            'max_lifetime': env.float('DATABASE_POOL_MAX_LIFETIME', default=1800.0),
+            'max_idle': env.float('DATABASE_POOL_MAX_IDLE', default=300.0),
+        }
+
+
+# Cache
+# Local memory by default, set CACHE_URL (e.g. redis://host:6379/0) to share
+# the cache between workers.
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+LOCMEM_CACHE_BACKEND = 'django.core.cache.backends.locmem.LocMemCache'
+
+# Rendered task list/detail responses, per user. A local memory cache is
+# private to its worker, which does not see the writes served by the others:
+# its entries only live a few seconds (gunicorn.conf.py warns about it).
+TASK_CACHE_ALIAS = env('TASK_CACHE_ALIAS', default='default')
+TASK_CACHE_LOCAL = CACHES.get(TASK_CACHE_ALIAS, {}).get('BACKEND') == LOCMEM_CACHE_BACKEND
+TASK_CACHE_TIMEOUT = env.int('TASK_CACHE_TIMEOUT', default=5 if TASK_CACHE_LOCAL else 300)
+
+# Delta sync: rows newer than this are held back until the next sync, and
+# tombstones of deleted tasks are kept this many days.
+TASK_SYNC_SETTLE_SECONDS = env.float('TASK_SYNC_SETTLE_SECONDS', default=1.0)
+TASK_TOMBSTONE_RETENTION_DAYS = env.int('TASK_TOMBSTONE_RETENTION_DAYS', default=90)
+
+# Completed tasks untouched for this many days are moved to the archive
+# table by `manage.py archive_tasks`, in batches of this size.
+TASK_ARCHIVE_AFTER_DAYS = env.int('TASK_ARCHIVE_AFTER_DAYS', default=180)
+TASK_ARCHIVE_BATCH_SIZE = env.int('TASK_ARCHIVE_BATCH_SIZE', default=1000)
+
+# Server-Sent Events change feed. The backend carries events between
+# processes: tasks.events.LocalBackend (single process) or
+# tasks.events.DatabaseBackend (one poll per process, rows kept a few minutes).
+# The database backend polls again the rows of the last
+# TASK_EVENTS_SETTLE_SECONDS, which must cover the clock skew between hosts.
+TASK_EVENTS_BACKEND = env('TASK_EVENTS_BACKEND', default='tasks.events.LocalBackend')
+TASK_EVENTS_POLL_INTERVAL = env.float('TASK_EVENTS_POLL_INTERVAL', default=1.0)
+TASK_EVENTS_SETTLE_SECONDS = env.float('TASK_EVENTS_SETTLE_SECONDS', default=5.0)
+TASK_EVENTS_RETENTION_SECONDS = env.int('TASK_EVENTS_RETENTION_SECONDS', default=300)
+TASK_EVENTS_HEARTBEAT_SECONDS = env.float('TASK_EVENTS_HEARTBEAT_SECONDS', default=15.0)
+TASK_EVENTS_QUEUE_SIZE = env.int('TASK_EVENTS_QUEUE_SIZE', default=100)
+
+# Share of requests timed (DB, serializer, rendering, total) in a
+# Server-Timing header and a `core.timing` log line, see core/timing.py.
+SERVER_TIMING_SAMPLE_RATE = env.float('SERVER_TIMING_SAMPLE_RATE', default=0.01)
+
+# Prometheus metrics at /metrics, see core/metrics.py. The endpoint needs
+# METRICS_TOKEN as a bearer token and is a 404 while it is unset, unless
+# METRICS_PUBLIC opts out (e.g. behind a private network). Under gunicorn
+# also set PROMETHEUS_MULTIPROC_DIR so that scrapes cover every worker.
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=True)
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+METRICS_PUBLIC = env.bool('METRICS_PUBLIC', default=False)
+
+# Log a `core.query_budget` warning, with each statement and where it was
+# run from, for requests over their view action's query budget, see
+# core/query_budget.py. Every request then pays a stack walk per query.
+QUERY_BUDGET_LOGGING = env.bool('QUERY_BUDGET_LOGGING', default=False)
+
+# Compression of text API responses, see core/compression.py. Encodings by
+# preference; br and zstd need the brotli and zstandard packages. Smaller
+# bodies are sent as is: below about a kilobyte compression saves less
+# than it costs.
+COMPRESSION_ENABLED = env.bool('COMPRESSION_ENABLED', default=True)
+COMPRESSION_ENCODINGS = env.list('COMPRESSION_ENCODINGS', default=['zstd', 'br', 'gzip'])
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=1024)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.timing': {'handlers': ['console'], 'level': 'INFO'},
+        'core.query_budget': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
 
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -150,6 +281,16 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.BasicAuthentication",
     ],
     "DATETIME_FORMAT": "%Y-%m-%dT%H:%M:%S%z",
+    # orjson when installed, else a faster stdlib path (core/utils/fast_json.py)
+    "DEFAULT_RENDERER_CLASSES": [
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "core.parsers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
 }
 
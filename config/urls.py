@@ -23,6 +23,9 @@ from rest_framework import permissions
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.metrics import metrics_view
+from core.views import DatabasePoolStatsView
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Todo API",
@@ -49,6 +52,8 @@ urlpatterns = [
     # API
     path("api/", include("tasks.urls")),
     path("api/", include("accounts.urls")),
+    path("api/health/db-pools/", DatabasePoolStatsView.as_view(), name="database-pools"),
+    path("metrics", metrics_view, name="metrics"),
 
     # Admin
     path('manage/', admin.site.urls),
@@ -1,10 +1,24 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 User = get_user_model()
 
 
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark', 'API benchmarks (benchmarks/)')
+    group.addoption('--benchmark', action='store_true', help='Run the API benchmarks')
+    group.addoption('--benchmark-save', action='store_true', help='Write the results as the new baseline')
+    group.addoption(
+        '--benchmark-threshold', type=float, default=0.5,
+        help='Latency regression allowed over the baseline, as a ratio (default 0.5)',
+    )
+    group.addoption('--benchmark-users', type=int, default=20, help='Users seeded (default 20)')
+    group.addoption('--benchmark-tasks', type=int, default=250, help='Tasks seeded per user (default 250)')
+    group.addoption('--benchmark-rounds', type=int, default=30, help='Measured requests per scenario (default 30)')
+
+
 @pytest.fixture
 def api_client():
     """An unauthorized api client"""
@@ -26,4 +40,9 @@ def user(db):
 def authenticated_client(api_client, user):
     """An authorized api client"""
     api_client.force_authenticate(user=user)
-    return api_client
\ No newline at end of file
+    return api_client
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Every test starts with an empty cache"""
+    cache.clear()
@@ -0,0 +1,73 @@
+"""
+ASGI entry point of the async routes (config/asgi.py).
+
+Django adapts every middleware without a native async path (WhiteNoise)
+with a thread sensitive `sync_to_async`, and runs the hooks of the
+MiddlewareMixin ones (sessions, CSRF, messages...) in that thread as well:
+through settings.MIDDLEWARE an async view holds a thread per request.
+
+The ASYNC_PATHS (JWT authenticated JSON and Server-Sent Events, no
+session, cookie or static file) are served by AsyncHandler instead, whose
+ASYNC_MIDDLEWARE chain is natively async from end to end. The other
+routes keep the full settings.MIDDLEWARE chain.
+
+The request_started / request_finished signals and the async ORM still
+reach the database through `sync_to_async`, as with any Django handler.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.middleware import security
+from django.utils.module_loading import import_string
+
+
+class SecurityMiddleware(security.SecurityMiddleware):
+    """
+    Django's SecurityMiddleware, with its hooks called on the event loop in
+    async mode: they only read the request and set headers
+    """
+
+    async def __acall__(self, request):
+        response = self.process_request(request) or await self.get_response(request)
+        return self.process_response(request, response)
+
+
+class AsyncHandler(ASGIHandler):
+    """ASGI handler running the ASYNC_MIDDLEWARE chain, see the module docstring"""
+
+    def load_middleware(self, is_async=True):
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        handler = convert_exception_to_response(self._get_response_async)
+        for middleware_path in reversed(settings.ASYNC_MIDDLEWARE):
+            middleware = import_string(middleware_path)
+            if not getattr(middleware, 'async_capable', False):
+                raise ImproperlyConfigured(
+                    f'{middleware_path} has no async path, it cannot be in ASYNC_MIDDLEWARE.'
+                )
+            mw_instance = middleware(handler)
+            # This chain runs no view or exception hook
+            if hasattr(mw_instance, 'process_view') or hasattr(mw_instance, 'process_exception'):
+                raise ImproperlyConfigured(f'{middleware_path} has hooks, it cannot be in ASYNC_MIDDLEWARE.')
+            handler = convert_exception_to_response(mw_instance)
+        self._middleware_chain = handler
+
+
+def route_async_paths(application, async_application):
+    """
+    ASGI application sending the HTTP requests on the ASYNC_PATHS to
+    `async_application`, everything else to `application`
+    """
+    prefixes = tuple(settings.ASYNC_PATHS)
+
+    async def router(scope, receive, send):
+        if scope['type'] == 'http':
+            path = scope['path'].removeprefix(scope.get('root_path', ''))
+            if path.startswith(prefixes):
+                return await async_application(scope, receive, send)
+        return await application(scope, receive, send)
+
+    return router
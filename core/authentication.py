@@ -0,0 +1,61 @@
+from rest_framework_simplejwt.authentication import AUTH_HEADER_TYPES, JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from django.utils.translation import gettext_lazy as _
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication for async views: same checks, the user is loaded
+    with the async ORM
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class AsyncJWTQueryAuthentication(AsyncJWTAuthentication):
+    """
+    AsyncJWTAuthentication also accepting the token as `?token=`, for
+    clients such as EventSource which cannot send headers. URLs end up in
+    access logs: only short lived access tokens belong there.
+    """
+    query_param = "token"
+
+    def get_header(self, request):
+        header = super().get_header(request)
+        token = request.query_params.get(self.query_param)
+        if header is None and token:
+            header = ("%s %s" % (AUTH_HEADER_TYPES[0], token)).encode("latin-1")
+        return header
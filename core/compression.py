@@ -0,0 +1,201 @@
+"""
+Dynamic response compression, negotiated from Accept-Encoding among
+COMPRESSION_ENCODINGS: zstd (zstandard) and br (brotli) when the library
+is installed, and gzip.
+
+Only text API payloads (COMPRESSIBLE_TYPES) are compressed:
+- a response is sent as is below COMPRESSION_MIN_SIZE bytes, where the
+  headers and the CPU cost more than compression saves;
+- a streaming response (exports) is compressed chunk by chunk, each
+  chunk flushed so the client still receives rows as they are read;
+- server-sent events are never compressed, since a compressor would hold
+  events back;
+- HTML is left alone: its pages embed CSRF tokens (BREACH);
+- static files are already compressed by WhiteNoise.
+
+A strong ETag is made weak (`W/"..."`) on an encoded response: the
+bytes sent differ from the identity ones, as in Django's GZipMiddleware.
+The tag still names the same task version, so If-Match writes accept it
+(tasks/conditional.py).
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import sync_and_async_middleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/jsonl',
+    'text/csv',
+    'text/plain',
+    'application/xml',
+    'text/xml',
+}
+# Levels suited to compressing on every request, not to maximum ratio
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class GzipCompressor:
+    def __init__(self):
+        # wbits 31: gzip container
+        self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+COMPRESSORS = {'gzip': GzipCompressor}
+if brotli is not None:
+    COMPRESSORS['br'] = BrotliCompressor
+if zstandard is not None:
+    COMPRESSORS['zstd'] = ZstdCompressor
+
+
+def get_encodings():
+    """The configured encodings this process can produce, by preference"""
+    return [encoding for encoding in settings.COMPRESSION_ENCODINGS if encoding in COMPRESSORS]
+
+
+def parse_accept_encoding(header):
+    """{coding: q} of an Accept-Encoding header, lowercased, malformed q values as 0"""
+    accepted = {}
+    for item in (header or '').split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def negotiate_encoding(header, encodings):
+    """The `encodings` entry the client prefers (q value, then our order), None for identity"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in encodings:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data, encoding):
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_sequence(chunks, encoding):
+    compressor = COMPRESSORS[encoding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_sequence(chunks, encoding):
+    compressor = COMPRESSORS[encoding]()
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def is_compressible(response):
+    if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+        return False
+    if 'no-transform' in response.get('Cache-Control', ''):
+        return False
+    media_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    if media_type not in COMPRESSIBLE_TYPES:
+        return False
+    return response.streaming or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+
+def compress_response(request, response):
+    """Compress `response` in place if it is eligible and the client accepts an encoding"""
+    if not settings.COMPRESSION_ENABLED or not is_compressible(response):
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), get_encodings())
+    if encoding is None:
+        return response
+
+    if response.streaming:
+        if response.is_async:
+            response.streaming_content = acompress_sequence(response.streaming_content, encoding)
+        else:
+            response.streaming_content = compress_sequence(response.streaming_content, encoding)
+        del response['Content-Length']
+    else:
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+    return response
+
+
+@sync_and_async_middleware
+def CompressionMiddleware(get_response):
+    """Compresses responses, see the module docstring"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            return compress_response(request, await get_response(request))
+    else:
+        def middleware(request):
+            return compress_response(request, get_response(request))
+    return middleware
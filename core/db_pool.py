@@ -0,0 +1,58 @@
+"""
+PostgreSQL connection pools (DATABASE_POOL): Django's psycopg_pool
+integration gives each process one pool per database alias. This module
+reports their stats and keeps pools and connections from crossing a fork
+(see gunicorn.conf.py).
+"""
+from django.conf import settings
+from django.db import connections
+
+# Connections and pools inherited from the parent process, which still
+# uses their sockets: kept referenced so that garbage collection never
+# closes them from the child.
+_inherited = []
+
+
+def get_pools():
+    """Connection pools opened by this process, by database alias"""
+    pools = {}
+    for alias in connections:
+        pool = getattr(connections[alias], '_connection_pools', {}).get(alias)
+        if pool is not None:
+            pools[alias] = pool
+    return pools
+
+
+def get_pool_stats():
+    """psycopg_pool stats (size, available, waiting, timeouts...) of each open pool"""
+    return {alias: pool.get_stats() for alias, pool in get_pools().items()}
+
+
+def close_before_fork():
+    """Close the connections and pools of the parent so that workers start clean"""
+    if not settings.configured:
+        return
+    pools = get_pools()
+    for alias in connections:
+        connection = connections[alias]
+        connection.close()
+        if alias in pools:
+            connection.close_pool()
+
+
+def reset_after_fork():
+    """
+    Forget, without closing them, the connections and pools a worker
+    inherited: they open their own on first use.
+    """
+    if not settings.configured:
+        return
+    for alias in connections:
+        connection = connections[alias]
+        if connection.connection is not None:
+            _inherited.append(connection.connection)
+            connection.connection = None
+        pools = getattr(connection, '_connection_pools', None)
+        if pools:
+            _inherited.extend(pools.values())
+            pools.clear()
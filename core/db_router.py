@@ -0,0 +1,241 @@
+"""
+Read replicas: reads made while serving a GET, HEAD or OPTIONS request go
+to one of the DATABASE_REPLICAS, everything else to the primary
+("default").
+
+A user whose request wrote to the database reads from the primary for
+the next DATABASE_REPLICA_STICKY_SECONDS, so they see their own changes
+whatever the replication lag. The mark is kept in the cache: set
+CACHE_URL for it to hold across workers. A replica that cannot be reached,
+or lags more than DATABASE_REPLICA_MAX_LAG_SECONDS, is left aside until
+the next check, DATABASE_REPLICA_CHECK_INTERVAL seconds later.
+
+A replica failing between two checks is left aside at once: a failed
+connection sends the request's reads to the primary, and a safe request
+whose replica query failed is served again from the primary.
+
+The lag is only sampled once per check, so a replica may be up to
+MAX_LAG_SECONDS + CHECK_INTERVAL behind. Keep that below STICKY_SECONDS,
+or a user back on the replicas may read, and cache, rows older than their
+own last write.
+
+Outside of a request (management commands, shell, event listeners) every
+query goes to the primary.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+
+STICKY_KEY = 'db:primary:%s'
+
+# Replay lag in seconds, 0 when the standby has replayed all it received
+LAG_QUERIES = {
+    'postgresql': (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() "
+        "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+current_routing = ContextVar('current_routing', default=None)
+
+# Replica alias -> (monotonic time of the check, usable), per process
+_health = {}
+
+
+def get_replica_lag(alias):
+    """Replication lag of `alias` in seconds; raises DatabaseError when it is down"""
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        query = LAG_QUERIES.get(connection.vendor)
+        if query is None:
+            cursor.execute('SELECT 1')
+            return 0
+        cursor.execute(query)
+        return float(cursor.fetchone()[0] or 0)
+
+
+def check_replica(alias):
+    try:
+        lag = get_replica_lag(alias)
+    except DatabaseError:
+        connections[alias].close()
+        return False
+    return lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS
+
+
+def set_unusable(alias):
+    """Leave `alias` aside until the next check"""
+    _health[alias] = (time.monotonic(), False)
+    connections[alias].close()
+
+
+def is_usable(alias):
+    """Whether `alias` is up and close enough to the primary, checked at most once per interval"""
+    now = time.monotonic()
+    checked = _health.get(alias)
+    if checked is None or now - checked[0] >= settings.DATABASE_REPLICA_CHECK_INTERVAL:
+        checked = _health[alias] = (now, check_replica(alias))
+    return checked[1]
+
+
+def replica_guard(execute, sql, params, many, context):
+    """Execute wrapper of the replicas telling the request that a read failed"""
+    try:
+        return execute(sql, params, many, context)
+    except DatabaseError:
+        routing = current_routing.get()
+        if routing is not None:
+            routing.failed = True
+        raise
+
+
+def install_replica_guard(connection, **kwargs):
+    if connection.alias in settings.DATABASE_REPLICAS and replica_guard not in connection.execute_wrappers:
+        connection.execute_wrappers.append(replica_guard)
+
+
+connection_created.connect(install_replica_guard, dispatch_uid='core.db_router.install_replica_guard')
+
+
+def choose_replica():
+    """A usable replica at random, the primary when there is none"""
+    replicas = [alias for alias in settings.DATABASE_REPLICAS if is_usable(alias)]
+    return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+
+def pin_to_primary(user_id):
+    cache.set(STICKY_KEY % user_id, True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(STICKY_KEY % user_id, False)
+
+
+def get_user_id(request):
+    """Id of the authenticated user, without triggering the user lookup"""
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject):
+        user = None if user._wrapped is empty else user._wrapped
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+class RequestRouting:
+    """Where the reads of one request go"""
+
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+        self.replica = None
+        self.user_id = None
+        self.pinned = False
+        self.failed = False
+
+    def get_read_alias(self):
+        if self.wrote or self.request.method not in SAFE_METHODS:
+            return DEFAULT_DB_ALIAS
+        # The user is only known once the view authenticated the request
+        user_id = get_user_id(self.request)
+        if user_id is not None and user_id != self.user_id:
+            self.user_id = user_id
+            self.pinned = is_pinned(user_id)
+        if self.pinned:
+            return DEFAULT_DB_ALIAS
+        # One replica for the whole request, for a consistent view
+        if self.replica is None:
+            self.replica = choose_replica()
+            if self.replica != DEFAULT_DB_ALIAS:
+                try:
+                    connections[self.replica].ensure_connection()
+                except DatabaseError:
+                    set_unusable(self.replica)
+                    self.replica = DEFAULT_DB_ALIAS
+        return self.replica
+
+    def should_retry(self, response):
+        """
+        Whether `response` is the error of a failed replica read, in a request
+        that wrote nothing and may then run again on the primary. The replica
+        is left aside either way.
+        """
+        if not self.failed or self.replica in (None, DEFAULT_DB_ALIAS):
+            return False
+        set_unusable(self.replica)
+        self.replica = DEFAULT_DB_ALIAS
+        self.failed = False
+        return response.status_code >= 500 and not self.wrote
+
+    def finish(self):
+        """Keep the user on the primary for a while if the request wrote"""
+        if self.wrote and settings.DATABASE_REPLICAS:
+            user_id = get_user_id(self.request)
+            if user_id is not None:
+                pin_to_primary(user_id)
+
+
+class ReplicaRouter:
+    """Sends the reads of safe requests to the replicas, see the module docstring"""
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if routing is None:
+            return DEFAULT_DB_ALIAS
+        return routing.get_read_alias()
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return False if db in settings.DATABASE_REPLICAS else None
+
+
+@sync_and_async_middleware
+def ReplicaRoutingMiddleware(get_response):
+    """Makes the current request known to ReplicaRouter"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            routing = RequestRouting(request)
+            token = current_routing.set(routing)
+            try:
+                response = await get_response(request)
+                # Closing the replica connection and pinning the user to the
+                # primary block: only leave the event loop when needed
+                if routing.failed and await sync_to_async(routing.should_retry)(response):
+                    response = await get_response(request)
+                return response
+            finally:
+                current_routing.reset(token)
+                if routing.wrote and settings.DATABASE_REPLICAS:
+                    await sync_to_async(routing.finish)()
+    else:
+        def middleware(request):
+            routing = RequestRouting(request)
+            token = current_routing.set(routing)
+            try:
+                response = get_response(request)
+                if routing.should_retry(response):
+                    response = get_response(request)
+                return response
+            finally:
+                current_routing.reset(token)
+                routing.finish()
+    return middleware
@@ -0,0 +1,94 @@
+"""
+Prometheus metrics, served in the text format by GET /metrics:
+
+    http_requests_total{view, action, method, status}
+    http_request_duration_seconds{view, action}            histogram
+    http_request_db_queries{view, action}                  histogram
+    response_cache_lookups_total{view, action, result}     result: hit, miss
+
+`view` is the view class and `action` the viewset action (TaskViewSet,
+list; AuthViewSet, login), or the lowercased method for plain views.
+Requests are measured by core.timing.ServerTimingMiddleware.
+
+Under gunicorn, point PROMETHEUS_MULTIPROC_DIR at an empty directory
+before the workers start: each worker then writes its samples to mmap'd
+files there, and a scrape served by any worker adds them up.
+gunicorn.conf.py empties the directory when the server starts.
+"""
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+METHODS = {'GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'}
+
+REQUESTS = Counter(
+    'http_requests', 'HTTP requests', ['view', 'action', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request duration', ['view', 'action'],
+)
+QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per HTTP request', ['view', 'action'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf')),
+)
+CACHE_LOOKUPS = Counter(
+    'response_cache_lookups', 'Response cache lookups', ['view', 'action', 'result'],
+)
+
+
+def get_method(request):
+    return request.method if request.method in METHODS else 'OTHER'
+
+
+def get_view_labels(request):
+    """(view, action) labels of `request`, from its resolved URL"""
+    method = get_method(request)
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'none', method.lower()
+    view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    view = view_class.__name__ if view_class is not None else getattr(match.func, '__name__', 'unknown')
+    actions = getattr(match.func, 'actions', None) or {}
+    return view, actions.get(method.lower(), method.lower())
+
+
+def observe_request(request, response, timings):
+    view, action = get_view_labels(request)
+    REQUESTS.labels(view, action, get_method(request), response.status_code).inc()
+    LATENCY.labels(view, action).observe(timings.total)
+    QUERIES.labels(view, action).observe(timings.queries)
+
+
+def count_cache_lookup(request, hit):
+    if settings.METRICS_ENABLED:
+        CACHE_LOOKUPS.labels(*get_view_labels(request), 'hit' if hit else 'miss').inc()
+
+
+def get_registry():
+    """This process' metrics, or every worker's in multiprocess mode"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view(request):
+    """
+    GET /metrics
+
+    Requires `Authorization: Bearer <METRICS_TOKEN>`. Without a token the
+    endpoint does not exist, unless METRICS_PUBLIC is set.
+    """
+    if not settings.METRICS_ENABLED or not (settings.METRICS_TOKEN or settings.METRICS_PUBLIC):
+        raise Http404()
+    if settings.METRICS_TOKEN:
+        expected = 'Bearer %s' % settings.METRICS_TOKEN
+        if not constant_time_compare(request.headers.get('Authorization', ''), expected):
+            return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -1,29 +1,326 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import b64decode, b64encode
+from datetime import datetime
+from functools import cached_property, partial
+import json
+import uuid
+
+from django.core.paginator import InvalidPage, Page, Paginator as DjangoPaginator
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
 from rest_framework.response import Response
-import urllib.parse as urlparse
-from urllib.parse import parse_qs
-
-
-def get_page(url):
-    if url is None:
-        return None
-    parsed = urlparse.urlparse(url)
-    if "page" not in parse_qs(parsed.query):
-        return 1
-    ret = parse_qs(parsed.query)["page"]
-    if isinstance(ret, list):
-        return int(ret[0])
-    elif isinstance(ret, str):
-        return int(ret)
-    elif isinstance(ret, int):
-        return ret
-    else:
-        return ret
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KnownCountPaginator(DjangoPaginator):
+    """
+    Django paginator that takes the number of objects when it is already
+    known instead of running a COUNT(*)
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        return super().count
+
+
+class UncountedPage:
+    """
+    Page of a queryset whose size is unknown: one extra row is fetched to
+    tell whether a next page exists
+    """
+
+    def __init__(self, object_list, number, has_next):
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
 
 
 class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Page number pagination.
+
+    `?count=false` skips the COUNT(*): `count` and `total_pages` are then
+    unknown and the next page is detected by fetching one extra row. Views
+    may also define `get_pagination_count()` returning the number of rows of
+    the filtered queryset when they can tell it without counting, or None.
+    The last page is unknown without counting: `page=last` is then a 404.
+
+    The envelope is versioned with `?envelope=<version>`, version 1 (the
+    default) being the historical one; see `get_envelope_v1/v2`.
+    """
     page_size_query_param = "page_size"
     max_page_size = 20
+    count_query_param = "count"
+    envelope_query_param = "envelope"
+    envelope_versions = (1, 2)
+    default_envelope_version = 1
+    invalid_envelope_message = "Version d'enveloppe inconnue"
+    uncounted_last_page_message = "La dernière page n'est pas connue sans comptage (count=false)"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.envelope_version = self.get_envelope_version(request)
+        self.counted = self.get_counted(request)
+        if self.counted:
+            get_count = getattr(view, "get_pagination_count", None)
+            count = get_count() if get_count is not None else None
+            self.django_paginator_class = partial(KnownCountPaginator, count=count)
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        number = self.get_uncounted_page_number(request)
+        offset = (number - 1) * page_size
+        return self.set_uncounted_page(list(queryset[offset:offset + page_size + 1]), number, page_size)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        `paginate_queryset()` on the async ORM, for async views. The view
+        hook is `aget_pagination_count()`.
+        """
+        self.request = request
+        self.envelope_version = self.get_envelope_version(request)
+        self.counted = self.get_counted(request)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        if not self.counted:
+            number = self.get_uncounted_page_number(request)
+            offset = (number - 1) * page_size
+            rows = [row async for row in queryset[offset:offset + page_size + 1]]
+            return self.set_uncounted_page(rows, number, page_size)
+
+        get_count = getattr(view, "aget_pagination_count", None)
+        count = await get_count() if get_count is not None else None
+        if count is None:
+            count = await queryset.acount()
+        paginator = KnownCountPaginator(queryset, page_size, count=count)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        offset = (number - 1) * page_size
+        rows = [row async for row in queryset[offset:offset + page_size]]
+        self.page = Page(rows, number, paginator)
+        return rows
+
+    def get_uncounted_page_number(self, request):
+        page_number = request.query_params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            raise NotFound(self.uncounted_last_page_message)
+        try:
+            return _positive_int(page_number, strict=True)
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+
+    def set_uncounted_page(self, rows, number, page_size):
+        """Page from `page_size + 1` fetched rows, the extra one telling if there is a next page"""
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message)
+        self.page = UncountedPage(rows[:page_size], number, has_next=len(rows) > page_size)
+        return self.page.object_list
+
+    def get_counted(self, request):
+        value = request.query_params.get(self.count_query_param, "")
+        return value.lower() not in ("false", "0", "no", "off")
+
+    def get_envelope_version(self, request):
+        value = request.query_params.get(self.envelope_query_param)
+        if value is None:
+            return self.default_envelope_version
+        try:
+            version = int(value)
+        except ValueError:
+            version = None
+        if version not in self.envelope_versions:
+            raise ValidationError({self.envelope_query_param: [self.invalid_envelope_message]})
+        return version
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        """The envelope of the requested version around `data`"""
+        links = {"next": self.get_next_link(), "previous": self.get_previous_link()}
+        next_num = self.page.next_page_number() if self.page.has_next() else None
+        previous_num = self.page.previous_page_number() if self.page.has_previous() else None
+        if self.counted:
+            count, total_pages = self.page.paginator.count, self.page.paginator.num_pages
+        else:
+            count = total_pages = None
+        get_envelope = getattr(self, "get_envelope_v%d" % self.envelope_version)
+        return get_envelope(data, links, next_num, previous_num, count, total_pages)
+
+    def get_envelope_v1(self, data, links, next_num, previous_num, count, total_pages):
+        """Historical envelope; `count` and `total_pages` are null with `?count=false`"""
+        return {
+            "links": {**links, "next_num": next_num, "previous_num": previous_num},
+            "max_page_size": self.max_page_size,
+            "count": count,
+            "total_pages": total_pages,
+            "current_page_count": len(data),
+            "data": data,
+        }
+
+    def get_envelope_v2(self, data, links, next_num, previous_num, count, total_pages):
+        """Page numbers in `page`; `count` and `total_pages` only when counted"""
+        page = {
+            "number": self.page.number,
+            "size": len(data),
+            "next": next_num,
+            "previous": previous_num,
+        }
+        if count is not None:
+            page.update(count=count, total_pages=total_pages)
+        return {"links": links, "page": page, "data": data}
+
+
+class StandardCursorPagination(BasePagination):
+    """
+    Keyset pagination on `(<ordering field>, id)`.
+
+    Each page is a `WHERE (field, id) < (last_field, last_id) ORDER BY field, id
+    LIMIT n` query, so deep pages cost the same as the first one and no
+    COUNT(*) is ever run. The ordering is taken from the `order_by` query
+    parameter (first allowed field wins) and falls back to `default_ordering`.
+
+    Relevance ordered results (`?search=`) have no keyset and are refused
+    with a 400 rather than silently reordered.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "order_by"
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 20
+    ordering_fields = ("created_at", "updated_at")
+    default_ordering = "-created_at"
+    invalid_cursor_message = "Invalid cursor"
+    relevance_query_params = ("search",)
+    relevance_message = "Les résultats d'une recherche sont triés par pertinence : utilisez la pagination par numéro de page"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        for param in self.relevance_query_params:
+            if request.query_params.get(param):
+                raise ValidationError({param: [self.relevance_message]})
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request)
+        self.cursor = self.decode_cursor(request)
+        field = self.ordering.lstrip("-")
+        descending = self.ordering.startswith("-")
+        reverse = self.cursor is not None and self.cursor["r"]
+
+        # Walking backwards means flipping both the comparison and the sort
+        # order, then restoring the natural order on the fetched rows.
+        if reverse:
+            descending = not descending
+        order = ("-%s" % field, "-id") if descending else (field, "id")
+        queryset = queryset.order_by(*order)
+        if self.cursor is not None:
+            lookup = "lt" if descending else "gt"
+            value, pk = self.cursor["v"], self.cursor["id"]
+            queryset = queryset.filter(
+                Q(**{"%s__%s" % (field, lookup): value})
+                | Q(**{field: value, "id__%s" % lookup: pk})
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        # Keys are taken now: the rows may be formatted in place afterwards.
+        self.page = results
+        self.first_key = self.get_key(results[0], field) if results else None
+        self.last_key = self.get_key(results[-1], field) if results else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_ordering(self, request):
+        value = request.query_params.get(self.ordering_query_param, "")
+        for term in value.split(","):
+            term = term.strip()
+            if term.lstrip("-") in self.ordering_fields:
+                return term
+        return self.default_ordering
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            if cursor["o"] != self.ordering:
+                raise ValueError
+            cursor["v"] = datetime.fromisoformat(cursor["v"])
+            cursor["id"] = uuid.UUID(cursor["id"])
+            cursor["r"] = bool(cursor["r"])
+        except (TypeError, ValueError, KeyError, AttributeError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_key(self, item, field):
+        if isinstance(item, dict):
+            return item[field], item["id"]
+        return getattr(item, field), item.pk
+
+    def encode_cursor(self, key, reverse):
+        value, pk = key
+        cursor = {"o": self.ordering, "v": value.isoformat(), "id": str(pk), "r": int(reverse)}
+        encoded = b64encode(json.dumps(cursor, separators=(",", ":")).encode("utf-8"))
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded.decode("ascii"))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Only reachable when walking back past the first row.
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.last_key, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first_key, reverse=True)
 
     def get_paginated_response(self, data):
         return Response(
@@ -31,12 +328,8 @@ class StandardResultsSetPagination(PageNumberPagination):
                 "links": {
                     "next": self.get_next_link(),
                     "previous": self.get_previous_link(),
-                    "next_num": get_page(self.get_next_link()),
-                    "previous_num": get_page(self.get_previous_link()),
                 },
                 "max_page_size": self.max_page_size,
-                "count": self.page.paginator.count,
-                "total_pages": self.page.paginator.num_pages,
                 "current_page_count": len(data),
                 "data": data,
             }
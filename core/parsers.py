@@ -0,0 +1,23 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from core.renderers import FastJSONRenderer
+from core.utils.fast_json import loads
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser decoding UTF-8 bodies with orjson when it is installed,
+    which rejects NaN and Infinity like the strict stdlib parser
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if loads is None or not self.strict or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return loads(stream.read() if stream is not None else b'')
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,102 @@
+"""
+Query budgets: the most SQL queries a view action may run, declared on
+the view class,
+
+    class TaskViewSet(ServerTimingMixin, viewsets.ModelViewSet):
+        query_budgets = {'list': 4, 'retrieve': 2}
+
+whatever the page size or the number of rows. Tests enforce them with
+`assert_query_budget()`. With QUERY_BUDGET_LOGGING, the timing middleware
+also records the queries of every request and logs a warning, with each
+statement and the project line that ran it, for requests over budget.
+
+Savepoints are deliberately not counted. Every nested `atomic()` block
+sets one, in production too (`rebuild_counter()` inside a write), and an
+outermost `atomic()` becomes one when the request already runs in a
+transaction, as in tests. They read no data, and their number depends on
+how the caller nests transactions, so counting them would give the same
+action different budgets in tests and in production. The statements a
+savepoint protects are counted as usual.
+"""
+import logging
+import os
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# Frames of the instrumentation itself are never the origin of a query
+INSTRUMENTATION_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'timing.py'),
+}
+
+
+def is_counted(sql):
+    return not sql.lstrip().upper().startswith(TRANSACTION_CONTROL)
+
+
+def get_origin():
+    """`path:line in function` of the innermost project frame, outside site-packages"""
+    base = os.path.join(str(settings.BASE_DIR), '')
+    for frame in reversed(traceback.extract_stack()):
+        path = frame.filename
+        if path.startswith(base) and 'site-packages' not in path and path not in INSTRUMENTATION_FILES:
+            return '%s:%d in %s' % (os.path.relpath(path, base), frame.lineno, frame.name)
+    return 'unknown origin'
+
+
+def get_query_budget(view_class, action):
+    return getattr(view_class, 'query_budgets', {}).get(action)
+
+
+def resolve_action(request):
+    """(view class, action) serving `request`, (None, None) for a non view URL"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None, None
+    view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    actions = getattr(match.func, 'actions', None) or {}
+    return view_class, actions.get(request.method.lower(), request.method.lower())
+
+
+def format_report(name, queries, budget):
+    lines = ['%s ran %d queries, budget %d:' % (name, len(queries), budget)]
+    lines += ['  %s  %s' % (origin, sql) for sql, origin in queries]
+    return '\n'.join(lines)
+
+
+class QueryRecorder:
+    """Execute wrapper keeping the counted statements with their origin"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if is_counted(sql):
+            self.queries.append((sql, get_origin()))
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def assert_query_budget(view_class, action, using=DEFAULT_DB_ALIAS):
+    """Fail if the block runs more queries than `view_class.query_budgets[action]`"""
+    budget = get_query_budget(view_class, action)
+    assert budget is not None, '%s.%s has no query budget' % (view_class.__name__, action)
+    recorder = QueryRecorder()
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+    name = '%s.%s' % (view_class.__name__, action)
+    assert len(recorder.queries) <= budget, format_report(name, recorder.queries, budget)
+
+
+def check_query_budget(request, queries):
+    """Log `request`'s (sql, origin) `queries` if they exceed its action's budget"""
+    view_class, action = resolve_action(request)
+    budget = get_query_budget(view_class, action)
+    if budget is not None and len(queries) > budget:
+        logger.warning(format_report('%s.%s' % (view_class.__name__, action), queries, budget))
@@ -0,0 +1,64 @@
+import csv
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from core.utils import fast_json
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer encoding with orjson when it is installed, else with a
+    reused stdlib encoder (core/utils/fast_json.py), for the same bytes.
+    Indented or non compact output is left to JSONRenderer.
+
+    `native_types` are the value types encoded without a Python hook,
+    which views may leave unformatted.
+    """
+    native_types = fast_json.NATIVE_TYPES
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = fast_json.dumps(data)
+        # Like JSONRenderer, keep the output a strict JavaScript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+        return ret
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    Newline delimited JSON. Streaming views write their own body; this
+    renderer makes `?format=ndjson` negotiable and renders error payloads.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return super().render(data, accepted_media_type, renderer_context) + b"\n"
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV. Streaming views write their own body; this renderer makes
+    `?format=csv` negotiable and renders error payloads as key,value rows.
+    """
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        output = io.StringIO()
+        writer = csv.writer(output)
+        items = data.items() if isinstance(data, dict) else enumerate(data)
+        for key, value in items:
+            writer.writerow([key, value])
+        return output.getvalue().encode(self.charset)
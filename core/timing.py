@@ -0,0 +1,206 @@
+"""
+Per-request timings for a sample of requests (SERVER_TIMING_SAMPLE_RATE),
+returned in a Server-Timing header, which browser dev tools display:
+
+    Server-Timing: db;dur=3.215;desc="4 queries", serialize;dur=1.104, render;dur=0.398, total;dur=7.912
+
+and logged as one `core.timing` line of key=value pairs. Durations are in
+milliseconds. With METRICS_ENABLED every request is measured for the
+Prometheus metrics (core/metrics.py); otherwise unsampled requests only pay
+a random() call and, per query, a context variable lookup.
+With QUERY_BUDGET_LOGGING, every request also keeps its statements for
+the query budget check (core/query_budget.py).
+
+Database time is measured by an execute wrapper added to every
+connection; serializer and renderer time by ServerTimingMixin on the
+viewsets.
+"""
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import observe_request
+from .query_budget import check_query_budget, get_origin, is_counted
+
+logger = logging.getLogger(__name__)
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class RequestTimings:
+    """Time spent by one request, by kind"""
+    metrics = ['db', 'serialize', 'render']
+
+    def __init__(self, sampled=True, record_statements=False):
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(self.metrics, 0.0)
+        self.queries = 0
+        # (sql, origin) of the counted statements, for the query budget check
+        self.statements = [] if record_statements else None
+        self.total = None
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def get_header(self):
+        parts = ['db;dur=%.3f;desc="%d queries"' % (self.durations['db'] * 1000, self.queries)]
+        parts += [
+            '%s;dur=%.3f' % (name, seconds * 1000)
+            for name, seconds in self.durations.items() if name != 'db'
+        ]
+        parts.append('total;dur=%.3f' % (self.total * 1000))
+        return ', '.join(parts)
+
+    def get_log_fields(self):
+        fields = {'db_queries': self.queries}
+        fields.update(('%s_ms' % name, round(seconds * 1000, 3)) for name, seconds in self.durations.items())
+        fields['total_ms'] = round(self.total * 1000, 3)
+        return fields
+
+
+@contextmanager
+def timed(name):
+    """Count the time spent in the block as `name` for the current request, if timed"""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def query_timer(execute, sql, params, many, context):
+    """Execute wrapper adding each query to the current request's timings"""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add('db', time.perf_counter() - started)
+        timings.queries += 1
+        if timings.statements is not None and is_counted(sql):
+            timings.statements.append((sql, get_origin()))
+
+
+def install_query_timer(connection, **kwargs):
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+connection_created.connect(install_query_timer, dispatch_uid='core.timing.install_query_timer')
+
+
+class TimedRenderer:
+    """Renderer proxy counting `render()` as render time"""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+
+    def __getattr__(self, name):
+        return getattr(self.renderer, name)
+
+    def render(self, *args, **kwargs):
+        with timed('render'):
+            return self.renderer.render(*args, **kwargs)
+
+
+def time_serializer(serializer):
+    """Count `serializer`'s representation as serialize time"""
+    to_representation = serializer.to_representation
+
+    def timed_to_representation(*args, **kwargs):
+        with timed('serialize'):
+            return to_representation(*args, **kwargs)
+
+    serializer.to_representation = timed_to_representation
+    return serializer
+
+
+class ServerTimingMixin:
+    """Reports serializer and renderer time of the view's timed requests"""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if current_timings.get() is not None:
+            time_serializer(serializer)
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        renderer = getattr(response, 'accepted_renderer', None)
+        if current_timings.get() is not None and renderer is not None:
+            response.accepted_renderer = TimedRenderer(renderer)
+        return response
+
+
+def start_timing():
+    """Timings for the current request if anything uses them, else None"""
+    sampled = random.random() < settings.SERVER_TIMING_SAMPLE_RATE
+    record_statements = settings.QUERY_BUDGET_LOGGING
+    if not sampled and not settings.METRICS_ENABLED and not record_statements:
+        return None
+    # Connections opened before this module was loaded
+    for connection in connections.all(initialized_only=True):
+        install_query_timer(connection)
+    return RequestTimings(sampled, record_statements)
+
+
+def report_timing(request, response, timings):
+    timings.finish()
+    if settings.METRICS_ENABLED:
+        observe_request(request, response, timings)
+    if timings.statements is not None:
+        check_query_budget(request, timings.statements)
+    if not timings.sampled:
+        return
+    response['Server-Timing'] = timings.get_header()
+    fields = {'method': request.method, 'path': request.path, 'status': response.status_code}
+    fields.update(timings.get_log_fields())
+    logger.info(' '.join('%s=%s' % item for item in fields.items()), extra={'timings': fields})
+
+
+@sync_and_async_middleware
+def ServerTimingMiddleware(get_response):
+    """Times requests, see the module docstring"""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            timings = start_timing()
+            if timings is None:
+                return await get_response(request)
+            token = current_timings.set(timings)
+            try:
+                response = await get_response(request)
+            finally:
+                current_timings.reset(token)
+            report_timing(request, response, timings)
+            return response
+    else:
+        def middleware(request):
+            timings = start_timing()
+            if timings is None:
+                return get_response(request)
+            token = current_timings.set(timings)
+            try:
+                response = get_response(request)
+            finally:
+                current_timings.reset(token)
+            report_timing(request, response, timings)
+            return response
+    return middleware
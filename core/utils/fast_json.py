@@ -0,0 +1,86 @@
+"""
+Compact UTF-8 JSON encoding with orjson when it is installed, else with
+the stdlib json module through one reused encoder, and decoding with
+orjson (`loads` is None without it).
+
+Both encoders produce the bytes of DRF's compact JSONRenderer: `str` and,
+with orjson, UUID values are written natively, without calling a Python
+hook per value. Other types DRF knows about (datetimes, Decimals, lazy
+strings...) go through DRF's JSONEncoder.default, so that their output is
+unchanged.
+
+orjson cannot write everything the stdlib can: integers past 64 bits raise,
+and non-finite floats come out as null where JSONRenderer writes NaN or,
+under STRICT_JSON, raises ValueError. Those payloads are encoded again with
+the stdlib encoder.
+"""
+from decimal import Decimal
+import math
+import uuid
+
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Types encoded without a Python hook, which formatters may leave as is
+NATIVE_TYPES = (uuid.UUID,) if orjson is not None else ()
+
+
+class CompactJSONEncoder(JSONEncoder):
+    """DRF's encoder with the JSONRenderer defaults"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('allow_nan', not api_settings.STRICT_JSON)
+        kwargs.setdefault('separators', (',', ':'))
+        super().__init__(**kwargs)
+
+
+_encoder = CompactJSONEncoder()
+_default = _encoder.default
+
+
+def stdlib_dumps(data):
+    return _encoder.encode(data).encode('utf-8')
+
+
+def has_non_finite(data):
+    """Whether `data` holds a NaN or infinite float or Decimal"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, Decimal):
+            if not value.is_finite():
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+if orjson is not None:
+    # Datetimes keep DRF's format: orjson's differs (microseconds, no Z)
+    OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(data):
+        try:
+            ret = orjson.dumps(data, default=_default, option=OPTIONS)
+        except orjson.JSONEncodeError:
+            return stdlib_dumps(data)
+        # A non-finite float can only have been written as null
+        if b"null" in ret and has_non_finite(data):
+            return stdlib_dumps(data)
+        return ret
+
+    loads = orjson.loads
+else:
+    dumps = stdlib_dumps
+    loads = None
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    AddIndex that builds the index with CREATE INDEX CONCURRENTLY on
+    PostgreSQL, so large tables stay writable while it is built, and falls
+    back to a plain CREATE INDEX on the other backends.
+
+    The migration using it must set `atomic = False`.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+    def describe(self):
+        return "Concurrently create index %s on field(s) %s of model %s" % (
+            self.index.name,
+            ", ".join(self.index.fields),
+            self.model_name,
+        )
@@ -0,0 +1,57 @@
+import datetime
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from rest_framework.settings import ISO_8601, api_settings
+
+
+def get_datetime_formatter(output_format=None):
+    """
+    Return a function formatting an aware datetime exactly like DRF's
+    DateTimeField.to_representation, with the timezone and the format
+    looked up once instead of on every value.
+    """
+    output_format = api_settings.DATETIME_FORMAT if output_format is None else output_format
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def localize(value):
+        if tz is not None:
+            return value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+        return timezone.make_naive(value, datetime.timezone.utc) if timezone.is_aware(value) else value
+
+    if output_format is None:
+        return lambda value: value or None
+
+    if output_format.lower() == ISO_8601:
+        def format_iso(value):
+            if not value:
+                return None
+            value = localize(value).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return format_iso
+
+    def format_datetime(value):
+        if not value:
+            return None
+        return localize(value).strftime(output_format)
+    return format_datetime
+
+
+def format_uuid(value):
+    return None if value is None else str(value)
+
+
+def get_value_formatter(model_field, native_types=()):
+    """
+    Return a function turning a raw `.values()` value of `model_field` into
+    what the matching ModelSerializer field would output, None if the
+    value needs no formatting. Values of `native_types` are left to the
+    JSON encoder, see core.renderers.FastJSONRenderer.
+    """
+    if isinstance(model_field, models.DateTimeField):
+        return get_datetime_formatter()
+    if isinstance(model_field, models.UUIDField):
+        return None if uuid.UUID in native_types else format_uuid
+    return None
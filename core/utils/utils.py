@@ -9,10 +9,16 @@ from django.utils.html import strip_tags
 import logging
 import random
 import string
+import threading
+import time
 
 
 logger = logging.getLogger(__name__)
 
+_uuid7_lock = threading.Lock()
+# (Unix time in ms, counter) of the last UUIDv7 generated by this process
+_uuid7_last = (0, 0)
+
 
 
 def generate_unique_code(length, prefix=None, digit_only=False):
@@ -35,6 +41,31 @@ def generate_unique_code(length, prefix=None, digit_only=False):
     return code
 
 
+def uuid7():
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48 bits of Unix time in ms, a
+    12 bit counter, then 62 random bits. Rows keyed on it are inserted at
+    the end of the primary key index instead of at random positions.
+
+    The counter starts at a random value each millisecond and keeps the
+    UUIDs of one process strictly increasing, even within a millisecond.
+    """
+    global _uuid7_last
+    with _uuid7_lock:
+        timestamp = time.time_ns() // 1_000_000
+        last_timestamp, counter = _uuid7_last
+        if timestamp > last_timestamp:
+            # Leave room to count up within the millisecond
+            counter = random.getrandbits(11)
+        else:
+            timestamp, counter = last_timestamp, counter + 1
+            if counter > 0xFFF:
+                timestamp, counter = timestamp + 1, random.getrandbits(11)
+        _uuid7_last = (timestamp, counter)
+    random_bits = int.from_bytes(os.urandom(8), 'big') & (1 << 62) - 1
+    return uuid.UUID(int=timestamp << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | random_bits)
+
+
 def generate_hex_id(length):
     return uuid.uuid4().hex[:length]
 
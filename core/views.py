@@ -0,0 +1,18 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db_pool import get_pool_stats
+
+
+class DatabasePoolStatsView(APIView):
+    """
+    GET /api/health/db-pools/
+
+    Stats of the database connection pools of the worker answering, by
+    database alias. Empty unless DATABASE_POOL is enabled.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_pool_stats())
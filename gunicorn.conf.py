@@ -0,0 +1,53 @@
+"""
+Gunicorn hooks, read from the working directory:
+
+    gunicorn config.wsgi:application
+
+Database connections and pools must not be shared between processes: the
+master closes its own before forking a worker, and the worker forgets any
+it still inherited (with --preload, or if a hook ran a query).
+
+Several workers on the default local memory cache each keep their own
+task cache, so a warning is logged on start (see TASK_CACHE_TIMEOUT).
+
+With PROMETHEUS_MULTIPROC_DIR set, the metric files of a previous run are
+removed on start and those of exited workers marked dead (core/metrics.py).
+"""
+import os
+
+
+def on_starting(server):
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.db'):
+                os.remove(os.path.join(directory, name))
+
+
+def when_ready(server):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    from django.conf import settings
+    if server.cfg.workers > 1 and settings.TASK_CACHE_LOCAL:
+        server.log.warning(
+            'The task cache is in local memory and %d workers do not share it: '
+            'a task written through one may be served stale by another for up to '
+            'TASK_CACHE_TIMEOUT (%ss). Set CACHE_URL to a shared cache.',
+            server.cfg.workers, settings.TASK_CACHE_TIMEOUT,
+        )
+
+
+def pre_fork(server, worker):
+    from core.db_pool import close_before_fork
+    close_before_fork()
+
+
+def post_fork(server, worker):
+    from core.db_pool import reset_after_fork
+    reset_after_fork()
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
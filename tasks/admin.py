@@ -1,4 +1,9 @@
 from django.contrib import admin
+from django.db import transaction
+from .cache import bump_version
+from .counters import tasks_added, tasks_changed, tasks_removed
+from .events import CREATED, DELETED, UPDATED, publish
+from .sync import record_deletions
 from .models import Task
 
 @admin.register(Task)
@@ -8,4 +13,46 @@ class TaskAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description']
     list_editable = ['is_completed']
     date_hierarchy = 'created_at'
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+
+    def save_model(self, request, obj, form, change):
+        before = previous_author_id = None
+        with transaction.atomic():
+            if change:
+                # Read the stored state: forms such as the changelist's
+                # list_editable one don't have every field in `initial`.
+                before = Task.objects.select_for_update().filter(pk=obj.pk).values_list(
+                    'author_id', 'is_completed',
+                ).first()
+                previous_author_id = before[0] if before else None
+            super().save_model(request, obj, form, change)
+            if before is not None:
+                tasks_changed([(before, (obj.author_id, obj.is_completed))])
+            else:
+                tasks_added([(obj.author_id, obj.is_completed)])
+            # A task given to another user is gone for its previous author.
+            if change and previous_author_id and previous_author_id != obj.author_id:
+                record_deletions([(obj.pk, previous_author_id)])
+                publish(DELETED, [(obj.pk, previous_author_id)])
+                publish(CREATED, [(obj.pk, obj.author_id)])
+            else:
+                publish(UPDATED if change else CREATED, [(obj.pk, obj.author_id)])
+        bump_version(obj.author_id, previous_author_id)
+
+    def delete_model(self, request, obj):
+        pk, author_id = obj.pk, obj.author_id
+        with transaction.atomic():
+            record_deletions([(pk, author_id)])
+            super().delete_model(request, obj)
+            tasks_removed([(author_id, obj.is_completed)])
+            publish(DELETED, [(pk, author_id)])
+        bump_version(author_id)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            deleted = list(queryset.values_list('id', 'author_id', 'is_completed'))
+            record_deletions([(pk, author_id) for pk, author_id, _ in deleted])
+            super().delete_queryset(request, queryset)
+            tasks_removed((author_id, is_completed) for _, author_id, is_completed in deleted)
+            publish(DELETED, [(pk, author_id) for pk, author_id, _ in deleted])
+        bump_version(*(author_id for _, author_id, _ in deleted))
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from . import search
+
+        post_migrate.connect(search.reindex_after_migrate, sender=self, dispatch_uid='tasks.search.reindex_after_migrate')
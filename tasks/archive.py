@@ -0,0 +1,74 @@
+"""
+Archive tier: completed tasks untouched for TASK_ARCHIVE_AFTER_DAYS move
+from the tasks table to TaskArchive, so the hot table and its indexes only
+hold live tasks.
+
+Tasks move in batches, each in its own short transaction, oldest first.
+On PostgreSQL the batch rows are locked with SKIP LOCKED, so the mover
+never waits on a user editing one of them, nor blocks anybody for longer
+than one batch. For the task list, the delta sync and the event streams an
+archived task is gone: counters are decremented, a tombstone is written
+and a deleted event published.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_version
+from .counters import tasks_removed
+from .events import DELETED, publish
+from .models import Task, TaskArchive
+from .sync import record_deletions
+
+ARCHIVED_FIELDS = ['id', 'author_id', 'title', 'description', 'is_completed', 'created_at', 'updated_at']
+
+
+def get_cutoff(days=None):
+    if days is None:
+        days = settings.TASK_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(cutoff, batch_size):
+    """Move up to `batch_size` tasks completed before `cutoff`, return how many moved"""
+    with transaction.atomic():
+        rows = list(
+            Task.objects.filter(is_completed=True, updated_at__lt=cutoff)
+            .order_by('updated_at', 'id')
+            .select_for_update(skip_locked=True)
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        now = timezone.now()
+        TaskArchive.objects.bulk_create(TaskArchive(archived_at=now, **row) for row in rows)
+        authored = [(row['id'], row['author_id']) for row in rows if row['author_id'] is not None]
+        record_deletions(authored)
+        Task.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        tasks_removed((author_id, True) for _, author_id in authored)
+        publish(DELETED, authored)
+    bump_version(*(author_id for _, author_id in authored))
+    return len(rows)
+
+
+def archive_tasks(days=None, batch_size=None, max_batches=None, pause=0):
+    """
+    Archive the tasks completed more than `days` ago, `batch_size` at a
+    time, sleeping `pause` seconds between batches. Returns the number of
+    tasks moved.
+    """
+    cutoff = get_cutoff(days)
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    moved = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = archive_batch(cutoff, batch_size)
+        if not count:
+            break
+        moved += count
+        batches += 1
+        if pause:
+            time.sleep(pause)
+    return moved
@@ -0,0 +1,247 @@
+"""
+Native async task endpoints, for the ASGI entry point (config/asgi.py).
+
+    GET, POST                  /api/async/tasks/
+    GET, PUT, PATCH, DELETE    /api/async/tasks/<id>/
+    GET                        /api/tasks/events/ (Server-Sent Events)
+
+Same contract as TaskViewSet (TaskFilter parameters, `?fields=`, page
+number pagination and its envelopes, ETag / If-Match, author scoping) with
+JWT authentication only. Reads use the async ORM. Django has no async
+transactions, so each write runs the transactional serializer save, with
+its counters, tombstones and cache invalidation, in one `sync_to_async`
+call.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+from django_filters import utils as filter_utils
+from rest_framework import status
+from rest_framework.exceptions import APIException, MethodNotAllowed, NotAuthenticated, NotFound
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from core.authentication import AsyncJWTAuthentication, AsyncJWTQueryAuthentication
+from core.exceptions import PreconditionFailed
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from core.pagination import StandardResultsSetPagination
+from .conditional import check_preconditions, get_task_validators, set_validators
+from .counters import aget_counter
+from .events import broker
+from .filters import TaskArchiveFilter, TaskFilter
+from .models import Task, TaskArchive
+from .serializers import TaskSerializer, TaskValuesSerializer, select_fields
+from .views import delete_task, parse_archived, parse_fields, parse_uuid
+
+
+class AsyncAPIView(View):
+    """
+    Base of the async views: DRF request parsing, JWT authentication and
+    DRF style error responses, without the sync APIView machinery
+    """
+    authentication_class = AsyncJWTAuthentication
+    renderer = FastJSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Token authentication only, like the DRF views
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.request = request = Request(request, parsers=[FastJSONParser()])
+        try:
+            await self.authenticate(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    async def authenticate(self, request):
+        self.authenticator = self.authentication_class()
+        result = await self.authenticator.aauthenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+        request.user, request.auth = result
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Http404):
+            exc = NotFound()
+        if not isinstance(exc, APIException):
+            raise exc
+        headers = {}
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            headers['WWW-Authenticate'] = self.authenticator.authenticate_header(self.request)
+        response = api_settings.EXCEPTION_HANDLER(exc, {'view': self, 'request': self.request})
+        return self.render(response.data, response.status_code, headers)
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        response = HttpResponse(
+            self.renderer.render(data), status=status_code, content_type=self.renderer.media_type,
+        )
+        for name, value in (headers or {}).items():
+            response[name] = value
+        return response
+
+
+class AsyncTaskView(AsyncAPIView):
+    """
+    Async CRUD on the current user's tasks
+    """
+    pagination_class = StandardResultsSetPagination
+    http_method_names = ['get', 'post', 'put', 'patch', 'delete', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.paginator = self.pagination_class()
+        return await super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        """Get queryset for the current user, in the archive with `?archived=true`"""
+        model = TaskArchive if self.is_archive_request() else Task
+        return model.objects.filter(author=self.request.user)
+
+    @property
+    def filterset_class(self):
+        return TaskArchiveFilter if self.is_archive_request() else TaskFilter
+
+    def is_archive_request(self):
+        return self.request.method in SAFE_METHODS and parse_archived(self.request.query_params.get('archived'))
+
+    def get_serializer_context(self, fields=None):
+        return {'request': self.request, 'view': self, 'fields': fields}
+
+    async def get_object(self, pk, fields=None):
+        """
+        The task `pk` of the current user, with If-Match /
+        If-Unmodified-Since enforced on writes
+        """
+        queryset = self.get_queryset()
+        if fields:
+            queryset = select_fields(queryset, fields)
+        pk = parse_uuid(pk)
+        if pk is None:
+            raise NotFound()
+        try:
+            task = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            raise NotFound()
+        if self.request.method not in SAFE_METHODS:
+            if check_preconditions(self.request, *get_task_validators(task)) is not None:
+                raise PreconditionFailed()
+        return task
+
+    async def aget_pagination_count(self):
+        """Size of the list from the user's task counters, when they can tell it"""
+        if self.is_archive_request():
+            return None
+        field = self.filterset.get_counter_field()
+        if field is None:
+            return None
+        return getattr(await aget_counter(self.request.user.pk), field)
+
+    async def get(self, request, pk=None):
+        if pk is None:
+            return await self.list(request)
+        return await self.retrieve(request, pk)
+
+    async def list(self, request):
+        fields = parse_fields(request.query_params.get('fields'))
+        self.filterset = self.filterset_class(request.query_params, queryset=self.get_queryset(), request=request)
+        if not self.filterset.is_valid():
+            raise filter_utils.translate_validation(self.filterset.errors)
+        serializer = TaskValuesSerializer(fields, self.renderer.native_types)
+        queryset = serializer.get_queryset(self.filterset.qs)
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        if page is None:
+            return self.render(serializer.to_representation([row async for row in queryset]))
+        return self.render(self.paginator.get_paginated_data(serializer.to_representation(page)))
+
+    async def retrieve(self, request, pk):
+        fields = parse_fields(request.query_params.get('fields'))
+        task = await self.get_object(pk, fields)
+        etag, last_modified = get_task_validators(task)
+        response = check_preconditions(request, etag, last_modified)
+        if response is None:
+            serializer = TaskSerializer(task, context=self.get_serializer_context(fields))
+            response = self.render(serializer.data)
+        return set_validators(response, etag, last_modified)
+
+    async def post(self, request, pk=None):
+        if pk is not None:
+            raise MethodNotAllowed(request.method)
+        serializer = TaskSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        return self.render(serializer.data, status.HTTP_201_CREATED)
+
+    async def put(self, request, pk=None):
+        return await self.update(request, pk)
+
+    async def patch(self, request, pk=None):
+        return await self.update(request, pk, partial=True)
+
+    async def update(self, request, pk, partial=False):
+        if pk is None:
+            raise MethodNotAllowed(request.method)
+        task = await self.get_object(pk)
+        serializer = TaskSerializer(task, data=request.data, partial=partial, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        return set_validators(self.render(serializer.data), *get_task_validators(task))
+
+    async def delete(self, request, pk=None):
+        if pk is None:
+            raise MethodNotAllowed(request.method)
+        task = await self.get_object(pk)
+        await sync_to_async(delete_task)(task)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+
+class TaskEventStreamView(AsyncAPIView):
+    """
+    GET /api/tasks/events/
+
+    Server-Sent Events stream of the current user's task changes:
+
+        event: updated
+        data: {"type": "updated", "id": "<task id>", "at": "<date>"}
+
+    The JWT may be given as `?token=` since EventSource cannot send
+    headers. Events are not replayed on reconnection: clients catch up
+    with GET /api/tasks/changes/ first. An `event: resync` ends the stream
+    of a client too slow to keep up, which must then do the same.
+
+    Serve it through config/asgi.py: an open stream only costs a small
+    queue there, while a sync worker would be held for its whole life.
+    """
+    authentication_class = AsyncJWTQueryAuthentication
+    http_method_names = ['get']
+    retry_milliseconds = 5000
+
+    async def get(self, request):
+        response = StreamingHttpResponse(self.stream(request.user.pk), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stops nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, user_id):
+        subscription = broker.subscribe(user_id)
+        try:
+            yield b'retry: %d\n\n' % self.retry_milliseconds
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), settings.TASK_EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b': keep-alive\n\n'
+                    continue
+                if event is None:
+                    yield b'event: resync\ndata: {}\n\n'
+                    return
+                yield b'event: %s\ndata: %s\n\n' % (event['type'].encode(), self.renderer.render(event))
+        finally:
+            broker.unsubscribe(subscription)
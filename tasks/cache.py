@@ -0,0 +1,77 @@
+"""
+Per-user cache of rendered task responses.
+
+Every entry key embeds a per-user version number. Writes bump the version
+rather than deleting keys: entries of older versions are never read again
+and simply expire.
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+VERSION_KEY = "tasks:version:%s"
+RESPONSE_KEY = "tasks:response:%s:%s:%s"
+
+
+def get_cache():
+    return caches[settings.TASK_CACHE_ALIAS]
+
+
+def initial_version():
+    # Seeded from the clock so a version lost to eviction or a restart of
+    # the cache never falls back onto numbers that were already used.
+    return time.time_ns() // 1000
+
+
+def get_version(user_id):
+    """Current cache version of `user_id`'s tasks"""
+    cache = get_cache()
+    key = VERSION_KEY % user_id
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(user_id):
+    cache = get_cache()
+    key = VERSION_KEY % user_id
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, initial_version(), timeout=None)
+
+
+def bump_version(*user_ids):
+    """
+    Invalidate the cached responses of `user_ids`.
+
+    The version is bumped right away, so the writing request never reads
+    its own stale entries, and again on commit, so entries that concurrent
+    requests cached from pre-commit data are dropped as well.
+    """
+    for user_id in set(user_ids):
+        if user_id is None:
+            continue
+        _bump_version(user_id)
+        transaction.on_commit(partial(_bump_version, user_id))
+
+
+def get_response_key(request, user_id, action, pk=None):
+    """Cache key of a list/detail response, normalized on the query string"""
+    query = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    raw = "%s|%s|%s|%s|%s" % (
+        action, pk, request.get_host(), request.accepted_media_type, query,
+    )
+    digest = hashlib.md5(raw.encode("utf-8"), usedforsecurity=False).hexdigest()
+    return RESPONSE_KEY % (user_id, get_version(user_id), digest)
@@ -0,0 +1,141 @@
+"""
+Denormalized per-user task counters.
+
+Writes report their effect as deltas which are applied with `F()`
+expressions in the writing transaction, so concurrent writers never lose
+an update. A counter row missing for a user is rebuilt from the tasks
+table on first use; `reconcile()` repairs any drift.
+"""
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, router, transaction
+from django.db.models import Count, F, Q
+
+from .models import Task, TaskCounter
+
+
+def aggregate_counts(user_ids=None, using=None):
+    """Exact `{user_id: (total, completed)}` from the tasks table"""
+    queryset = Task.objects.using(using).filter(author__isnull=False)
+    if user_ids is not None:
+        queryset = queryset.filter(author_id__in=user_ids)
+    rows = (
+        queryset.order_by()
+        .values('author_id')
+        .annotate(total=Count('id'), completed=Count('id', filter=Q(is_completed=True)))
+    )
+    return {row['author_id']: (row['total'], row['completed']) for row in rows}
+
+
+def rebuild_counter(user_id, delta=None):
+    """
+    Create or overwrite the counter of `user_id` from the tasks table.
+
+    `delta` is the `(total, completed)` effect of the caller's write, which
+    the count already includes. A concurrent transaction creating the row
+    first counted without that uncommitted write, so it is applied on top.
+    """
+    # Count where the counter is written, not on a lagging read replica
+    using = router.db_for_write(TaskCounter)
+    total, completed = aggregate_counts([user_id], using).get(user_id, (0, 0))
+    defaults = {'total': total, 'completed': completed, 'pending': total - completed}
+    try:
+        with transaction.atomic():
+            counter, _ = TaskCounter.objects.update_or_create(user_id=user_id, defaults=defaults)
+    except IntegrityError:
+        if delta is not None:
+            update_counter(user_id, *delta)
+        counter = TaskCounter.objects.get(user_id=user_id)
+    return counter
+
+
+def get_counter(user_id):
+    """Counter of `user_id`, rebuilt if it does not exist yet"""
+    counter = TaskCounter.objects.filter(user_id=user_id).first()
+    return counter if counter is not None else rebuild_counter(user_id)
+
+
+async def aget_counter(user_id):
+    """`get_counter()` for async views"""
+    counter = await TaskCounter.objects.filter(user_id=user_id).afirst()
+    return counter if counter is not None else await sync_to_async(rebuild_counter)(user_id)
+
+
+def adjust_counters(deltas):
+    """
+    Apply `{user_id: (total delta, completed delta)}`.
+
+    Call it after the write, in the same transaction: a missing counter is
+    rebuilt from the tasks table, which then already includes the write.
+    """
+    for user_id, (total, completed) in deltas.items():
+        if user_id is None or (total == 0 and completed == 0):
+            continue
+        if not update_counter(user_id, total, completed):
+            rebuild_counter(user_id, (total, completed))
+
+
+def update_counter(user_id, total, completed):
+    """Add the deltas to the counter of `user_id`; returns 0 if it does not exist"""
+    return TaskCounter.objects.filter(user_id=user_id).update(
+        total=F('total') + total,
+        completed=F('completed') + completed,
+        pending=F('pending') + (total - completed),
+    )
+
+
+def count_tasks(pairs, sign=1):
+    """Deltas of adding (sign=1) or removing (sign=-1) `(author_id, is_completed)` pairs"""
+    totals, completed = Counter(), Counter()
+    for author_id, is_completed in pairs:
+        totals[author_id] += sign
+        completed[author_id] += sign if is_completed else 0
+    return {user_id: (totals[user_id], completed[user_id]) for user_id in totals}
+
+
+def tasks_added(pairs):
+    adjust_counters(count_tasks(pairs))
+
+
+def tasks_removed(pairs):
+    adjust_counters(count_tasks(pairs, sign=-1))
+
+
+def tasks_changed(changes):
+    """
+    Apply `(before, after)` pairs of `(author_id, is_completed)` for
+    updated tasks, which covers both toggles and changes of author
+    """
+    deltas = {}
+    for before, after in changes:
+        if before == after:
+            continue
+        for (user_id, is_completed), sign in ((before, -1), (after, 1)):
+            total, completed = deltas.get(user_id, (0, 0))
+            deltas[user_id] = (total + sign, completed + (sign if is_completed else 0))
+    adjust_counters(deltas)
+
+
+def reconcile(user_ids=None):
+    """
+    Recompute the counters of `user_ids` (all users by default) and return
+    the ids of the users whose counter had drifted
+    """
+    exact = aggregate_counts(user_ids)
+    counters = TaskCounter.objects.all()
+    if user_ids is not None:
+        counters = counters.filter(user_id__in=user_ids)
+    drifted = []
+    with transaction.atomic():
+        for counter in counters.select_for_update():
+            total, completed = exact.pop(counter.user_id, (0, 0))
+            if (counter.total, counter.completed, counter.pending) != (total, completed, total - completed):
+                counter.total, counter.completed, counter.pending = total, completed, total - completed
+                counter.save(update_fields=['total', 'completed', 'pending'])
+                drifted.append(counter.user_id)
+        # Users with tasks but no counter yet
+        for user_id, (total, completed) in exact.items():
+            TaskCounter.objects.create(user_id=user_id, total=total, completed=completed, pending=total - completed)
+            drifted.append(user_id)
+    return drifted
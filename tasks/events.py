@@ -0,0 +1,212 @@
+"""
+Task change events, for the Server-Sent Events stream.
+
+Writes `publish()` created/updated/deleted events once their transaction
+commits. The configured backend (TASK_EVENTS_BACKEND) carries them to
+every process, where the in-process broker hands them to the open streams
+of the user. A stream only holds a small queue: no database access, and
+at most one backend listener per process however many streams are open.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache, partial
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import TaskEvent
+
+CREATED, UPDATED, DELETED = 'created', 'updated', 'deleted'
+
+
+class Subscription:
+    """Events of one user for one stream, consumed on the stream's event loop"""
+
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        """Queue `event`; on overflow the stream is told to resync and ends"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        """Next event, or None once the subscription overflowed"""
+        return await self.queue.get()
+
+
+class EventBroker:
+    """
+    In-process pub/sub: user id -> open subscriptions. `dispatch()` may be
+    called from any thread.
+    """
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.listeners = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, settings.TASK_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions[user_id].add(subscription)
+        self.ensure_listener(subscription.loop)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+    def has_subscriptions(self):
+        return bool(self.subscriptions)
+
+    def dispatch(self, user_id, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Loop closed under a stream that is going away
+                self.unsubscribe(subscription)
+
+    def ensure_listener(self, loop):
+        """Run the backend listener on `loop` while it has subscriptions"""
+        backend = get_backend()
+        if not hasattr(backend, 'listen'):
+            return
+        with self.lock:
+            task = self.listeners.get(loop)
+            if task is not None and not task.done():
+                return
+            self.listeners[loop] = loop.create_task(backend.listen(self))
+
+
+broker = EventBroker()
+
+
+class LocalBackend:
+    """Single process: events go straight to the broker"""
+
+    def publish(self, events):
+        for user_id, event in events:
+            broker.dispatch(user_id, event)
+
+
+class DatabaseBackend:
+    """
+    Events are written to the TaskEvent table and each process polls it
+    once per TASK_EVENTS_POLL_INTERVAL, only while it has open streams.
+    A stand-in for a message broker (Redis pub/sub, PostgreSQL
+    LISTEN/NOTIFY), which would implement the same two methods.
+
+    Ids are taken in insert order but become visible in commit order, so
+    a row may appear below the last id already polled. Each poll therefore
+    also reads the rows stored in the last TASK_EVENTS_SETTLE_SECONDS and
+    skips those already dispatched. An event is dated when it is stored,
+    just after its write committed.
+    """
+    batch_size = 500
+    prune_every = 60
+    fields = ('id', 'user_id', 'type', 'task_id', 'created_at')
+
+    def publish(self, events):
+        TaskEvent.objects.bulk_create(
+            TaskEvent(user_id=user_id, type=event['type'], task_id=event['id'])
+            for user_id, event in events
+        )
+
+    async def listen(self, broker):
+        last = await TaskEvent.objects.order_by('-id').values_list('id', flat=True).afirst() or 0
+        # Events stored before the first stream opened are not sent
+        seen = {
+            pk: created_at async for pk, created_at in TaskEvent.objects.filter(
+                id__lte=last, created_at__gte=self.get_settle_limit()
+            ).values_list('id', 'created_at')
+        }
+        polls = 0
+        while broker.has_subscriptions():
+            last = await self.poll(broker, last, seen)
+            polls += 1
+            if polls % self.prune_every == 0:
+                await self.prune()
+            await asyncio.sleep(settings.TASK_EVENTS_POLL_INTERVAL)
+
+    def get_settle_limit(self):
+        return timezone.now() - timedelta(seconds=settings.TASK_EVENTS_SETTLE_SECONDS)
+
+    async def poll(self, broker, last, seen):
+        """
+        Dispatch the events after id `last` and the late ones below it,
+        return the new last id. `seen` maps the ids dispatched within the
+        settle window to their date, and is updated.
+        """
+        limit = self.get_settle_limit()
+        late = TaskEvent.objects.filter(id__lte=last, created_at__gte=limit).exclude(id__in=list(seen))
+        self.dispatch(broker, [row async for row in late.order_by('id').values(*self.fields)], seen)
+        while True:
+            rows = [
+                row async for row in TaskEvent.objects.filter(id__gt=last)
+                .order_by('id')
+                .values(*self.fields)[: self.batch_size]
+            ]
+            self.dispatch(broker, rows, seen)
+            if rows:
+                last = rows[-1]['id']
+            if len(rows) < self.batch_size:
+                break
+        for pk, created_at in list(seen.items()):
+            if created_at < limit:
+                del seen[pk]
+        return last
+
+    def dispatch(self, broker, rows, seen):
+        for row in rows:
+            broker.dispatch(row['user_id'], make_event(row['type'], row['task_id'], row['created_at']))
+            seen[row['id']] = row['created_at']
+
+    async def prune(self):
+        limit = timezone.now() - timedelta(seconds=settings.TASK_EVENTS_RETENTION_SECONDS)
+        await TaskEvent.objects.filter(created_at__lt=limit).adelete()
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.TASK_EVENTS_BACKEND)()
+
+
+def make_event(event_type, task_id, at=None):
+    return {'type': event_type, 'id': str(task_id), 'at': at or timezone.now()}
+
+
+def publish(event_type, pairs):
+    """
+    Announce `event_type` for the (task id, author id) pairs once the
+    current transaction commits
+    """
+    at = timezone.now()
+    events = [
+        (author_id, make_event(event_type, task_id, at))
+        for task_id, author_id in pairs
+        if author_id is not None
+    ]
+    if events:
+        transaction.on_commit(partial(get_backend().publish, events))
@@ -0,0 +1,56 @@
+"""
+Streaming export of tasks as NDJSON or CSV.
+
+Rows are read with `.values_list().iterator()`, so no model instance is
+built and memory use does not depend on the number of tasks.
+"""
+import csv
+
+from core.utils import fast_json
+from core.utils.serializers_fields import get_value_formatter
+
+from .models import Task
+from .serializers import TaskSerializer
+
+
+EXPORT_FIELDS = TaskSerializer.default_fields
+
+
+class Echo:
+    """File-like object handing back what csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_chunks(queryset, fields, chunk_size, native_types=()):
+    """Yield lists of formatted rows, `chunk_size` rows at a time"""
+    formatters = [get_value_formatter(Task._meta.get_field(name), native_types) for name in fields]
+    converters = [(index, formatter) for index, formatter in enumerate(formatters) if formatter]
+    chunk = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        row = list(row)
+        for index, formatter in converters:
+            row[index] = formatter(row[index])
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_ndjson(queryset, fields=EXPORT_FIELDS, chunk_size=2000):
+    dumps = fast_json.dumps
+    for chunk in iter_chunks(queryset, fields, chunk_size, fast_json.NATIVE_TYPES):
+        yield b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in chunk)
+
+
+def stream_csv(queryset, fields=EXPORT_FIELDS, chunk_size=2000):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for chunk in iter_chunks(queryset, fields, chunk_size):
+        yield "".join(
+            writer.writerow(["true" if value is True else "false" if value is False else value for value in row])
+            for row in chunk
+        )
@@ -1,6 +1,7 @@
 from django_filters import rest_framework as filters
 from .models import *
 from django.db.models import Q, Value, F
+from .search import search_tasks
 
 
 class TaskFilter(filters.FilterSet):
@@ -19,7 +20,7 @@ class TaskFilter(filters.FilterSet):
         label="Updated on or before date (ISO 8601 date-time format, e.g.: 2021-01-01T23:59:59Z)",
     )
     search = filters.CharFilter(
-        method="filter_by_search_param", label="Search (name or Description, case-insensitive)"
+        method="filter_by_search_param", label="Search (name or Description, full-text, ranked by relevance)"
     )
     order_by = filters.OrderingFilter(
         fields=(
@@ -40,13 +41,33 @@ class TaskFilter(filters.FilterSet):
 
     def filter_by_search_param(self, queryset, name, value):
         """
-        Search tasks by Title or description.
+        Search tasks by Title or description, most relevant first.
         """
 
-        return (
-            queryset.filter(
-                Q(title__icontains=value)
-                | Q(description__icontains=value)
-            )
-            .order_by("title")
-        )
+        return search_tasks(queryset, value)
+
+    def get_counter_field(self):
+        """
+        Name of the TaskCounter field equal to the size of the filtered
+        list, when nothing but `is_completed` narrows it, None otherwise
+        """
+        if not self.is_valid():
+            return None
+        active = {
+            name: value for name, value in self.form.cleaned_data.items()
+            if name != 'order_by' and value not in (None, '', [])
+        }
+        if set(active) - {'is_completed'}:
+            return None
+        if 'is_completed' not in active:
+            return 'total'
+        return 'completed' if active['is_completed'] else 'pending'
+
+
+class TaskArchiveFilter(TaskFilter):
+    """
+    TaskFilter on archived tasks
+    """
+
+    class Meta(TaskFilter.Meta):
+        model = TaskArchive
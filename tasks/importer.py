@@ -0,0 +1,135 @@
+"""
+Streaming import of tasks from NDJSON or CSV.
+
+The input is read line by line, every row is validated with the
+TaskSerializer rules and valid rows are inserted with batched bulk_create.
+A malformed row is reported and skipped without aborting its batch.
+"""
+import csv
+import json
+import time
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .cache import bump_version
+from .counters import tasks_added
+from .events import CREATED, publish
+from .models import Task
+from .serializers import TaskSerializer
+
+
+MAX_REPORTED_ERRORS = 100
+
+
+def decode_lines(lines, invalid):
+    """
+    Decode an iterable of UTF-8 byte lines, dropping a leading BOM. A line
+    that is not valid UTF-8 is decoded with replacement characters and its
+    number added to the `invalid` set, for the reader to reject its row.
+    """
+    for number, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            encoding = "utf-8-sig" if number == 1 else "utf-8"
+            try:
+                line = line.decode(encoding)
+            except UnicodeDecodeError:
+                invalid.add(number)
+                line = line.decode(encoding, "replace")
+        yield line
+
+
+def invalid_encoding_error():
+    return serializers.ValidationError({"non_field_errors": ["Encodage invalide : UTF-8 attendu"]})
+
+
+def read_ndjson(lines):
+    """Yield (line number, row or error) for each non-blank NDJSON line"""
+    invalid = set()
+    for number, line in enumerate(decode_lines(lines, invalid), start=1):
+        if number in invalid:
+            yield number, invalid_encoding_error()
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, serializers.ValidationError({"non_field_errors": [f"JSON invalide : {error}"]})
+            continue
+        if not isinstance(row, dict):
+            row = serializers.ValidationError({"non_field_errors": ["Un objet JSON est attendu"]})
+        yield number, row
+
+
+def read_csv(lines):
+    """Yield (line number, row) for each CSV record, the first line being the header"""
+    invalid = set()
+    reader = csv.DictReader(decode_lines(lines, invalid))
+    last_line = 1
+    for row in reader:
+        # A quoted record may span several lines
+        first_line, last_line = last_line + 1, reader.line_num
+        if any(number in invalid for number in range(first_line, last_line + 1)):
+            yield reader.line_num, invalid_encoding_error()
+            continue
+        if None in row:
+            yield reader.line_num, serializers.ValidationError({"non_field_errors": ["Trop de colonnes"]})
+            continue
+        yield reader.line_num, row
+
+
+READERS = {
+    "ndjson": read_ndjson,
+    "csv": read_csv,
+}
+
+
+def import_tasks(rows, author, batch_size=1000):
+    """
+    Validate and insert the (line number, row) pairs of `rows` for `author`.
+
+    Returns a report with the number of created and rejected rows, the
+    first errors by line and the throughput.
+    """
+    started = time.monotonic()
+    serializer = TaskSerializer()
+    created = rejected = 0
+    errors = []
+    batch = []
+
+    def flush():
+        nonlocal created
+        with transaction.atomic():
+            Task.objects.bulk_create(batch)
+            tasks_added((author.pk, task.is_completed) for task in batch)
+            publish(CREATED, [(task.pk, author.pk) for task in batch])
+        created += len(batch)
+        batch.clear()
+
+    for number, row in rows:
+        try:
+            if isinstance(row, serializers.ValidationError):
+                raise row
+            validated = serializer.run_validation(row)
+        except serializers.ValidationError as error:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": number, "errors": error.detail})
+            continue
+        batch.append(Task(author=author, **validated))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    if created:
+        bump_version(author.pk)
+
+    elapsed = time.monotonic() - started
+    return {
+        "created": created,
+        "rejected": rejected,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round((created + rejected) / elapsed, 1) if elapsed else None,
+    }
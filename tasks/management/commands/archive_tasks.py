@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.archive import archive_tasks
+
+
+class Command(BaseCommand):
+    help = "Move completed tasks older than TASK_ARCHIVE_AFTER_DAYS to the archive table, in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=None,
+            help="Archive tasks completed more than this many days ago (default: %d)" % settings.TASK_ARCHIVE_AFTER_DAYS,
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=None,
+            help="Tasks moved per transaction (default: %d)" % settings.TASK_ARCHIVE_BATCH_SIZE,
+        )
+        parser.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches")
+        parser.add_argument("--pause", type=float, default=0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        moved = archive_tasks(
+            days=options["days"],
+            batch_size=options["batch_size"],
+            max_batches=options["max_batches"],
+            pause=options["pause"],
+        )
+        self.stdout.write(self.style.SUCCESS("%d task(s) archived" % moved))
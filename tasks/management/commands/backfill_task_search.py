@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from tasks import search
+
+
+class Command(BaseCommand):
+    help = "Populate the full-text search index for existing tasks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Rows updated per statement on PostgreSQL (default: 1000)",
+        )
+        parser.add_argument(
+            "--database", default=DEFAULT_DB_ALIAS,
+            help="Database alias to backfill (default: %s)" % DEFAULT_DB_ALIAS,
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        indexed = search.backfill(connection, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS("%d task(s) indexed" % indexed))
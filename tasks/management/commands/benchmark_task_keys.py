@@ -0,0 +1,89 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models, transaction
+
+from core.utils.utils import uuid7
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def get_index_size(table):
+    """Bytes used by the primary key index of `table`, None if the backend can't tell"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT pg_relation_size(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND indisprimary",
+                [table],
+            )
+        elif connection.vendor == "sqlite":
+            cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", ["sqlite_autoindex_%s_1" % table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare task primary key generators: insert --rows rows keyed by each into a scratch table "
+        "shaped like tasks_task, and report the insert throughput and the primary key index size"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Rows inserted per generator (default: 1000000)")
+        parser.add_argument("--batch-size", type=int, default=10_000, help="Rows inserted per transaction (default: 10000)")
+        parser.add_argument(
+            "--generator", choices=GENERATORS, action="append", dest="generators",
+            help="Only this generator (repeatable, default: all)",
+        )
+
+    def handle(self, *args, **options):
+        for name in options["generators"] or GENERATORS:
+            table = "benchmark_task_keys_%s" % name
+            self.create_table(table)
+            try:
+                rows_per_second, last_rows_per_second = self.fill(
+                    table, GENERATORS[name], options["rows"], options["batch_size"],
+                )
+                size = get_index_size(table)
+            finally:
+                self.drop_table(table)
+            self.stdout.write(
+                "%s: %d rows, %.0f rows/s (%.0f rows/s over the last tenth), primary key index %s" % (
+                    name, options["rows"], rows_per_second, last_rows_per_second,
+                    "unknown" if size is None else "%.1f MB" % (size / 1024 / 1024),
+                )
+            )
+
+    def create_table(self, table):
+        quote = connection.ops.quote_name
+        self.drop_table(table)
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE %s (id %s NOT NULL PRIMARY KEY, title varchar(200) NOT NULL)" % (
+                quote(table), models.UUIDField().db_type(connection),
+            ))
+
+    def drop_table(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS %s" % connection.ops.quote_name(table))
+
+    def fill(self, table, generate, rows, batch_size):
+        """Insert `rows` rows in batches, return the overall and the last tenth's rows per second"""
+        sql = "INSERT INTO %s (id, title) VALUES (%%s, %%s)" % connection.ops.quote_name(table)
+        field = models.UUIDField()
+        last_tenth = rows - rows // 10
+        started = time.perf_counter()
+        last_started, inserted = None, 0
+        while inserted < rows:
+            count = min(batch_size, rows - inserted)
+            batch = [(field.get_db_prep_value(generate(), connection), "Tâche") for _ in range(count)]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, batch)
+            inserted += count
+            if last_started is None and inserted >= last_tenth:
+                last_started, last_inserted = time.perf_counter(), inserted
+        finished = time.perf_counter()
+        last_rate = (inserted - last_inserted) / (finished - last_started) if inserted > last_inserted else 0.0
+        return inserted / (finished - started), last_rate
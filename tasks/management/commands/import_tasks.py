@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.importer import READERS, import_tasks
+
+
+class Command(BaseCommand):
+    help = "Import tasks for a user from an NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument("--email", required=True, help="Email of the user owning the tasks")
+        parser.add_argument(
+            "--format", choices=sorted(READERS), default=None,
+            help="Input format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Rows per INSERT (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(email=options["email"])
+        except User.DoesNotExist:
+            raise CommandError("No user with email %s" % options["email"])
+
+        input_format = options["format"] or options["path"].rsplit(".", 1)[-1].lower()
+        if input_format not in READERS:
+            raise CommandError("Unknown format %r, use --format" % input_format)
+
+        with open(options["path"], "rb") as lines:
+            report = import_tasks(READERS[input_format](lines), author, batch_size=options["batch_size"])
+
+        for error in report["errors"]:
+            self.stderr.write("line %(line)s: %(errors)s" % error)
+        self.stdout.write(self.style.SUCCESS(
+            "%(created)d task(s) created, %(rejected)d rejected in %(elapsed_seconds)ss "
+            "(%(rows_per_second)s rows/s)" % report
+        ))
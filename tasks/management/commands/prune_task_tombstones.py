@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete task tombstones older than TASK_TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            "%d tombstone(s) older than %d days deleted" % (deleted, settings.TASK_TOMBSTONE_RETENTION_DAYS)
+        ))
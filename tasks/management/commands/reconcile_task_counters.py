@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tasks.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-user task counters from the tasks table and repair any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="user_ids", help="Only this user id (repeatable)")
+
+    def handle(self, *args, **options):
+        drifted = reconcile(options["user_ids"])
+        for user_id in drifted:
+            self.stdout.write("Counter of user %s repaired" % user_id)
+        self.stdout.write(self.style.SUCCESS("%d counter(s) repaired" % len(drifted)))
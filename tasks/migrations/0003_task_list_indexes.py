@@ -0,0 +1,35 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core.utils.migrations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0002_task_author'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['author', 'created_at', 'id'], name='task_author_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['author', 'updated_at', 'id'], name='task_author_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['author', 'is_completed', 'updated_at', 'id'], name='task_author_status_upd_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['author', 'created_at', 'id'], name='task_author_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from tasks import search
+
+
+def install_search(apps, schema_editor):
+    search.install(schema_editor.connection)
+
+
+def uninstall_search(apps, schema_editor):
+    search.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0003_task_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 03:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.UUIDField(help_text='Identifiant de la tâche supprimée')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Date de suppression')),
+                ('author', models.ForeignKey(help_text='Auteur de la tâche', on_delete=django.db.models.deletion.CASCADE, related_name='task_tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tâche supprimée',
+                'verbose_name_plural': 'Tâches supprimées',
+                'ordering': ['deleted_at', 'task_id'],
+                'indexes': [models.Index(fields=['author', 'deleted_at', 'task_id'], name='tombstone_author_deleted_idx')],
+            },
+        ),
+    ]
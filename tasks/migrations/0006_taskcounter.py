@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_managers'),
+        ('tasks', '0005_tasktombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('user', models.OneToOneField(help_text='Utilisateur', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0, help_text='Nombre de tâches')),
+                ('completed', models.IntegerField(default=0, help_text='Nombre de tâches terminées')),
+                ('pending', models.IntegerField(default=0, help_text='Nombre de tâches en cours')),
+            ],
+            options={
+                'verbose_name': 'Compteur de tâches',
+                'verbose_name_plural': 'Compteurs de tâches',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_taskcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(help_text='created, updated ou deleted', max_length=16)),
+                ('task_id', models.UUIDField(help_text='Identifiant de la tâche')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, help_text="Date de l'évènement")),
+                ('user', models.ForeignKey(help_text='Utilisateur notifié', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Évènement de tâche',
+                'verbose_name_plural': 'Évènements de tâches',
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_taskevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskArchive',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(help_text='Titre de la tâche', max_length=200)),
+                ('description', models.TextField(blank=True, help_text='Description détaillée', null=True)),
+                ('is_completed', models.BooleanField(default=True, help_text='Statut de complétion')),
+                ('created_at', models.DateTimeField(help_text='Date de création')),
+                ('updated_at', models.DateTimeField(help_text='Date de dernière modification')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, help_text="Date d'archivage")),
+            ],
+            options={
+                'verbose_name': 'Tâche archivée',
+                'verbose_name_plural': 'Tâches archivées',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='taskarchive',
+            name='author',
+            field=models.ForeignKey(blank=True, help_text='Auteur de la tâche', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='taskarchive',
+            index=models.Index(fields=['author', 'created_at', 'id'], name='archive_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskarchive',
+            index=models.Index(fields=['author', 'updated_at', 'id'], name='archive_author_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+from core.utils.migrations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0008_taskarchive'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_completed', True)), fields=['updated_at', 'id'], name='task_completed_upd_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-18 05:21
+
+import core.utils.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_completed_index'),
+    ]
+
+    # The default is applied by Django, not the database: only the state
+    # changes. A database AlterField would copy the whole table on SQLite
+    # and drop the search triggers with it.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='task',
+                    name='id',
+                    field=models.UUIDField(default=core.utils.utils.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from tasks import search
+
+
+def reindex_search(apps, schema_editor):
+    search.install(schema_editor.connection)
+    search.reindex(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0010_task_uuid7_default'),
+    ]
+
+    # PostgreSQL vectors were built without unaccent: index them again with
+    # the tasks_search configuration.
+    operations = [
+        migrations.RunPython(reindex_search, migrations.RunPython.noop),
+    ]
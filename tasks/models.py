@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from core.utils.abstract_models import BaseModel
 from django.contrib.auth import get_user_model
 User = get_user_model()
@@ -17,7 +18,112 @@ class Task(BaseModel):
         ordering = ['-created_at']
         verbose_name = "Tâche"
         verbose_name_plural = "Tâches"
+        # Every list query is scoped on author, then optionally filtered on
+        # is_completed / updated_at and sorted on created_at or updated_at.
+        # The trailing id matches the (field, id) keyset used by the cursor pagination.
+        indexes = [
+            models.Index(fields=['author', 'created_at', 'id'], name='task_author_created_idx'),
+            models.Index(fields=['author', 'updated_at', 'id'], name='task_author_updated_idx'),
+            models.Index(fields=['author', 'is_completed', 'updated_at', 'id'], name='task_author_status_upd_idx'),
+            models.Index(
+                fields=['author', 'created_at', 'id'],
+                name='task_author_pending_idx',
+                condition=models.Q(is_completed=False),
+            ),
+            # Oldest completed tasks first, for the archive mover.
+            models.Index(
+                fields=['updated_at', 'id'],
+                name='task_completed_upd_idx',
+                condition=models.Q(is_completed=True),
+            ),
+        ]
 
     def __str__(self):
         status = "✓" if self.is_completed else "○"
         return f"{status} {self.title}"
+
+
+class TaskArchive(models.Model):
+    """
+    Completed task moved out of the tasks table by `archive_tasks`, read
+    only. Same columns as Task, with their original dates.
+    """
+    id = models.UUIDField(primary_key=True, editable=False)
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks', help_text="Auteur de la tâche", null=True, blank=True)
+    title = models.CharField(max_length=200, help_text="Titre de la tâche")
+    description = models.TextField(blank=True, null=True, help_text="Description détaillée")
+    is_completed = models.BooleanField(default=True, help_text="Statut de complétion")
+    created_at = models.DateTimeField(help_text="Date de création")
+    updated_at = models.DateTimeField(help_text="Date de dernière modification")
+    archived_at = models.DateTimeField(default=timezone.now, help_text="Date d'archivage")
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Tâche archivée"
+        verbose_name_plural = "Tâches archivées"
+        indexes = [
+            models.Index(fields=['author', 'created_at', 'id'], name='archive_author_created_idx'),
+            models.Index(fields=['author', 'updated_at', 'id'], name='archive_author_updated_idx'),
+        ]
+
+    def __str__(self):
+        return f"✓ {self.title}"
+
+
+class TaskTombstone(models.Model):
+    """
+    Trace of a deleted task, read by the delta sync of offline clients
+    """
+    task_id = models.UUIDField(help_text="Identifiant de la tâche supprimée")
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_tombstones', help_text="Auteur de la tâche")
+    deleted_at = models.DateTimeField(default=timezone.now, help_text="Date de suppression")
+
+    class Meta:
+        ordering = ['deleted_at', 'task_id']
+        verbose_name = "Tâche supprimée"
+        verbose_name_plural = "Tâches supprimées"
+        indexes = [
+            models.Index(fields=['author', 'deleted_at', 'task_id'], name='tombstone_author_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id} ({self.deleted_at:%Y-%m-%d %H:%M})"
+
+
+class TaskCounter(models.Model):
+    """
+    Denormalized task counts of a user, kept in step with every write so
+    that paginated lists do not run a COUNT(*) per page
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='task_counter', help_text="Utilisateur")
+    # Plain integers: a counter that drifted below zero must not make the
+    # write that decrements it fail, `reconcile_task_counters` repairs it.
+    total = models.IntegerField(default=0, help_text="Nombre de tâches")
+    completed = models.IntegerField(default=0, help_text="Nombre de tâches terminées")
+    pending = models.IntegerField(default=0, help_text="Nombre de tâches en cours")
+
+    class Meta:
+        verbose_name = "Compteur de tâches"
+        verbose_name_plural = "Compteurs de tâches"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.completed}/{self.total}"
+
+
+class TaskEvent(models.Model):
+    """
+    Task change announced to the event streams of other processes, by the
+    database event backend. Rows are short lived.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', help_text="Utilisateur notifié")
+    type = models.CharField(max_length=16, help_text="created, updated ou deleted")
+    task_id = models.UUIDField(help_text="Identifiant de la tâche")
+    created_at = models.DateTimeField(default=timezone.now, db_index=True, help_text="Date de l'évènement")
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Évènement de tâche"
+        verbose_name_plural = "Évènements de tâches"
+
+    def __str__(self):
+        return f"{self.type} {self.task_id}"
@@ -0,0 +1,255 @@
+"""
+Full-text search over task titles and descriptions.
+
+PostgreSQL keeps a weighted `search_vector` tsvector column on `tasks_task`,
+maintained by a trigger and indexed with GIN. SQLite keeps an FTS5
+external-content shadow table, `tasks_task_fts`, maintained by triggers.
+Other backends fall back to a case-insensitive substring match.
+
+Both indexes ignore case and accents: SQLite with the `remove_diacritics`
+tokenizer option, PostgreSQL with the `tasks_search` text search
+configuration, `simple` behind the unaccent dictionary.
+
+The FTS5 table is keyed on the rowid of `tasks_task`, which is not stable:
+a migration that rebuilds the table renumbers the rows and drops the
+triggers, so both are restored by `reindex_after_migrate`. A VACUUM may
+renumber them as well; run `backfill_task_search` after one.
+"""
+import re
+import uuid
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+TOKEN_RE = re.compile(r'\w+')
+
+POSTGRESQL_INSTALL = [
+    # unaccent is a trusted extension: the database owner may create it.
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'tasks_search') THEN
+            CREATE TEXT SEARCH CONFIGURATION tasks_search (COPY = simple);
+            ALTER TEXT SEARCH CONFIGURATION tasks_search
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+        END IF;
+    END
+    $$
+    """,
+    'ALTER TABLE tasks_task ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    """
+    CREATE OR REPLACE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('tasks_search', coalesce(NEW.title, '')), 'A')
+            || setweight(to_tsvector('tasks_search', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    'DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task',
+    """
+    CREATE TRIGGER tasks_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update()
+    """,
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS tasks_task_search_idx ON tasks_task USING GIN (search_vector)',
+]
+
+POSTGRESQL_UNINSTALL = [
+    'DROP INDEX CONCURRENTLY IF EXISTS tasks_task_search_idx',
+    'DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task',
+    'DROP FUNCTION IF EXISTS tasks_task_search_vector_update()',
+    'ALTER TABLE tasks_task DROP COLUMN IF EXISTS search_vector',
+    'DROP TEXT SEARCH CONFIGURATION IF EXISTS tasks_search',
+]
+
+# The table is walked by primary key, so each batch is an index range scan
+# that starts where the previous one stopped. The nil UUID is never a task
+# id (uuid4 and uuid7 both set version bits).
+POSTGRESQL_BATCH = 'SELECT id FROM tasks_task WHERE id > %s ORDER BY id LIMIT %s'
+POSTGRESQL_START = uuid.UUID(int=0)
+
+POSTGRESQL_INDEX = """
+    UPDATE tasks_task SET search_vector =
+        setweight(to_tsvector('tasks_search', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('tasks_search', coalesce(description, '')), 'B')
+    WHERE id = ANY(%s)
+"""
+POSTGRESQL_MISSING = ' AND search_vector IS NULL'
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts USING fts5(
+        title, description, content='tasks_task', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, title, description)
+        VALUES (new.rowid, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description)
+        VALUES ('delete', old.rowid, old.title, old.description);
+        INSERT INTO tasks_task_fts(rowid, title, description)
+        VALUES (new.rowid, new.title, new.description);
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS tasks_task_fts_insert',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_delete',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_update',
+    'DROP TABLE IF EXISTS tasks_task_fts',
+]
+
+# External content tables are re-indexed from tasks_task in one statement.
+SQLITE_BACKFILL = "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('rebuild')"
+
+SQLITE_INSTALLED = "SELECT 1 FROM sqlite_master WHERE name = 'tasks_task_fts'"
+
+
+def install(connection):
+    """Create the search column/table, triggers and index for `connection`"""
+    statements = {
+        'postgresql': POSTGRESQL_INSTALL,
+        'sqlite': SQLITE_INSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def uninstall(connection):
+    """Drop everything `install` created"""
+    statements = {
+        'postgresql': POSTGRESQL_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def backfill(connection, batch_size=1000, missing_only=True):
+    """
+    Index the rows that were written before the search triggers existed,
+    or every row without `missing_only`. Returns the number of rows indexed.
+    """
+    install(connection)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(SQLITE_BACKFILL)
+            cursor.execute('SELECT COUNT(*) FROM tasks_task')
+            return cursor.fetchone()[0]
+        if connection.vendor != 'postgresql':
+            return 0
+        statement = POSTGRESQL_INDEX + (POSTGRESQL_MISSING if missing_only else '')
+        total, last = 0, POSTGRESQL_START
+        while True:
+            cursor.execute(POSTGRESQL_BATCH, [last, batch_size])
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                return total
+            # Small batches keep each UPDATE's row locks short-lived.
+            cursor.execute(statement, [ids])
+            total += cursor.rowcount
+            last = ids[-1]
+
+
+def reindex(connection, batch_size=1000):
+    """
+    Index every row again, after the way rows are indexed changed.
+    Returns the number of rows indexed.
+    """
+    return backfill(connection, batch_size=batch_size, missing_only=False)
+
+
+def reindex_after_migrate(using=DEFAULT_DB_ALIAS, plan=None, **kwargs):
+    """
+    post_migrate receiver restoring the SQLite triggers and rebuilding the
+    index after tasks migrations, which may have rebuilt `tasks_task`
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not any(
+        migration.app_label == 'tasks' for migration, backwards in plan or ()
+    ):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(SQLITE_INSTALLED)
+        if cursor.fetchone() is None:
+            # Not installed yet, or migrated back before the search.
+            return
+    backfill(connection)
+
+
+def search_tasks(queryset, value):
+    """
+    Filter `queryset` on the search terms in `value` and order it by
+    relevance, best match first. Every term must match, as a prefix, so
+    results narrow while the user types.
+    """
+    terms = TOKEN_RE.findall(value)
+    vendor = connections[queryset.db].vendor
+    # Only the tasks table is indexed; the archive is searched by scanning.
+    if not terms or vendor not in ('postgresql', 'sqlite') or queryset.model._meta.db_table != 'tasks_task':
+        return queryset.filter(
+            Q(title__icontains=value) | Q(description__icontains=value)
+        ).order_by('title')
+
+    if vendor == 'postgresql':
+        query = ' & '.join('%s:*' % term for term in terms)
+        return (
+            queryset.alias(
+                search_match=RawSQL(
+                    "tasks_task.search_vector @@ to_tsquery('tasks_search', %s)",
+                    [query],
+                    output_field=BooleanField(),
+                )
+            )
+            .filter(search_match=True)
+            .annotate(
+                search_rank=RawSQL(
+                    "ts_rank(tasks_task.search_vector, to_tsquery('tasks_search', %s))",
+                    [query],
+                    output_field=FloatField(),
+                )
+            )
+            .order_by('-search_rank', '-created_at')
+        )
+
+    query = ' '.join('"%s"*' % term for term in terms)
+    return (
+        queryset.alias(
+            search_match=RawSQL(
+                'tasks_task.rowid IN (SELECT rowid FROM tasks_task_fts WHERE tasks_task_fts MATCH %s)',
+                [query],
+                output_field=BooleanField(),
+            )
+        )
+        .filter(search_match=True)
+        .annotate(
+            # bm25() is lower for better matches; title hits weigh twice as much.
+            search_rank=RawSQL(
+                'SELECT -bm25(tasks_task_fts, 2.0, 1.0) FROM tasks_task_fts'
+                ' WHERE tasks_task_fts MATCH %s AND tasks_task_fts.rowid = tasks_task.rowid',
+                [query],
+                output_field=FloatField(),
+            )
+        )
+        .order_by('-search_rank', '-created_at')
+    )
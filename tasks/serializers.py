@@ -1,15 +1,131 @@
+from django.db import transaction
+from django.db.models.functions import Substr
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Task
+from core.utils.serializers_fields import get_value_formatter
+from .cache import bump_version
+from .counters import tasks_added, tasks_changed
+from .events import CREATED, UPDATED, publish
+from .models import Task, TaskTombstone
+
+
+DESCRIPTION_PREVIEW_LENGTH = 100
+
+
+def annotate_description_preview(queryset):
+    """
+    Annotate `description_preview` with the head of the description only,
+    one character longer than the preview to tell whether it is truncated
+    """
+    return queryset.annotate(description_preview=Substr('description', 1, DESCRIPTION_PREVIEW_LENGTH + 1))
+
+
+def select_fields(queryset, fields):
+    """
+    Load only the columns of `fields` (and `updated_at`, read by the
+    validators) for TaskSerializer instances
+    """
+    columns = [name for name in fields if name not in TaskSerializer.optional_fields]
+    queryset = queryset.only(*columns, 'updated_at')
+    if 'description_preview' in fields:
+        queryset = annotate_description_preview(queryset)
+    return queryset
+
+
+def make_description_preview(text):
+    """Shorten `text` to DESCRIPTION_PREVIEW_LENGTH characters, with an ellipsis if cut"""
+    if text is None or len(text) <= DESCRIPTION_PREVIEW_LENGTH:
+        return text
+    return text[:DESCRIPTION_PREVIEW_LENGTH].rstrip() + "…"
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """
+    Task list serializer, writes a whole batch with a single bulk query
+    """
+
+    @property
+    def instance_map(self):
+        """Tasks being updated, by id"""
+        if not hasattr(self, '_instance_map'):
+            self._instance_map = {str(task.pk): task for task in self.instance or []}
+        return self._instance_map
+
+    def run_child_validation(self, data):
+        """Validate each item of an update against the task it targets"""
+        if self.instance is None:
+            return super().run_child_validation(data)
+        pk = str(data.get('id')) if isinstance(data, dict) else None
+        if pk not in self.instance_map:
+            raise serializers.ValidationError({'id': ["Tâche introuvable"]}, code='not_found')
+        self.child.instance = self.instance_map[pk]
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        validated['id'] = pk
+        return validated
+
+    def create(self, validated_data):
+        """Create the tasks with one INSERT"""
+        user = self.context['request'].user
+        tasks = [Task(author=user, **attrs) for attrs in validated_data]
+        tasks = Task.objects.bulk_create(tasks)
+        tasks_added((user.pk, task.is_completed) for task in tasks)
+        publish(CREATED, [(task.pk, user.pk) for task in tasks])
+        bump_version(user.pk)
+        return tasks
+
+    def update(self, instance, validated_data):
+        """Update the tasks with one UPDATE"""
+        # bulk_update() skips auto_now, so updated_at is set by hand.
+        now = timezone.now()
+        fields = {'updated_at'}
+        tasks = []
+        changes = []
+        for attrs in validated_data:
+            task = self.instance_map[attrs.pop('id')]
+            before = (task.author_id, task.is_completed)
+            for name, value in attrs.items():
+                setattr(task, name, value)
+            fields.update(attrs)
+            task.updated_at = now
+            tasks.append(task)
+            changes.append((before, (task.author_id, task.is_completed)))
+        Task.objects.bulk_update(tasks, sorted(fields))
+        tasks_changed(changes)
+        publish(UPDATED, [(task.pk, task.author_id) for task in tasks])
+        bump_version(*(task.author_id for task in tasks))
+        return tasks
+
 
 class TaskSerializer(serializers.ModelSerializer):
     """
-    Task serializer
+    Task serializer.
+
+    A `fields` list in the context restricts the output to those fields;
+    optional fields are only output when listed there.
     """
-    
+    description_preview = serializers.SerializerMethodField()
+
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'is_completed', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'description', 'is_completed', 'created_at', 'updated_at', 'description_preview']
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = TaskListSerializer
+
+    optional_fields = ['description_preview']
+    default_fields = ['id', 'title', 'description', 'is_completed', 'created_at', 'updated_at']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields') or self.default_fields
+        for name in set(self.fields) - set(requested):
+            self.fields.pop(name)
+
+    def get_description_preview(self, obj):
+        """Head of the description, from the annotation when the queryset has it"""
+        if hasattr(obj, 'description_preview'):
+            return make_description_preview(obj.description_preview)
+        return make_description_preview(obj.description)
     
     def validate_title(self, value):
         """Validate the title"""
@@ -28,4 +144,78 @@ class TaskSerializer(serializers.ModelSerializer):
         """Create a task"""
         user = self.context['request'].user
         validated_data['author'] = user
-        return Task.objects.create(**validated_data)
\ No newline at end of file
+        with transaction.atomic():
+            task = Task.objects.create(**validated_data)
+            tasks_added([(user.pk, task.is_completed)])
+            publish(CREATED, [(task.pk, user.pk)])
+        bump_version(user.pk)
+        return task
+
+    def update(self, instance, validated_data):
+        """Update a task"""
+        before = (instance.author_id, instance.is_completed)
+        with transaction.atomic():
+            task = super().update(instance, validated_data)
+            tasks_changed([(before, (task.author_id, task.is_completed))])
+            publish(UPDATED, [(task.pk, task.author_id)])
+        bump_version(task.author_id)
+        return task
+
+
+class TaskValuesSerializer:
+    """
+    Read only fast path of TaskSerializer, for lists.
+
+    Rows are fetched as `.values()` dicts of the declared fields and only
+    the values DRF converts (UUIDs, datetimes) go through converters built
+    once per call, instead of one field object per field per instance.
+    The output is identical to `TaskSerializer(many=True).data`, except
+    that values of `native_types` are left for the JSON renderer to encode.
+    """
+    model = Task
+    fields = TaskSerializer.default_fields
+    # Always fetched, for the pagination keys, and dropped if not requested
+    key_fields = ['id', 'created_at', 'updated_at']
+
+    def __init__(self, fields=None, native_types=()):
+        self.fields = list(fields or self.fields)
+        self.native_types = native_types
+        self.extra_fields = [name for name in self.key_fields if name not in self.fields]
+
+    def get_queryset(self, queryset):
+        """Narrow `queryset` to the rows to represent"""
+        if 'description_preview' in self.fields:
+            queryset = annotate_description_preview(queryset)
+        return queryset.values(*self.fields, *self.extra_fields)
+
+    def get_converters(self):
+        converters = []
+        for name in self.fields:
+            if name == 'description_preview':
+                formatter = make_description_preview
+            else:
+                formatter = get_value_formatter(self.model._meta.get_field(name), self.native_types)
+            if formatter:
+                converters.append((name, formatter))
+        return converters
+
+    def to_representation(self, rows):
+        """Format the `.values()` rows in place and return them"""
+        converters = self.get_converters()
+        for row in rows:
+            for name, convert in converters:
+                row[name] = convert(row[name])
+            for name in self.extra_fields:
+                del row[name]
+        return rows
+
+
+class TaskTombstoneSerializer(serializers.ModelSerializer):
+    """
+    Deleted task serializer, for the delta sync
+    """
+    id = serializers.UUIDField(source='task_id', read_only=True)
+
+    class Meta:
+        model = TaskTombstone
+        fields = ['id', 'deleted_at']
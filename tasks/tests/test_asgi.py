@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from asgiref.sync import SyncToAsync, async_to_sync
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.asgi import AsyncHandler, route_async_paths
+
+
+@pytest.fixture
+def thread_hops(monkeypatch):
+    """Les fonctions synchrones lancées dans le thread de la requête par sync_to_async"""
+    hops = []
+    call = SyncToAsync.__call__
+
+    def recording_call(self, *args, **kwargs):
+        if self._thread_sensitive:
+            hops.append(self.func)
+        return call(self, *args, **kwargs)
+
+    monkeypatch.setattr(SyncToAsync, '__call__', recording_call)
+    return hops
+
+
+def get_response(handler, **headers):
+    request = AsyncRequestFactory().get(reverse('async-task-list'), headers=headers)
+    return async_to_sync(handler.get_response_async)(request)
+
+
+@pytest.mark.django_db
+class TestAsyncHandler:
+    """Tests pour la chaîne de middlewares des routes asynchrones"""
+
+    def test_no_thread_hop(self, thread_hops):
+        """the async chain stays on the event loop, the full chain does not"""
+        response = get_response(AsyncHandler())
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert thread_hops == []
+
+        get_response(ASGIHandler())
+        assert thread_hops
+
+    def test_serves_async_views(self, user, task, other_user_task, settings):
+        """the async views answer with the security and timing headers"""
+        settings.SERVER_TIMING_SAMPLE_RATE = 1
+        token = AccessToken.for_user(user)
+        response = get_response(AsyncHandler(), authorization=f'Bearer {token}')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item['title'] for item in json.loads(response.content)['data']] == [task.title]
+        assert response['X-Content-Type-Options'] == 'nosniff'
+        assert 'Server-Timing' in response
+
+    @pytest.mark.parametrize('middleware', [
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+        'django.middleware.csrf.CsrfViewMiddleware',
+    ])
+    def test_refuses_sync_middleware(self, settings, middleware):
+        """a middleware that would hop to a thread is refused"""
+        settings.ASYNC_MIDDLEWARE = [middleware]
+
+        with pytest.raises(ImproperlyConfigured):
+            AsyncHandler()
+
+    def test_routes_async_paths(self):
+        """only the HTTP requests on ASYNC_PATHS go to the async handler"""
+        calls = []
+
+        def application(name):
+            async def app(scope, receive, send):
+                calls.append((name, scope['type'], scope.get('path')))
+            return app
+
+        router = async_to_sync(route_async_paths(application('django'), application('async')))
+        for path in ['/api/async/tasks/', '/api/tasks/events/', '/api/tasks/', '/static/app.css']:
+            router({'type': 'http', 'path': path}, None, None)
+        router({'type': 'http', 'path': '/root/api/async/tasks/', 'root_path': '/root'}, None, None)
+        router({'type': 'lifespan'}, None, None)
+
+        assert calls == [
+            ('async', 'http', '/api/async/tasks/'),
+            ('async', 'http', '/api/tasks/events/'),
+            ('django', 'http', '/api/tasks/'),
+            ('django', 'http', '/static/app.css'),
+            ('async', 'http', '/root/api/async/tasks/'),
+            ('django', 'lifespan', None),
+        ]
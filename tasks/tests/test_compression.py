@@ -0,0 +1,173 @@
+import gzip
+import json
+import os
+
+import brotli
+import pytest
+import zstandard
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework import status
+
+from core.compression import CompressionMiddleware, negotiate_encoding
+from tasks.models import Task
+
+DECOMPRESS = {
+    'gzip': gzip.decompress,
+    'br': brotli.decompress,
+    'zstd': lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+@pytest.fixture
+def many_tasks(user):
+    """Assez de tâches pour dépasser le seuil de compression"""
+    return Task.objects.bulk_create(
+        Task(author=user, title='Tâche %d' % index, description='Description détaillée %d. ' % index * 4)
+        for index in range(20)
+    )
+
+
+def middleware_response(response, accept_encoding='gzip'):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+@pytest.mark.django_db
+class TestCompression:
+
+    @pytest.mark.parametrize('encoding', DECOMPRESS)
+    def test_task_list(self, authenticated_client, many_tasks, encoding):
+        """La liste est compressée dans l'encodage demandé"""
+        url = reverse('task-list')
+        plain = authenticated_client.get(url)
+        response = authenticated_client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Encoding'] == encoding
+        assert 'Accept-Encoding' in response['Vary']
+        assert int(response['Content-Length']) == len(response.content) < len(plain.content)
+        assert DECOMPRESS[encoding](response.content) == plain.content
+
+    def test_preference_order(self):
+        """À qualité égale, zstd puis br puis gzip ; sinon la qualité la plus haute"""
+        encodings = ['zstd', 'br', 'gzip']
+        assert negotiate_encoding('gzip, deflate, br, zstd', encodings) == 'zstd'
+        assert negotiate_encoding('gzip;q=1.0, br;q=0.5', encodings) == 'gzip'
+        assert negotiate_encoding('*', encodings) == 'zstd'
+        assert negotiate_encoding('*;q=0.1, br;q=0', encodings) == 'zstd'
+        assert negotiate_encoding('gzip;q=0, identity', encodings) is None
+        assert negotiate_encoding('deflate', encodings) is None
+        assert negotiate_encoding(None, encodings) is None
+
+    def test_configured_encodings(self, authenticated_client, many_tasks, settings):
+        """Seuls les encodages configurés sont proposés"""
+        settings.COMPRESSION_ENCODINGS = ['gzip']
+        response = authenticated_client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='br, zstd, gzip;q=0.5')
+        assert response['Content-Encoding'] == 'gzip'
+
+    def test_no_accept_encoding(self, authenticated_client, many_tasks):
+        """Sans Accept-Encoding, la réponse part telle quelle mais varie selon l'en-tête"""
+        response = authenticated_client.get(reverse('task-list'))
+        assert not response.has_header('Content-Encoding')
+        assert 'Accept-Encoding' in response['Vary']
+        json.loads(response.content)
+
+    def test_small_body_skipped(self, authenticated_client, task):
+        """Un petit corps JSON n'est pas compressé"""
+        response = authenticated_client.get(reverse('task-detail', kwargs={'pk': task.id}), HTTP_ACCEPT_ENCODING='gzip')
+        assert len(response.content) < 1024
+        assert not response.has_header('Content-Encoding')
+        assert response.json()['id'] == str(task.id)
+
+    def test_threshold_setting(self, authenticated_client, task, settings):
+        """Le seuil se règle par COMPRESSION_MIN_SIZE"""
+        settings.COMPRESSION_MIN_SIZE = 0
+        response = authenticated_client.get(reverse('task-detail', kwargs={'pk': task.id}), HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert response['ETag']
+
+    def test_encoded_etag_is_weak(self, authenticated_client, task, settings):
+        """Un corps encodé porte un ETag faible, toujours accepté par If-Match et If-None-Match"""
+        settings.COMPRESSION_MIN_SIZE = 0
+        url = reverse('task-detail', kwargs={'pk': task.id})
+        strong = authenticated_client.get(url)['ETag']
+        weak = authenticated_client.get(url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        assert weak == 'W/' + strong
+
+        response = authenticated_client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=weak)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        response = authenticated_client.patch(url, {'title': 'Modifiée'}, HTTP_IF_MATCH=weak)
+        assert response.status_code == status.HTTP_200_OK
+        response = authenticated_client.patch(url, {'title': 'Trop tard'}, HTTP_IF_MATCH=weak)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    def test_disabled(self, authenticated_client, many_tasks, settings):
+        """COMPRESSION_ENABLED désactive la compression"""
+        settings.COMPRESSION_ENABLED = False
+        response = authenticated_client.get(reverse('task-list'), HTTP_ACCEPT_ENCODING='gzip')
+        assert not response.has_header('Content-Encoding')
+
+    def test_streaming_export(self, authenticated_client, many_tasks):
+        """L'export en flux est compressé morceau par morceau"""
+        url = reverse('task-export')
+        plain = b''.join(authenticated_client.get(url, {'format': 'ndjson'}).streaming_content)
+        response = authenticated_client.get(url, {'format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response.streaming
+        assert response['Content-Encoding'] == 'gzip'
+        assert not response.has_header('Content-Length')
+        assert gzip.decompress(b''.join(response.streaming_content)) == plain
+        assert len(plain.splitlines()) == len(many_tasks)
+
+    def test_streaming_chunks_are_flushed(self):
+        """Chaque morceau est décodable dès sa réception"""
+        response = middleware_response(
+            StreamingHttpResponse(iter([b'{"a":1}\n' * 10, b'{"b":2}\n' * 10]), content_type='application/x-ndjson'),
+            'zstd',
+        )
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        first = decompressor.decompress(next(iter(response.streaming_content)))
+        assert first == b'{"a":1}\n' * 10
+
+    def test_async_streaming(self):
+        """Les flux asynchrones sont compressés aussi"""
+        async def stream():
+            yield b'x' * 2000
+            yield b'y' * 2000
+
+        async def consume(response):
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        response = middleware_response(StreamingHttpResponse(stream(), content_type='text/csv'), 'br')
+        assert response['Content-Encoding'] == 'br'
+        assert brotli.decompress(async_to_sync(consume)(response)) == b'x' * 2000 + b'y' * 2000
+
+    def test_event_stream_skipped(self):
+        """Les événements serveur ne sont jamais compressés"""
+        response = middleware_response(
+            StreamingHttpResponse(iter([b'data: {}\n\n']), content_type='text/event-stream'),
+        )
+        assert not response.has_header('Content-Encoding')
+        assert b''.join(response.streaming_content) == b'data: {}\n\n'
+
+    @pytest.mark.parametrize('headers', [
+        {'content_type': 'text/html'},
+        {'content_type': 'application/json', 'headers': {'Content-Encoding': 'br'}},
+        {'content_type': 'application/json', 'headers': {'Cache-Control': 'no-transform'}},
+    ])
+    def test_skipped_responses(self, headers):
+        """HTML, réponses déjà encodées et no-transform sont laissés tels quels"""
+        body = b'{"title": "%s"}' % (b'a' * 2000)
+        response = middleware_response(HttpResponse(body, **headers))
+        assert response.content == body
+        assert response.get('Content-Encoding') in (None, 'br')
+
+    def test_incompressible_body_kept(self):
+        """Un corps que la compression n'allège pas part tel quel"""
+        body = os.urandom(4096)
+        response = middleware_response(HttpResponse(body, content_type='application/json'))
+        assert response.content == body
+        assert not response.has_header('Content-Encoding')
@@ -0,0 +1,82 @@
+import pytest
+from django.db import connections
+from django.urls import reverse
+from rest_framework import status
+
+from core import db_pool
+
+
+class FakePool:
+    def __init__(self):
+        self.closed = False
+
+    def get_stats(self):
+        return {'pool_min': 1, 'pool_max': 10, 'pool_size': 2, 'pool_available': 1}
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Pool psycopg simulé sur la connexion par défaut"""
+    pool = FakePool()
+    monkeypatch.setattr(connections['default'], '_connection_pools', {'default': pool}, raising=False)
+    return pool
+
+
+@pytest.fixture
+def inherited(monkeypatch):
+    monkeypatch.setattr(db_pool, '_inherited', [])
+    return db_pool._inherited
+
+
+class TestPoolStats:
+
+    def test_no_pool(self):
+        """Sans DATABASE_POOL, aucune statistique"""
+        assert db_pool.get_pool_stats() == {}
+
+    def test_stats_by_alias(self, pool):
+        """Les statistiques sont données par alias"""
+        assert db_pool.get_pool_stats() == {'default': pool.get_stats()}
+
+
+@pytest.mark.django_db
+class TestPoolStatsView:
+
+    def test_requires_admin(self, authenticated_client):
+        """Réservé aux administrateurs"""
+        response = authenticated_client.get(reverse('database-pools'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_stats(self, api_client, user, pool):
+        """Un administrateur lit les statistiques des pools"""
+        user.is_staff = True
+        user.save()
+        api_client.force_authenticate(user=user)
+        response = api_client.get(reverse('database-pools'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'default': pool.get_stats()}
+
+
+class TestFork:
+
+    def test_reset_after_fork(self, monkeypatch, pool, inherited):
+        """Le worker oublie sans les fermer les connexions et pools hérités"""
+        socket = object()
+        monkeypatch.setattr(connections['default'], 'connection', socket)
+        db_pool.reset_after_fork()
+        assert connections['default'].connection is None
+        assert db_pool.get_pools() == {}
+        assert not pool.closed
+        assert inherited == [socket, pool]
+
+    def test_close_before_fork(self, monkeypatch, pool):
+        """Le processus maître ferme ses connexions et pools avant de forker"""
+        closed = []
+        monkeypatch.setattr(connections['default'], 'close', lambda: closed.append('default'))
+        monkeypatch.setattr(connections['default'], 'close_pool', pool.close, raising=False)
+        db_pool.close_before_fork()
+        assert 'default' in closed
+        assert pool.closed
@@ -0,0 +1,203 @@
+import json
+import shutil
+import sqlite3
+from contextlib import closing
+from copy import copy
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.base import ModelState
+from django.test import AsyncRequestFactory
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import db_router
+from core.asgi import AsyncHandler
+from core.db_router import ReplicaRouter, STICKY_KEY, is_pinned
+from tasks.counters import get_counter, rebuild_counter
+from tasks.models import Task
+
+REPLICA = 'replica'
+
+
+def add_replica(path):
+    """
+    SQLite connection to `path` under the replica alias. Connections not
+    declared in DATABASES are allowed in any test.
+    """
+    default = connections['default']
+    connections[REPLICA] = default.__class__({**default.settings_dict, 'NAME': str(path)}, REPLICA)
+    db_router._health.clear()
+
+
+def remove_replica():
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    db_router._health.clear()
+
+
+def replicate(*objects):
+    """Copy `objects` to the replica, as replication would"""
+    for obj in objects:
+        replica_obj = copy(obj)
+        replica_obj._state = ModelState()
+        type(obj).objects.using(REPLICA).bulk_create([replica_obj])
+
+
+@pytest.fixture(scope='session')
+def replica_schema(django_db_setup, django_db_blocker, tmp_path_factory):
+    """
+    SQLite file with the schema of the test database. Taken before any
+    test transaction: the backup API would wait for it to end.
+    """
+    path = tmp_path_factory.mktemp('replica') / 'schema.sqlite3'
+    with django_db_blocker.unblock():
+        connections['default'].ensure_connection()
+        with closing(sqlite3.connect(path)) as target:
+            connections['default'].connection.backup(target)
+    return path
+
+
+@pytest.fixture
+def replica(replica_schema, tmp_path, settings):
+    """Second SQLite file standing in for the replica of the test database"""
+    path = tmp_path / 'replica.sqlite3'
+    shutil.copyfile(replica_schema, path)
+    add_replica(path)
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield REPLICA
+    remove_replica()
+
+
+@pytest.fixture
+def snapshot_task(user, replica):
+    """Tâche présente sur le primaire et le réplica"""
+    task = Task.objects.create(title='Avant la copie', author=user)
+    replicate(user, task, get_counter(user.pk))
+    return task
+
+
+def create_on_primary(title, author):
+    """Tâche écrite sur le primaire seulement"""
+    task = Task.objects.create(title=title, author=author)
+    rebuild_counter(author.pk)
+    return task
+
+
+def list_titles(client):
+    response = client.get(reverse('task-list'))
+    assert response.status_code == status.HTTP_200_OK
+    return {task['title'] for task in response.data['data']}
+
+
+@pytest.mark.django_db
+class TestReplicaRouter:
+
+    def test_read_outside_request_uses_primary(self, snapshot_task, replica):
+        """Hors requête, les lectures vont au primaire"""
+        create_on_primary('Après la copie', snapshot_task.author)
+        assert ReplicaRouter().db_for_read(Task) == 'default'
+        assert Task.objects.count() == 2
+
+    def test_get_reads_from_replica(self, authenticated_client, snapshot_task, replica):
+        """Un GET lit sur le réplica, qui ne voit pas les écritures récentes"""
+        create_on_primary('Après la copie', snapshot_task.author)
+        assert list_titles(authenticated_client) == {'Avant la copie'}
+
+    def test_write_goes_to_primary(self, authenticated_client, snapshot_task, replica):
+        """Les écritures vont au primaire"""
+        response = authenticated_client.post(reverse('task-list'), {'title': 'Nouvelle'})
+        assert response.status_code == status.HTTP_201_CREATED
+        assert Task.objects.using('default').filter(title='Nouvelle').exists()
+        assert not Task.objects.using(REPLICA).filter(title='Nouvelle').exists()
+
+    def test_user_reads_own_writes(self, authenticated_client, snapshot_task, replica):
+        """Après une écriture, l'utilisateur lit sur le primaire"""
+        authenticated_client.post(reverse('task-list'), {'title': 'Nouvelle'})
+        assert list_titles(authenticated_client) == {'Avant la copie', 'Nouvelle'}
+
+    def test_stickiness_expires(self, authenticated_client, user, snapshot_task, replica):
+        """Une fois la fenêtre passée, l'utilisateur revient au réplica"""
+        authenticated_client.post(reverse('task-list'), {'title': 'Nouvelle'})
+        assert cache.get(STICKY_KEY % user.pk)
+        cache.delete(STICKY_KEY % user.pk)
+        assert list_titles(authenticated_client) == {'Avant la copie'}
+
+    def test_stickiness_is_per_user(self, authenticated_client, another_user, snapshot_task, replica):
+        """L'écriture d'un utilisateur ne change pas les lectures des autres"""
+        authenticated_client.post(reverse('task-list'), {'title': 'Nouvelle'})
+        replicate(another_user, get_counter(another_user.pk))
+        create_on_primary('Après la copie', another_user)
+        other_client = APIClient()
+        other_client.force_authenticate(user=another_user)
+        assert list_titles(other_client) == set()
+
+    def test_unreachable_replica_falls_back_to_primary(self, authenticated_client, snapshot_task, tmp_path):
+        """Un réplica injoignable est ignoré"""
+        remove_replica()
+        add_replica(tmp_path / 'absent' / 'replica.sqlite3')
+        create_on_primary('Après la copie', snapshot_task.author)
+        assert list_titles(authenticated_client) == {'Avant la copie', 'Après la copie'}
+        assert db_router._health[REPLICA][1] is False
+
+    def test_replica_lost_between_checks(self, authenticated_client, snapshot_task, replica, tmp_path, settings):
+        """Un réplica perdu entre deux vérifications est écarté et la lecture refaite sur le primaire"""
+        settings.TASK_CACHE_TIMEOUT = 0
+        # The failed first attempt is still reported, as any server error
+        authenticated_client.raise_request_exception = False
+        assert list_titles(authenticated_client) == {'Avant la copie'}
+        connections[REPLICA].close()
+        (tmp_path / 'replica.sqlite3').unlink()
+        create_on_primary('Après la copie', snapshot_task.author)
+
+        assert list_titles(authenticated_client) == {'Avant la copie', 'Après la copie'}
+        assert db_router._health[REPLICA][1] is False
+
+    def test_async_replica_lost_between_checks(self, user, snapshot_task, replica, tmp_path, settings):
+        """Le chemin asynchrone refait aussi la lecture sur le primaire"""
+        settings.TASK_CACHE_TIMEOUT = 0
+        handler = AsyncHandler()
+        request = AsyncRequestFactory().get(
+            reverse('async-task-list'), headers={'authorization': f'Bearer {AccessToken.for_user(user)}'},
+        )
+        connections[REPLICA].close()
+        (tmp_path / 'replica.sqlite3').unlink()
+        create_on_primary('Après la copie', snapshot_task.author)
+        response = async_to_sync(handler.get_response_async)(request)
+
+        assert response.status_code == status.HTTP_200_OK
+        titles = {task['title'] for task in json.loads(response.content)['data']}
+        assert titles == {'Avant la copie', 'Après la copie'}
+        assert db_router._health[REPLICA][1] is False
+
+    def test_replica_connection_lost_between_checks(self, authenticated_client, snapshot_task, replica, tmp_path, settings):
+        """Une connexion au réplica qui échoue envoie les lectures au primaire"""
+        settings.TASK_CACHE_TIMEOUT = 0
+        assert list_titles(authenticated_client) == {'Avant la copie'}
+        connections[REPLICA].close()
+        connections[REPLICA].settings_dict['NAME'] = str(tmp_path / 'absent' / 'replica.sqlite3')
+        create_on_primary('Après la copie', snapshot_task.author)
+
+        assert list_titles(authenticated_client) == {'Avant la copie', 'Après la copie'}
+        assert db_router._health[REPLICA][1] is False
+
+    def test_lagging_replica_falls_back_to_primary(self, authenticated_client, snapshot_task, replica, monkeypatch):
+        """Un réplica trop en retard est ignoré"""
+        monkeypatch.setattr(db_router, 'get_replica_lag', lambda alias: 60.0)
+        create_on_primary('Après la copie', snapshot_task.author)
+        assert list_titles(authenticated_client) == {'Avant la copie', 'Après la copie'}
+
+    def test_profile_update_sticks_to_primary(self, authenticated_client, user, replica):
+        """Modifier son profil fait aussi lire l'utilisateur sur le primaire"""
+        response = authenticated_client.patch(reverse('auth-update-me'), {'first_name': 'Nouveau'})
+        assert response.status_code == status.HTTP_200_OK
+        assert is_pinned(user.pk)
+
+    def test_replicas_are_not_migrated(self, replica):
+        """Les réplicas reçoivent le schéma par la réplication"""
+        assert ReplicaRouter().allow_migrate(REPLICA, 'tasks') is False
+        assert ReplicaRouter().allow_migrate('default', 'tasks') is None
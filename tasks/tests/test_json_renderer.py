@@ -0,0 +1,118 @@
+import io
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from core.utils import fast_json
+from tasks.models import Task
+from tasks.serializers import TaskSerializer, TaskValuesSerializer
+
+ENCODERS = {'stdlib': fast_json.stdlib_dumps}
+if fast_json.orjson is not None:
+    ENCODERS['orjson'] = fast_json.dumps
+
+MIXED = {
+    'id': uuid.UUID('01a14d74-decc-735e-8c61-a185717bf5ab'),
+    'title': 'Tâche « urgente » ✓',
+    'created_at': datetime(2026, 10, 18, 5, 21, 0, 123456, tzinfo=dt_timezone.utc),
+    'amount': Decimal('1.50'),
+    'label': gettext_lazy('Tâche'),
+    'errors': [ErrorDetail('Requis', code='required')],
+    'count': 3,
+    'ratio': 0.25,
+    'done': None,
+    'nested': {1: [True, False]},
+}
+
+
+def drf_render(data, **kwargs):
+    return JSONRenderer().render(data, **kwargs)
+
+
+@pytest.mark.django_db
+class TestFastJSONRenderer:
+    """Tests pour le rendu JSON rapide"""
+
+    @pytest.mark.parametrize('encoder', ENCODERS)
+    def test_same_bytes_as_drf(self, encoder):
+        """Chaque encodeur produit les octets de JSONRenderer, y compris via le default de DRF"""
+        assert ENCODERS[encoder](MIXED) == drf_render(MIXED)
+
+    def test_task_pages(self, user, multiple_tasks):
+        """Les pages de tâches, sérialiseur ou .values(), sont rendues comme par DRF"""
+        tasks = Task.objects.filter(author=user)
+        data = TaskSerializer(tasks, many=True).data
+        assert FastJSONRenderer().render(data) == drf_render(data)
+
+        values = TaskValuesSerializer(native_types=FastJSONRenderer.native_types)
+        rows = values.to_representation(list(values.get_queryset(tasks)))
+        assert FastJSONRenderer().render(rows) == drf_render(data)
+
+    def test_javascript_line_separators(self):
+        """U+2028 et U+2029 sont échappés comme par DRF"""
+        data = {'title': 'a\u2028b\u2029c'}
+        assert FastJSONRenderer().render(data) == drf_render(data) == b'{"title":"a\\u2028b\\u2029c"}'
+
+    @pytest.mark.parametrize('value', [float('nan'), float('inf'), -float('inf'), [Decimal('NaN')]])
+    def test_non_finite_floats_rejected(self, value):
+        """Comme JSONRenderer, NaN et l'infini sont refusés en JSON strict"""
+        data = {'ratio': value, 'done': None}
+        with pytest.raises(ValueError):
+            drf_render(data)
+        with pytest.raises(ValueError):
+            FastJSONRenderer().render(data)
+
+    def test_big_integers(self):
+        """Les entiers de plus de 64 bits passent par l'encodeur standard"""
+        data = {'big': 2 ** 64, 'small': -2 ** 70}
+        assert FastJSONRenderer().render(data) == drf_render(data) == b'{"big":18446744073709551616,"small":-1180591620717411303424}'
+
+    def test_indent_falls_back(self):
+        """Une indentation demandée passe par JSONRenderer"""
+        rendered = FastJSONRenderer().render(MIXED, 'application/json; indent=2')
+        assert rendered == drf_render(MIXED, accepted_media_type='application/json; indent=2')
+        assert b'\n  ' in rendered
+
+    def test_api_uses_fast_renderer(self, authenticated_client, multiple_tasks):
+        """L'API rend ses réponses JSON avec le rendu rapide"""
+        response = authenticated_client.get(reverse('task-list'))
+        assert response.status_code == status.HTTP_200_OK
+        assert isinstance(response.renderer_context['request'].accepted_renderer, FastJSONRenderer)
+        assert {item['id'] for item in response.json()['data']} == {str(task.id) for task in multiple_tasks}
+
+
+@pytest.mark.django_db
+class TestFastJSONParser:
+    """Tests pour l'analyse JSON rapide"""
+
+    def parse(self, body, encoding='utf-8'):
+        return FastJSONParser().parse(io.BytesIO(body), parser_context={'encoding': encoding})
+
+    def test_parse(self):
+        """Le corps UTF-8 est décodé"""
+        assert self.parse('{"title":"Tâche","n":[1,2.5,null]}'.encode()) == {'title': 'Tâche', 'n': [1, 2.5, None]}
+
+    def test_other_encoding(self):
+        """Les autres encodages passent par JSONParser"""
+        assert self.parse('{"title":"Tâche"}'.encode('latin-1'), encoding='latin-1') == {'title': 'Tâche'}
+
+    @pytest.mark.parametrize('body', [b'{"title":', b'{"n": NaN}', b''])
+    def test_invalid(self, body):
+        """Un JSON invalide, NaN compris, est refusé"""
+        with pytest.raises(ParseError):
+            self.parse(body)
+
+    def test_api_parse_error(self, authenticated_client):
+        """L'API répond 400 à un corps JSON invalide"""
+        response = authenticated_client.post(reverse('task-list'), '{"title":', content_type='application/json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()['detail'].startswith('JSON parse error')
@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings as django_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+from rest_framework import status
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_request_counter_labels(self, authenticated_client, task):
+        """Les requêtes sont comptées par vue, action, méthode et statut"""
+        labels = {'view': 'TaskViewSet', 'action': 'list', 'method': 'GET', 'status': '200'}
+        before = sample('http_requests_total', **labels)
+        authenticated_client.get(reverse('task-list'))
+        assert sample('http_requests_total', **labels) == before + 1
+
+    def test_viewset_action_label(self, api_client, user):
+        """Les actions personnalisées portent leur nom"""
+        labels = {'view': 'AuthViewSet', 'action': 'login', 'method': 'POST', 'status': '200'}
+        before = sample('http_requests_total', **labels)
+        response = api_client.post(reverse('auth-login'), {'email': user.email, 'password': 'TestPass123!'})
+        assert response.status_code == status.HTTP_200_OK
+        assert sample('http_requests_total', **labels) == before + 1
+
+    def test_latency_and_queries_histograms(self, authenticated_client, task):
+        """Durée et nombre de requêtes SQL sont des histogrammes par action"""
+        labels = {'view': 'TaskViewSet', 'action': 'retrieve'}
+        count = sample('http_request_duration_seconds_count', **labels)
+        queries = sample('http_request_db_queries_sum', **labels)
+        authenticated_client.get(reverse('task-detail', kwargs={'pk': task.id}))
+        assert sample('http_request_duration_seconds_count', **labels) == count + 1
+        assert sample('http_request_db_queries_sum', **labels) > queries
+
+    def test_cache_lookups(self, authenticated_client, task):
+        """Les succès et échecs du cache de réponses sont comptés"""
+        labels = {'view': 'TaskViewSet', 'action': 'list'}
+        hits = sample('response_cache_lookups_total', result='hit', **labels)
+        misses = sample('response_cache_lookups_total', result='miss', **labels)
+        authenticated_client.get(reverse('task-list'))
+        authenticated_client.get(reverse('task-list'))
+        assert sample('response_cache_lookups_total', result='miss', **labels) == misses + 1
+        assert sample('response_cache_lookups_total', result='hit', **labels) == hits + 1
+
+    def test_metrics_endpoint(self, authenticated_client, api_client, settings):
+        """/metrics sert le format texte Prometheus"""
+        settings.METRICS_PUBLIC = True
+        authenticated_client.get(reverse('task-list'))
+        response = api_client.get(reverse('metrics'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert '# TYPE http_request_duration_seconds histogram' in body
+        assert 'http_requests_total{action="list",method="GET",status="200",view="TaskViewSet"}' in body
+
+    def test_metrics_token(self, api_client, settings):
+        """Avec METRICS_TOKEN, le jeton est exigé"""
+        settings.METRICS_TOKEN = 'secret'
+        assert api_client.get(reverse('metrics')).status_code == status.HTTP_401_UNAUTHORIZED
+        response = api_client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_metrics_private_by_default(self, api_client, settings):
+        """Sans jeton ni METRICS_PUBLIC, /metrics n'existe pas"""
+        settings.METRICS_TOKEN = ''
+        settings.METRICS_PUBLIC = False
+        assert api_client.get(reverse('metrics')).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_metrics_disabled(self, api_client, settings):
+        """Désactivées, les métriques ne sont pas servies"""
+        settings.METRICS_ENABLED = False
+        assert api_client.get(reverse('metrics')).status_code == status.HTTP_404_NOT_FOUND
+
+
+WORKER = """
+import django
+django.setup()
+from django.test import RequestFactory
+from django.urls import resolve
+from core.metrics import observe_request
+from core.timing import RequestTimings
+
+request = RequestFactory().get('/api/tasks/')
+request.resolver_match = resolve('/api/tasks/')
+timings = RequestTimings()
+timings.queries = 3
+timings.finish()
+observe_request(request, type('Response', (), {'status_code': 200})(), timings)
+"""
+
+
+def test_multiprocess_aggregation(tmp_path):
+    """Les échantillons de plusieurs workers sont additionnés"""
+    env = dict(
+        os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path),
+        DJANGO_SETTINGS_MODULE='config.settings', SECRET_KEY='x', DATABASE_URL='',
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', WORKER], env=env, cwd=django_settings.BASE_DIR, check=True)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    labels = {'view': 'TaskViewSet', 'action': 'list', 'method': 'GET', 'status': '200'}
+    assert registry.get_sample_value('http_requests_total', labels) == 2
+    assert registry.get_sample_value('http_request_db_queries_sum', {'view': 'TaskViewSet', 'action': 'list'}) == 6
@@ -0,0 +1,130 @@
+import logging
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.views import AuthViewSet
+from core.query_budget import assert_query_budget
+from tasks.counters import reconcile
+from tasks.models import Task
+from tasks.views import TaskViewSet
+
+
+@pytest.fixture
+def jwt_client(user):
+    """Client authentifié par JWT : l'utilisateur est lu en base, comme en production"""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Bearer %s' % AccessToken.for_user(user))
+    return client
+
+
+@pytest.fixture
+def many_tasks(user):
+    """50 tâches avec leur compteur à jour"""
+    tasks = Task.objects.bulk_create(Task(author=user, title='Tâche %d' % index) for index in range(50))
+    reconcile([user.pk])
+    return tasks
+
+
+def task_url(task):
+    return reverse('task-detail', kwargs={'pk': task.pk})
+
+
+# action: (méthode, url, données), l'url et les données prenant la tâche en argument
+TASK_SCENARIOS = {
+    'list': ('get', lambda task: reverse('task-list'), None),
+    'retrieve': ('get', task_url, None),
+    'create': ('post', lambda task: reverse('task-list'), {'title': 'Nouvelle tâche'}),
+    'update': ('put', task_url, {'title': 'Renommée', 'description': '', 'is_completed': True}),
+    'partial_update': ('patch', task_url, {'is_completed': True}),
+    'destroy': ('delete', task_url, None),
+    'changes': ('get', lambda task: reverse('task-changes'), None),
+}
+AUTH_SCENARIOS = {
+    'me': ('get', 'auth-me', None),
+    'update_me': ('patch', 'auth-update-me', {'first_name': 'Nouveau'}),
+}
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+
+    def test_every_budget_is_tested(self):
+        """Chaque budget déclaré est vérifié par un scénario"""
+        assert set(TaskViewSet.query_budgets) == set(TASK_SCENARIOS)
+        assert set(AuthViewSet.query_budgets) == set(AUTH_SCENARIOS) | {'login'}
+
+    @pytest.mark.parametrize('action', TASK_SCENARIOS)
+    def test_task_actions(self, jwt_client, many_tasks, action):
+        """Les actions sur les tâches respectent leur budget"""
+        method, url, data = TASK_SCENARIOS[action]
+        with assert_query_budget(TaskViewSet, action):
+            response = getattr(jwt_client, method)(url(many_tasks[0]), data, format='json')
+        assert response.status_code < 400, response.content
+
+    @pytest.mark.parametrize('page_size', [1, 10, 20])
+    def test_list_budget_ignores_page_size(self, jwt_client, many_tasks, page_size):
+        """La liste coûte autant de requêtes quelle que soit la taille de page"""
+        with assert_query_budget(TaskViewSet, 'list') as recorder:
+            response = jwt_client.get(reverse('task-list'), {'page_size': page_size})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(recorder.queries) == TaskViewSet.query_budgets['list']
+
+    @pytest.mark.parametrize('action', AUTH_SCENARIOS)
+    def test_auth_actions(self, jwt_client, action):
+        """Les actions du profil respectent leur budget"""
+        method, name, data = AUTH_SCENARIOS[action]
+        with assert_query_budget(AuthViewSet, action):
+            response = getattr(jwt_client, method)(reverse(name), data, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_login(self, api_client, user):
+        """La connexion respecte son budget"""
+        with assert_query_budget(AuthViewSet, 'login'):
+            response = api_client.post(reverse('auth-login'), {'email': user.email, 'password': 'TestPass123!'})
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_failure_reports_queries(self, jwt_client, many_tasks):
+        """Un dépassement liste chaque requête avec la ligne qui l'a lancée"""
+        with pytest.raises(AssertionError) as error:
+            with assert_query_budget(TaskViewSet, 'retrieve'):
+                jwt_client.get(task_url(many_tasks[0]))
+                jwt_client.get(task_url(many_tasks[1]))
+        message = str(error.value)
+        assert message.startswith('TaskViewSet.retrieve ran 4 queries, budget 2:')
+        assert 'SELECT' in message
+        assert 'tasks/views.py:' in message
+
+
+@pytest.mark.django_db
+class TestQueryBudgetLogging:
+
+    def test_over_budget_request_is_logged(self, jwt_client, many_tasks, settings, monkeypatch, caplog):
+        """En production, un dépassement est journalisé avec le SQL et son origine"""
+        settings.QUERY_BUDGET_LOGGING = True
+        monkeypatch.setitem(TaskViewSet.query_budgets, 'retrieve', 1)
+        with caplog.at_level(logging.WARNING, logger='core.query_budget'):
+            response = jwt_client.get(task_url(many_tasks[0]))
+        assert response.status_code == status.HTTP_200_OK
+        [record] = caplog.records
+        message = record.getMessage()
+        assert message.startswith('TaskViewSet.retrieve ran 2 queries, budget 1:')
+        assert 'tasks_task' in message
+        assert 'tasks/views.py:' in message
+
+    def test_within_budget_is_silent(self, jwt_client, many_tasks, settings, caplog):
+        """Une requête dans son budget ne journalise rien"""
+        settings.QUERY_BUDGET_LOGGING = True
+        with caplog.at_level(logging.WARNING, logger='core.query_budget'):
+            jwt_client.get(task_url(many_tasks[0]))
+        assert not caplog.records
+
+    def test_disabled_by_default(self, jwt_client, many_tasks, monkeypatch, caplog):
+        """Sans QUERY_BUDGET_LOGGING, les budgets ne sont pas vérifiés en production"""
+        monkeypatch.setitem(TaskViewSet.query_budgets, 'retrieve', 0)
+        with caplog.at_level(logging.WARNING, logger='core.query_budget'):
+            jwt_client.get(task_url(many_tasks[0]))
+        assert not caplog.records
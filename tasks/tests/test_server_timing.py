@@ -0,0 +1,66 @@
+import logging
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+
+def parse_server_timing(header):
+    """{nom: (durée, description)} d'un en-tête Server-Timing"""
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        values = dict(param.split('=', 1) for param in params)
+        metrics[name] = (float(values['dur']), values.get('desc', '').strip('"'))
+    return metrics
+
+
+@pytest.fixture
+def sampled(settings):
+    settings.SERVER_TIMING_SAMPLE_RATE = 1.0
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+
+    def test_task_list_timings(self, authenticated_client, multiple_tasks, sampled):
+        """La liste des tâches détaille base, sérialisation, rendu et total"""
+        response = authenticated_client.get(reverse('task-list'))
+        assert response.status_code == status.HTTP_200_OK
+        metrics = parse_server_timing(response['Server-Timing'])
+        assert set(metrics) == {'db', 'serialize', 'render', 'total'}
+        assert metrics['db'][1].endswith(' queries') and metrics['db'][1] != '0 queries'
+        assert metrics['serialize'][0] > 0
+        assert metrics['render'][0] > 0
+        assert metrics['total'][0] >= metrics['db'][0]
+
+    def test_task_detail_timings(self, authenticated_client, task, sampled):
+        """Le détail passe par le sérialiseur de la vue"""
+        response = authenticated_client.get(reverse('task-detail', kwargs={'pk': task.id}))
+        metrics = parse_server_timing(response['Server-Timing'])
+        assert metrics['serialize'][0] > 0
+
+    def test_auth_timings(self, authenticated_client, sampled):
+        """Les vues d'authentification sont mesurées aussi"""
+        response = authenticated_client.get(reverse('auth-me'))
+        metrics = parse_server_timing(response['Server-Timing'])
+        assert metrics['serialize'][0] > 0
+        assert metrics['render'][0] > 0
+
+    def test_log_line(self, authenticated_client, sampled, caplog):
+        """Chaque requête mesurée produit une ligne de log structurée"""
+        with caplog.at_level(logging.INFO, logger='core.timing'):
+            authenticated_client.get(reverse('task-list'))
+        record, = [record for record in caplog.records if record.name == 'core.timing']
+        assert record.timings['method'] == 'GET'
+        assert record.timings['path'] == reverse('task-list')
+        assert record.timings['status'] == status.HTTP_200_OK
+        assert record.timings['db_queries'] > 0
+        assert 'total_ms=' in record.getMessage()
+
+    def test_unsampled_request(self, authenticated_client, settings):
+        """Hors échantillon, pas d'en-tête"""
+        settings.SERVER_TIMING_SAMPLE_RATE = 0
+        response = authenticated_client.get(reverse('task-list'))
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Server-Timing' not in response
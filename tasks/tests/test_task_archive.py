@@ -0,0 +1,124 @@
+import asyncio
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from tasks import events
+from tasks.archive import archive_tasks
+from tasks.counters import get_counter
+from tasks.models import Task, TaskArchive, TaskTombstone
+
+
+@pytest.fixture
+def old_tasks(user):
+    """6 tâches terminées il y a un an, 2 tâches récentes et 1 ancienne en cours"""
+    tasks = [
+        Task.objects.create(title=f'Ancienne {i}', description='Note', is_completed=True, author=user)
+        for i in range(6)
+    ]
+    pending = Task.objects.create(title='Ancienne en cours', author=user)
+    long_ago = timezone.now() - timedelta(days=365)
+    Task.objects.filter(id__in=[t.id for t in tasks] + [pending.id]).update(created_at=long_ago, updated_at=long_ago)
+    Task.objects.create(title='Récente terminée', is_completed=True, author=user)
+    Task.objects.create(title='Récente', author=user)
+    return tasks
+
+
+@pytest.mark.django_db
+class TestArchiveTasks:
+    """Tests pour le déplacement vers l'archive"""
+
+    def test_moves_old_completed_tasks(self, user, old_tasks):
+        """only old completed tasks move, with their dates and content"""
+        get_counter(user.pk)
+        moved = archive_tasks(days=30, batch_size=4)
+
+        assert moved == 6
+        assert not Task.objects.filter(id__in=[t.id for t in old_tasks]).exists()
+        assert set(Task.objects.values_list('title', flat=True)) == {'Ancienne en cours', 'Récente terminée', 'Récente'}
+        archived = TaskArchive.objects.get(id=old_tasks[0].id)
+        assert archived.title == 'Ancienne 0'
+        assert archived.author == user
+        assert archived.created_at == Task.objects.get(title='Ancienne en cours').created_at
+        counter = get_counter(user.pk)
+        assert (counter.total, counter.completed, counter.pending) == (3, 1, 2)
+        assert TaskTombstone.objects.filter(author=user).count() == 6
+
+    def test_publishes_deleted_events(self, user, old_tasks, django_capture_on_commit_callbacks):
+        """open event streams see the archived tasks go away"""
+        def archive():
+            with django_capture_on_commit_callbacks(execute=True):
+                archive_tasks(days=30, batch_size=4)
+
+        async def scenario():
+            subscription = events.broker.subscribe(user.pk)
+            try:
+                await sync_to_async(archive)()
+                return [await asyncio.wait_for(subscription.get(), 1) for _ in old_tasks]
+            finally:
+                events.broker.unsubscribe(subscription)
+
+        received = async_to_sync(scenario)()
+        assert {event['type'] for event in received} == {'deleted'}
+        assert {event['id'] for event in received} == {str(task.id) for task in old_tasks}
+
+    def test_batches(self, user, old_tasks):
+        """max_batches bounds the work of one run"""
+        assert archive_tasks(days=30, batch_size=4, max_batches=1) == 4
+        assert archive_tasks(days=30, batch_size=4) == 2
+        assert archive_tasks(days=30, batch_size=4) == 0
+
+    def test_command(self, user, old_tasks):
+        """the archive_tasks command reports the moved tasks"""
+        stdout = StringIO()
+        call_command('archive_tasks', days=30, batch_size=2, stdout=stdout)
+
+        assert '6 task(s) archived' in stdout.getvalue()
+
+
+@pytest.mark.django_db
+class TestArchivedTaskReads:
+    """Tests pour la lecture des tâches archivées"""
+
+    def test_list_archived(self, authenticated_client, user, old_tasks, other_user_task):
+        """?archived=true lists the user's archived tasks only"""
+        archive_tasks(days=30)
+        other = TaskArchive.objects.create(
+            id=other_user_task.id, title='Autre', author=other_user_task.author,
+            created_at=timezone.now(), updated_at=timezone.now(),
+        )
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'archived': 'true'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(item['title'] for item in response.data['data']) == [f'Ancienne {i}' for i in range(6)]
+        assert response.data['count'] == 6
+        assert str(other.id) not in {item['id'] for item in response.data['data']}
+
+        response = authenticated_client.get(url)
+        assert response.data['count'] == 3
+
+    def test_archived_filters(self, authenticated_client, old_tasks):
+        """TaskFilter parameters apply to the archive"""
+        archive_tasks(days=30)
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'archived': 'true', 'search': 'Ancienne 3', 'fields': 'title'})
+
+        assert response.data['data'] == [{'title': 'Ancienne 3'}]
+
+    def test_retrieve_archived(self, authenticated_client, old_tasks):
+        """an archived task is read with ?archived=true and is read only"""
+        archive_tasks(days=30)
+        url = reverse('task-detail', kwargs={'pk': old_tasks[0].id})
+
+        assert authenticated_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+        response = authenticated_client.get(url, {'archived': 'true'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['title'] == 'Ancienne 0'
+        response = authenticated_client.patch(url + '?archived=true', {'title': 'Non'}, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
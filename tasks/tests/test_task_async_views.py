@@ -0,0 +1,146 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from tasks.models import Task, TaskCounter
+
+
+@pytest.fixture
+def async_request(user):
+    """Send a request to the async views from a sync test, with a JWT"""
+    client = AsyncClient()
+    token = AccessToken.for_user(user)
+
+    def send(method, url, data=None, headers=None, token=token):
+        headers = dict(headers or {})
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        kwargs = {'headers': headers}
+        if method == 'get':
+            kwargs['data'] = data
+        elif data is not None:
+            kwargs.update(data=data, content_type='application/json')
+        return async_to_sync(getattr(client, method))(url, **kwargs)
+
+    return send
+
+
+@pytest.mark.django_db
+class TestAsyncTaskList:
+    """Tests pour la liste asynchrone"""
+
+    def test_list_matches_sync_view(self, async_request, authenticated_client, multiple_tasks, other_user_task):
+        """same envelope and rows as TaskViewSet, own tasks only"""
+        params = {'page_size': 2, 'page': 2, 'order_by': 'created_at'}
+        response = async_request('get', reverse('async-task-list'), params)
+        expected = authenticated_client.get(reverse('task-list'), params).json()
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['data'] == expected['data']
+        assert data['count'] == 5
+        assert data['links']['next_num'] == 3
+        assert data['links']['next'].endswith(
+            expected['links']['next'].split('/api/tasks/', 1)[1]
+        )
+
+    def test_list_filters(self, async_request, multiple_tasks):
+        """TaskFilter parameters and ?fields= apply"""
+        url = reverse('async-task-list')
+        response = async_request('get', url, {'is_completed': 'false', 'fields': 'title'})
+
+        assert response.json()['count'] == 2
+        assert response.json()['data'] == [{'title': 'Tâche 4'}, {'title': 'Tâche 2'}]
+
+        response = async_request('get', url, {'search': 'Tâche 3', 'count': 'false', 'envelope': 2})
+        assert [item['title'] for item in response.json()['data']] == ['Tâche 3']
+        assert 'count' not in response.json()['page']
+
+    def test_list_invalid_filter(self, async_request, multiple_tasks):
+        """an invalid filter value is a 400"""
+        response = async_request('get', reverse('async-task-list'), {'start_date': 'hier'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'start_date' in response.json()
+
+    def test_unauthenticated(self, async_request, multiple_tasks):
+        """a JWT is required"""
+        response = async_request('get', reverse('async-task-list'), token=None)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response['WWW-Authenticate'].startswith('Bearer')
+
+    def test_invalid_token(self, async_request, multiple_tasks):
+        """an invalid JWT is refused"""
+        response = async_request('get', reverse('async-task-list'), token='invalide')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestAsyncTaskDetail:
+    """Tests pour le détail et les écritures asynchrones"""
+
+    def test_create(self, async_request, user):
+        """creation goes through TaskSerializer and the counters"""
+        url = reverse('async-task-list')
+        response = async_request('post', url, {'title': '  Nouvelle  ', 'is_completed': True})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()['title'] == 'Nouvelle'
+        assert Task.objects.get(author=user).title == 'Nouvelle'
+        counter = TaskCounter.objects.get(user=user)
+        assert (counter.total, counter.completed) == (1, 1)
+
+    def test_create_invalid(self, async_request):
+        """validation errors are reported"""
+        response = async_request('post', reverse('async-task-list'), {'title': '  '})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'title' in response.json()
+
+    def test_retrieve(self, async_request, task):
+        """the detail has validators and honours If-None-Match"""
+        url = reverse('async-task-detail', kwargs={'pk': task.id})
+        response = async_request('get', url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['id'] == str(task.id)
+        response = async_request('get', url, headers={'If-None-Match': response['ETag']})
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_other_user_task(self, async_request, other_user_task):
+        """tasks of other users are not found"""
+        for method in ('get', 'patch', 'delete'):
+            url = reverse('async-task-detail', kwargs={'pk': other_user_task.id})
+            response = async_request(method, url, {} if method == 'patch' else None)
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+        response = async_request('get', reverse('async-task-detail', kwargs={'pk': 'abc'}))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_update(self, async_request, task):
+        """PATCH and PUT update the task, If-Match is enforced"""
+        url = reverse('async-task-detail', kwargs={'pk': task.id})
+        response = async_request('patch', url, {'is_completed': True})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['is_completed'] is True
+        etag = response['ETag']
+
+        response = async_request('put', url, {'title': 'Remplacée'}, headers={'If-Match': etag})
+        assert response.status_code == status.HTTP_200_OK
+        task.refresh_from_db()
+        assert task.title == 'Remplacée'
+
+        response = async_request('patch', url, {'title': 'Trop tard'}, headers={'If-Match': etag})
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    def test_delete(self, async_request, task, user):
+        """deletion leaves a tombstone"""
+        url = reverse('async-task-detail', kwargs={'pk': task.id})
+        response = async_request('delete', url)
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert not Task.objects.filter(id=task.id).exists()
+        assert user.task_tombstones.filter(task_id=task.id).exists()
@@ -0,0 +1,119 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from tasks.models import Task
+
+
+@pytest.mark.django_db
+class TestTaskBulkCreate:
+    """Tests pour la création de tâches par lot"""
+
+    def test_bulk_create_success(self, authenticated_client, user):
+        """every task of the batch is created for the current user"""
+        url = reverse('task-bulk')
+        data = [{'title': f'Tâche {i}', 'description': '  Note  '} for i in range(10)]
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [item['status'] for item in response.data['results']] == [201] * 10
+        assert response.data['results'][3]['data']['title'] == 'Tâche 3'
+        assert response.data['results'][3]['data']['description'] == 'Note'
+        assert Task.objects.filter(author=user).count() == 10
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "tasks_task"')]
+        assert len(inserts) == 1
+
+    def test_bulk_create_is_all_or_nothing(self, authenticated_client):
+        """an invalid item rejects the batch and is reported by index"""
+        url = reverse('task-bulk')
+        data = [{'title': 'Valide'}, {'title': '   '}]
+        response = authenticated_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        results = response.data['results']
+        assert results[0] == {'index': 0, 'status': status.HTTP_424_FAILED_DEPENDENCY}
+        assert results[1]['status'] == status.HTTP_400_BAD_REQUEST
+        assert 'title' in results[1]['errors']
+        assert Task.objects.count() == 0
+
+    def test_bulk_create_requires_list(self, authenticated_client):
+        """the body must be a list"""
+        url = reverse('task-bulk')
+        response = authenticated_client.post(url, {'title': 'Seule'}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_bulk_create_unauthenticated(self, api_client):
+        """the batch is refused without authentication"""
+        url = reverse('task-bulk')
+        response = api_client.post(url, [{'title': 'Tâche'}], format='json')
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestTaskBulkUpdate:
+    """Tests pour la mise à jour de tâches par lot"""
+
+    def test_bulk_update_success(self, authenticated_client, multiple_tasks):
+        """every task of the batch is updated with one query"""
+        url = reverse('task-bulk')
+        data = [{'id': str(task.id), 'is_completed': True} for task in multiple_tasks]
+        data[0]['title'] = '  Renommée  '
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.patch(url, data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert all(item['status'] == 200 for item in response.data['results'])
+        assert Task.objects.filter(is_completed=True).count() == 5
+        assert Task.objects.get(id=multiple_tasks[0].id).title == 'Renommée'
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE "tasks_task"')]
+        assert len(updates) == 1
+
+    def test_bulk_update_bumps_updated_at(self, authenticated_client, task):
+        """updated_at moves forward even though bulk_update skips auto_now"""
+        url = reverse('task-bulk')
+        before = task.updated_at
+        authenticated_client.patch(url, [{'id': str(task.id), 'title': 'Nouveau'}], format='json')
+
+        task.refresh_from_db()
+        assert task.updated_at > before
+
+    def test_bulk_update_other_user_task(self, authenticated_client, task, other_user_task):
+        """a task of another user is reported as not found and nothing is written"""
+        url = reverse('task-bulk')
+        data = [
+            {'id': str(task.id), 'title': 'Modifiée'},
+            {'id': str(other_user_task.id), 'title': 'Piratée'},
+            {'id': 'pas-un-uuid', 'title': 'Invalide'},
+        ]
+        response = authenticated_client.patch(url, data, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        statuses = [item['status'] for item in response.data['results']]
+        assert statuses == [424, 404, 404]
+        task.refresh_from_db()
+        other_user_task.refresh_from_db()
+        assert task.title != 'Modifiée'
+        assert other_user_task.title == 'Tâche autre utilisateur'
+
+
+@pytest.mark.django_db
+class TestTaskBulkDelete:
+    """Tests pour la suppression de tâches par lot"""
+
+    def test_bulk_delete(self, authenticated_client, multiple_tasks, other_user_task):
+        """own tasks are deleted, unknown or foreign ids are reported as 404"""
+        url = reverse('task-bulk')
+        data = [str(task.id) for task in multiple_tasks[:3]] + [str(other_user_task.id), str(uuid.uuid4())]
+        response = authenticated_client.delete(url, data, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        statuses = [item['status'] for item in response.data['results']]
+        assert statuses == [204, 204, 204, 404, 404]
+        assert Task.objects.filter(author=multiple_tasks[0].author).count() == 2
+        assert Task.objects.filter(id=other_user_task.id).exists()
@@ -0,0 +1,98 @@
+import pytest
+from django.contrib import admin
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from tasks import cache as task_cache
+from tasks.models import Task
+
+
+def count_queries(client, url, params=None):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    return response, len(queries.captured_queries)
+
+
+@pytest.mark.django_db
+class TestTaskResponseCache:
+    """Tests pour le cache des réponses par utilisateur"""
+
+    def test_list_served_from_cache(self, authenticated_client, multiple_tasks):
+        """the second identical list call runs no query and returns the same body"""
+        url = reverse('task-list')
+        first, first_queries = count_queries(authenticated_client, url)
+        second, second_queries = count_queries(authenticated_client, url)
+
+        assert first_queries > 0
+        assert second_queries == 0
+        assert second.content == first.content
+        assert second['Content-Type'] == first['Content-Type']
+
+    def test_query_string_is_normalized(self, authenticated_client, multiple_tasks):
+        """parameter order does not matter, parameter values do"""
+        url = reverse('task-list')
+        count_queries(authenticated_client, url + '?is_completed=true&page_size=2')
+        _, reordered = count_queries(authenticated_client, url + '?page_size=2&is_completed=true')
+        response, other = count_queries(authenticated_client, url + '?page_size=2&is_completed=false')
+
+        assert reordered == 0
+        assert other > 0
+        assert all(not item['is_completed'] for item in response.json()['data'])
+
+    def test_detail_served_from_cache(self, authenticated_client, task):
+        """the detail response is cached too"""
+        url = reverse('task-detail', kwargs={'pk': task.pk})
+        count_queries(authenticated_client, url)
+        _, queries = count_queries(authenticated_client, url)
+
+        assert queries == 0
+
+    @pytest.mark.parametrize('write', ['create', 'update', 'delete', 'bulk'])
+    def test_api_writes_invalidate(self, authenticated_client, task, write):
+        """every write through the API is visible on the next read"""
+        list_url = reverse('task-list')
+        detail_url = reverse('task-detail', kwargs={'pk': task.pk})
+        count_queries(authenticated_client, list_url)
+
+        if write == 'create':
+            authenticated_client.post(list_url, {'title': 'Nouvelle'})
+            expected = 2
+        elif write == 'update':
+            authenticated_client.patch(detail_url, {'title': 'Renommée'})
+            expected = 1
+        elif write == 'delete':
+            authenticated_client.delete(detail_url)
+            expected = 0
+        else:
+            authenticated_client.post(reverse('task-bulk'), [{'title': 'A'}, {'title': 'B'}], format='json')
+            expected = 3
+
+        response, queries = count_queries(authenticated_client, list_url)
+        assert queries > 0
+        assert len(response.json()['data']) == expected
+
+    def test_cache_is_per_user(self, authenticated_client, task, another_user, other_user_task):
+        """a user never receives another user's cached list"""
+        url = reverse('task-list')
+        count_queries(authenticated_client, url)
+        authenticated_client.force_authenticate(user=another_user)
+        response, _ = count_queries(authenticated_client, url)
+
+        assert [item['title'] for item in response.json()['data']] == [other_user_task.title]
+
+    def test_admin_delete_invalidates(self, authenticated_client, task, rf):
+        """deleting from the admin bumps the author's version"""
+        version = task_cache.get_version(task.author_id)
+        admin.site._registry[Task].delete_queryset(rf.post('/'), Task.objects.filter(id=task.id))
+
+        assert task_cache.get_version(task.author_id) > version
+
+    def test_version_survives_eviction(self, user):
+        """a version lost from the cache restarts above every previous one"""
+        task_cache.bump_version(user.pk)
+        version = task_cache.get_version(user.pk)
+        task_cache.get_cache().delete(task_cache.VERSION_KEY % user.pk)
+
+        assert task_cache.get_version(user.pk) > version
@@ -0,0 +1,114 @@
+import pytest
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from tasks.conditional import check_preconditions, get_task_validators
+from tasks.models import Task
+
+
+@pytest.mark.django_db
+class TestConditionalList:
+    """Tests pour les GET conditionnels sur la liste"""
+
+    def test_list_not_modified(self, authenticated_client, multiple_tasks):
+        """a matching If-None-Match is answered with an empty 304"""
+        url = reverse('task-list')
+        etag = authenticated_client.get(url)['ETag']
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b''
+        assert response['ETag'] == etag
+
+    def test_list_not_modified_without_cache(self, authenticated_client, multiple_tasks, settings):
+        """the 304 does not depend on the response cache"""
+        settings.TASK_CACHE_TIMEOUT = 0
+        url = reverse('task-list')
+        etag = authenticated_client.get(url)['ETag']
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_list_etag_depends_on_query(self, authenticated_client, multiple_tasks):
+        """another filter gives another ETag"""
+        url = reverse('task-list')
+        etag = authenticated_client.get(url)['ETag']
+        response = authenticated_client.get(url, {'is_completed': 'true'}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    @pytest.mark.parametrize('write', ['api_delete', 'orm_save'])
+    def test_list_modified_after_write(self, authenticated_client, multiple_tasks, write, settings):
+        """a write changes the ETag of the list"""
+        settings.TASK_CACHE_TIMEOUT = 0
+        url = reverse('task-list')
+        etag = authenticated_client.get(url)['ETag']
+        if write == 'api_delete':
+            authenticated_client.delete(reverse('task-detail', kwargs={'pk': multiple_tasks[0].pk}))
+        else:
+            multiple_tasks[0].save()
+        response = authenticated_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+class TestConditionalDetail:
+    """Tests pour les GET conditionnels et If-Match sur une tâche"""
+
+    def test_detail_validators(self, authenticated_client, task):
+        """the detail has an ETag and a Last-Modified"""
+        url = reverse('task-detail', kwargs={'pk': task.pk})
+        response = authenticated_client.get(url)
+
+        assert response['ETag']
+        assert response['Last-Modified'] == http_date(task.updated_at.timestamp())
+        assert response['Cache-Control'] == 'private, no-cache'
+
+    def test_detail_not_modified_since(self, authenticated_client, task):
+        """If-Modified-Since at or after updated_at gives a 304"""
+        url = reverse('task-detail', kwargs={'pk': task.pk})
+        since = http_date(task.updated_at.timestamp() + 1)
+        response = authenticated_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_patch_if_match(self, authenticated_client, task):
+        """a PATCH with the current ETag succeeds and returns the new one"""
+        url = reverse('task-detail', kwargs={'pk': task.pk})
+        etag = authenticated_client.get(url)['ETag']
+        response = authenticated_client.patch(url, {'title': 'Modifiée'}, HTTP_IF_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+        assert authenticated_client.get(url)['ETag'] == response['ETag']
+
+    @pytest.mark.parametrize('method', ['put', 'patch', 'delete'])
+    def test_stale_if_match(self, authenticated_client, task, method):
+        """a write with a stale ETag is refused with a 412 and changes nothing"""
+        url = reverse('task-detail', kwargs={'pk': task.pk})
+        stale = authenticated_client.get(url)['ETag']
+        Task.objects.filter(pk=task.pk).update(title='Modifiée ailleurs')
+        task.refresh_from_db()
+        task.save()
+
+        data = {'title': 'Écrasée'} if method != 'delete' else None
+        response = getattr(authenticated_client, method)(url, data, HTTP_IF_MATCH=stale)
+
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        task.refresh_from_db()
+        assert task.title == 'Modifiée ailleurs'
+
+    def test_if_match_comparison(self, rf, task):
+        """If-Match is strong, except for the weak form compression gives our own tag"""
+        etag, last_modified = get_task_validators(task)
+        since = http_date(task.updated_at.timestamp() - 60)
+
+        for header, passes in [(etag, True), ('W/' + etag, True), ('*', True), ('W/"autre"', False), ('"autre"', False)]:
+            request = rf.patch('/', HTTP_IF_MATCH=header, HTTP_IF_UNMODIFIED_SINCE=since)
+            response = check_preconditions(request, etag, last_modified)
+
+            assert (response is None) is passes
+            assert request.META['HTTP_IF_MATCH'] == header
@@ -0,0 +1,174 @@
+from io import StringIO
+
+import pytest
+from django.contrib.admin.sites import AdminSite
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from tasks.admin import TaskAdmin
+from tasks import counters
+from tasks.counters import get_counter
+from tasks.models import Task, TaskCounter
+
+
+def counts(user):
+    counter = TaskCounter.objects.get(user=user)
+    return counter.total, counter.completed, counter.pending
+
+
+def count_queries(queries):
+    return [q for q in queries.captured_queries if 'COUNT(' in q['sql'].upper()]
+
+
+@pytest.mark.django_db
+class TestTaskCounterUpdates:
+    """Tests pour la tenue des compteurs de tâches"""
+
+    def test_counter_rebuilt_when_missing(self, user, multiple_tasks):
+        """a missing counter is computed from the tasks table"""
+        counter = get_counter(user.pk)
+
+        assert (counter.total, counter.completed, counter.pending) == (5, 3, 2)
+
+    def test_rebuild_race_keeps_our_write(self, user, multiple_tasks, monkeypatch):
+        """a counter created concurrently without our uncommitted write still gets it"""
+        aggregate_counts = counters.aggregate_counts
+
+        def racing_aggregate_counts(*args):
+            # The concurrent transaction counts before our task exists for it
+            TaskCounter.objects.create(user=user, total=5, completed=3, pending=2)
+            return aggregate_counts(*args)
+
+        def conflicting_update_or_create(**kwargs):
+            raise IntegrityError
+
+        monkeypatch.setattr(counters, 'aggregate_counts', racing_aggregate_counts)
+        monkeypatch.setattr(TaskCounter.objects, 'update_or_create', conflicting_update_or_create)
+        Task.objects.create(title='Nouvelle', author=user)
+        counters.tasks_added([(user.pk, False)])
+
+        assert counts(user) == (6, 3, 3)
+
+    def test_create_toggle_delete(self, authenticated_client, user):
+        """API create, toggle and delete move the counters"""
+        response = authenticated_client.post(reverse('task-list'), {'title': 'Tâche'}, format='json')
+        assert counts(user) == (1, 0, 1)
+
+        url = reverse('task-detail', kwargs={'pk': response.data['id']})
+        authenticated_client.patch(url, {'is_completed': True}, format='json')
+        assert counts(user) == (1, 1, 0)
+
+        authenticated_client.patch(url, {'title': 'Renommée'}, format='json')
+        assert counts(user) == (1, 1, 0)
+
+        authenticated_client.delete(url)
+        assert counts(user) == (0, 0, 0)
+
+    def test_bulk_operations(self, authenticated_client, user):
+        """bulk create, update and delete move the counters"""
+        url = reverse('task-bulk')
+        response = authenticated_client.post(
+            url, [{'title': f'Tâche {i}', 'is_completed': i < 2} for i in range(5)], format='json'
+        )
+        ids = [item['data']['id'] for item in response.data['results']]
+        assert counts(user) == (5, 2, 3)
+
+        authenticated_client.patch(url, [{'id': pk, 'is_completed': True} for pk in ids[1:4]], format='json')
+        assert counts(user) == (5, 4, 1)
+
+        authenticated_client.delete(url, [ids[0], ids[4]], format='json')
+        assert counts(user) == (3, 3, 0)
+
+    def test_import(self, authenticated_client, user):
+        """imported rows are counted"""
+        body = '{"title": "A"}\n{"title": "B", "is_completed": true}\n'
+        authenticated_client.generic(
+            'POST', reverse('task-import'), body, content_type='application/x-ndjson'
+        )
+
+        assert counts(user) == (2, 1, 1)
+
+    def test_admin_reassign_and_delete(self, rf, user, another_user, multiple_tasks):
+        """admin changes of author and deletions move both users' counters"""
+        get_counter(user.pk), get_counter(another_user.pk)
+        model_admin = TaskAdmin(Task, AdminSite())
+        request = rf.post('/')
+        request.user = user
+        task = multiple_tasks[0]
+        form = model_admin.get_form(request, task)(
+            instance=task,
+            data={'title': task.title, 'author': another_user.pk, 'is_completed': ''},
+        )
+        assert form.is_valid(), form.errors
+        model_admin.save_model(request, form.save(commit=False), form, change=True)
+
+        assert counts(user) == (4, 2, 2)
+        assert counts(another_user) == (1, 0, 1)
+
+        model_admin.delete_queryset(request, Task.objects.filter(author=user))
+        assert counts(user) == (0, 0, 0)
+
+    def test_admin_changelist_toggle(self, rf, user, multiple_tasks):
+        """toggling is_completed from the changelist moves only the status counters"""
+        get_counter(user.pk)
+        model_admin = TaskAdmin(Task, AdminSite())
+        request = rf.post('/')
+        request.user = user
+        task = next(task for task in multiple_tasks if not task.is_completed)
+        form = model_admin.get_changelist_formset(request).form(instance=task, data={'is_completed': 'on'})
+        assert form.is_valid(), form.errors
+        model_admin.save_model(request, form.save(commit=False), form, change=True)
+
+        assert counts(user) == (5, 4, 1)
+
+
+@pytest.mark.django_db
+class TestTaskCounterPagination:
+    """Tests pour le comptage des listes paginées"""
+
+    def test_list_count_without_count_query(self, authenticated_client, multiple_tasks):
+        """an unfiltered list reads its count from the counters"""
+        get_counter(multiple_tasks[0].author_id)
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse('task-list'), {'page_size': 2})
+
+        assert response.data['count'] == 5
+        assert response.data['total_pages'] == 3
+        assert count_queries(queries) == []
+
+    @pytest.mark.parametrize('value, expected', [('true', 3), ('false', 2)])
+    def test_status_filter_uses_counters(self, authenticated_client, multiple_tasks, value, expected):
+        """is_completed is answered by the completed/pending counters"""
+        get_counter(multiple_tasks[0].author_id)
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(reverse('task-list'), {'is_completed': value})
+
+        assert response.data['count'] == expected
+        assert len(response.data['data']) == expected
+        assert count_queries(queries) == []
+
+    def test_other_filters_count_rows(self, authenticated_client, multiple_tasks):
+        """any other filter falls back to COUNT(*)"""
+        response = authenticated_client.get(reverse('task-list'), {'search': 'Tâche 1'})
+
+        assert response.data['count'] == len(response.data['data']) == 1
+
+
+@pytest.mark.django_db
+class TestReconcileTaskCounters:
+    """Tests pour la commande reconcile_task_counters"""
+
+    def test_repairs_drift(self, user, another_user, multiple_tasks, other_user_task):
+        """drifted and missing counters are recomputed"""
+        TaskCounter.objects.create(user=user, total=42, completed=-1, pending=43)
+        stdout = StringIO()
+        call_command('reconcile_task_counters', stdout=stdout)
+
+        assert counts(user) == (5, 3, 2)
+        assert counts(another_user) == (1, 0, 1)
+        assert '2 counter(s) repaired' in stdout.getvalue()
+
+        stdout = StringIO()
+        call_command('reconcile_task_counters', stdout=stdout)
+        assert '0 counter(s) repaired' in stdout.getvalue()
@@ -0,0 +1,199 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from tasks import events
+from tasks.models import TaskEvent
+
+
+@pytest.fixture
+def database_backend(settings):
+    """Events carried by the TaskEvent table"""
+    settings.TASK_EVENTS_BACKEND = 'tasks.events.DatabaseBackend'
+    events.get_backend.cache_clear()
+    yield events.get_backend()
+    events.get_backend.cache_clear()
+
+
+class RecordingBroker:
+    """Broker stand-in keeping the dispatched events, subscribed for `polls` polls"""
+
+    def __init__(self, polls=0):
+        self.dispatched = []
+        self.polls = polls
+
+    def has_subscriptions(self):
+        self.polls -= 1
+        return self.polls >= 0
+
+    def dispatch(self, user_id, event):
+        self.dispatched.append((user_id, event['type'], event['id']))
+
+
+def parse_event(chunk):
+    fields = dict(line.split(': ', 1) for line in chunk.decode().strip().splitlines())
+    return fields['event'], json.loads(fields['data'])
+
+
+@pytest.mark.django_db
+class TestTaskEventStream:
+    """Tests pour le flux d'évènements SSE"""
+
+    def read_stream(self, url, headers=None, publish=(), count=0):
+        """Open the stream, publish `publish` once subscribed, return the first `count` + 1 chunks"""
+
+        async def scenario():
+            response = await AsyncClient().get(url, headers=headers or {})
+            if not response.streaming:
+                return response, []
+            iterator = response._iterator
+            chunks = [await anext(iterator)]
+            events.get_backend().publish(publish)
+            for _ in range(count):
+                chunks.append(await anext(iterator))
+            await iterator.aclose()
+            return response, chunks
+
+        return async_to_sync(scenario)()
+
+    def test_stream_events(self, user, another_user, task):
+        """the user's events are pushed, not other users'"""
+        published = [
+            (another_user.pk, events.make_event(events.CREATED, task.pk)),
+            (user.pk, events.make_event(events.UPDATED, task.pk)),
+            (user.pk, events.make_event(events.DELETED, task.pk)),
+        ]
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+        response, chunks = self.read_stream(reverse('task-events'), headers, published, count=2)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/event-stream'
+        assert response['Cache-Control'] == 'no-cache'
+        assert chunks[0].startswith(b'retry: ')
+        event_type, data = parse_event(chunks[1])
+        assert event_type == 'updated'
+        assert data['id'] == str(task.pk)
+        assert parse_event(chunks[2])[0] == 'deleted'
+        assert not events.broker.has_subscriptions()
+
+    def test_token_query_param(self, user):
+        """EventSource clients pass the JWT in the query string"""
+        url = reverse('task-events') + f'?token={AccessToken.for_user(user)}'
+        response, chunks = self.read_stream(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert chunks[0].startswith(b'retry: ')
+
+    def test_unauthenticated(self, user):
+        """the stream requires a JWT"""
+        response, _ = self.read_stream(reverse('task-events'))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_heartbeat(self, user, settings):
+        """idle streams get keep-alive comments"""
+        settings.TASK_EVENTS_HEARTBEAT_SECONDS = 0.01
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(user)}'}
+
+        async def scenario():
+            response = await AsyncClient().get(reverse('task-events'), headers=headers)
+            iterator = response._iterator
+            chunks = [await anext(iterator), await anext(iterator)]
+            await iterator.aclose()
+            return chunks
+
+        assert async_to_sync(scenario)()[1] == b': keep-alive\n\n'
+
+    def test_overflow_asks_for_resync(self, user, settings):
+        """a subscriber too slow to keep up is told to resync"""
+        settings.TASK_EVENTS_QUEUE_SIZE = 2
+
+        async def scenario():
+            subscription = events.broker.subscribe(user.pk)
+            for _ in range(3):
+                subscription.put(events.make_event(events.UPDATED, 'x'))
+            event = await subscription.get()
+            events.broker.unsubscribe(subscription)
+            return event
+
+        assert async_to_sync(scenario)() is None
+
+
+@pytest.mark.django_db
+class TestTaskEventPublishing:
+    """Tests pour la publication des évènements"""
+
+    def test_writes_publish_on_commit(self, authenticated_client, user, database_backend, django_capture_on_commit_callbacks):
+        """API writes publish created/updated/deleted events after commit"""
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post(reverse('task-list'), {'title': 'Tâche'}, format='json')
+        url = reverse('task-detail', kwargs={'pk': response.data['id']})
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.patch(url, {'is_completed': True}, format='json')
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.post(reverse('task-bulk'), [{'title': 'A'}, {'title': 'B'}], format='json')
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_client.delete(url)
+
+        rows = list(TaskEvent.objects.values_list('user_id', 'type', 'task_id'))
+        assert [row[1] for row in rows] == ['created', 'updated', 'created', 'created', 'deleted']
+        assert {row[0] for row in rows} == {user.pk}
+        assert str(rows[-1][2]) == response.data['id']
+
+    def test_nothing_published_before_commit(self, authenticated_client, database_backend):
+        """events wait for the commit"""
+        authenticated_client.post(reverse('task-list'), {'title': 'Tâche'}, format='json')
+
+        assert not TaskEvent.objects.exists()
+
+    def test_database_backend_poll(self, user, task, database_backend):
+        """one poll hands every new row to the broker"""
+        database_backend.publish([(user.pk, events.make_event(events.UPDATED, task.pk))] * 3)
+        first = TaskEvent.objects.first()
+        broker = RecordingBroker()
+
+        last = async_to_sync(database_backend.poll)(broker, first.id, {first.id: first.created_at})
+
+        assert broker.dispatched == [(user.pk, 'updated', str(task.pk))] * 2
+        assert last == TaskEvent.objects.last().id
+
+    def test_database_backend_late_commit(self, user, task, database_backend):
+        """a row committed after a higher id was polled is still dispatched, once"""
+        database_backend.publish([(user.pk, events.make_event(events.UPDATED, task.pk))] * 3)
+        late, polled, new = TaskEvent.objects.all()
+        broker = RecordingBroker()
+        seen = {polled.id: polled.created_at}
+
+        last = async_to_sync(database_backend.poll)(broker, polled.id, seen)
+        async_to_sync(database_backend.poll)(broker, last, seen)
+
+        assert len(broker.dispatched) == 2
+        assert set(seen) == {late.id, polled.id, new.id}
+        assert last == new.id
+
+    def test_database_backend_settled_rows(self, user, task, database_backend, settings):
+        """rows older than the settle window are no longer polled again"""
+        settings.TASK_EVENTS_SETTLE_SECONDS = 0
+        database_backend.publish([(user.pk, events.make_event(events.UPDATED, task.pk))] * 2)
+        old, polled = TaskEvent.objects.all()
+        seen = {polled.id: polled.created_at}
+        broker = RecordingBroker()
+
+        async_to_sync(database_backend.poll)(broker, polled.id, seen)
+
+        assert broker.dispatched == []
+        assert seen == {}
+
+    def test_database_backend_listen(self, user, task, database_backend, settings):
+        """events stored before the listener started are not sent, even within the settle window"""
+        settings.TASK_EVENTS_POLL_INTERVAL = 0
+        database_backend.publish([(user.pk, events.make_event(events.UPDATED, task.pk))] * 2)
+        broker = RecordingBroker(polls=2)
+
+        async_to_sync(database_backend.listen)(broker)
+
+        assert broker.dispatched == []
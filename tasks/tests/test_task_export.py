@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from tasks.serializers import TaskSerializer
+from tasks.views import TaskViewSet
+
+
+def export(client, **params):
+    url = reverse('task-export')
+    response = client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    return response, b''.join(response.streaming_content).decode('utf-8')
+
+
+@pytest.mark.django_db
+class TestTaskExport:
+    """Tests pour l'export en flux des tâches"""
+
+    def test_export_ndjson(self, authenticated_client, multiple_tasks, other_user_task):
+        """each line is the serialized task, identical to the API output"""
+        response, body = export(authenticated_client)
+        rows = [json.loads(line) for line in body.splitlines()]
+
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        assert 'tasks.ndjson' in response['Content-Disposition']
+        expected = TaskSerializer(sorted(multiple_tasks, key=lambda t: t.created_at, reverse=True), many=True).data
+        assert rows == json.loads(json.dumps(expected))
+
+    def test_export_csv(self, authenticated_client, multiple_tasks):
+        """the CSV has a header and one row per task"""
+        response, body = export(authenticated_client, format='csv')
+        rows = list(csv.reader(io.StringIO(body)))
+
+        assert response['Content-Type'].startswith('text/csv')
+        assert rows[0] == TaskSerializer.default_fields
+        assert len(rows) == 6
+        assert {row[3] for row in rows[1:]} == {'true', 'false'}
+
+    def test_export_accept_header(self, authenticated_client, task):
+        """the format can be negotiated with the Accept header"""
+        response = authenticated_client.get(reverse('task-export'), HTTP_ACCEPT='text/csv')
+
+        assert response['Content-Type'].startswith('text/csv')
+
+    def test_export_filters(self, authenticated_client, multiple_tasks):
+        """the TaskFilter parameters apply"""
+        _, body = export(authenticated_client, is_completed='false')
+
+        assert [json.loads(line)['is_completed'] for line in body.splitlines()] == [False, False]
+
+    def test_export_streams_in_chunks(self, authenticated_client, multiple_tasks, monkeypatch):
+        """rows are read chunk by chunk and streamed as they come"""
+        monkeypatch.setattr(TaskViewSet, 'export_chunk_size', 2)
+        url = reverse('task-export')
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url)
+            chunks = list(response.streaming_content)
+
+        assert len(chunks) == 3
+        assert len(queries.captured_queries) == 1
+
+    def test_export_unauthenticated(self, api_client):
+        """the export requires authentication"""
+        response = api_client.get(reverse('task-export'))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
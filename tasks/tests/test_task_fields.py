@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from tasks.models import Task
+from tasks.serializers import DESCRIPTION_PREVIEW_LENGTH
+
+
+def select_queries(queries):
+    return [
+        q['sql'] for q in queries.captured_queries
+        if q['sql'].startswith('SELECT') and 'FROM "tasks_task"' in q['sql'] and 'MAX(' not in q['sql']
+    ]
+
+
+@pytest.fixture
+def long_task(user):
+    """Crée une tâche avec une longue description"""
+    return Task.objects.create(title='Longue', description='x' * 5000, author=user)
+
+
+@pytest.mark.django_db
+class TestTaskSparseFields:
+    """Tests pour la sélection de champs"""
+
+    def test_list_fields(self, authenticated_client, multiple_tasks):
+        """only the requested fields are selected and returned"""
+        url = reverse('task-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url, {'fields': 'title,id,is_completed'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert list(response.data['data'][0]) == ['id', 'title', 'is_completed']
+        selects = select_queries(queries)
+        assert selects and all('"tasks_task"."description"' not in sql for sql in selects)
+
+    def test_list_fields_with_cursor(self, authenticated_client, multiple_tasks):
+        """the cursor pagination still works without its key fields requested"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'fields': 'title', 'pagination': 'cursor', 'page_size': 2})
+
+        assert response.data['data'] == [{'title': 'Tâche 5'}, {'title': 'Tâche 4'}]
+        response = authenticated_client.get(response.data['links']['next'])
+        assert response.data['data'] == [{'title': 'Tâche 3'}, {'title': 'Tâche 2'}]
+
+    def test_description_preview(self, authenticated_client, long_task, task):
+        """the preview is truncated in SQL and only output when requested"""
+        url = reverse('task-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url, {'fields': 'id,description_preview'})
+
+        previews = {item['id']: item['description_preview'] for item in response.json()['data']}
+        assert previews[str(long_task.id)] == 'x' * DESCRIPTION_PREVIEW_LENGTH + '…'
+        assert previews[str(task.id)] == task.description
+        assert 'SUBSTR' in ' '.join(select_queries(queries)).upper()
+
+        response = authenticated_client.get(url)
+        assert 'description_preview' not in response.data['data'][0]
+
+    def test_retrieve_fields(self, authenticated_client, long_task):
+        """the detail view defers the unrequested columns"""
+        url = reverse('task-detail', kwargs={'pk': long_task.id})
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url, {'fields': 'title,description_preview'})
+
+        assert response.data == {'title': 'Longue', 'description_preview': 'x' * DESCRIPTION_PREVIEW_LENGTH + '…'}
+        selects = select_queries(queries)
+        # The only reference to the column is the SUBSTR() of the preview
+        assert len(selects) == 1
+        assert selects[0].count('"tasks_task"."description"') == 1
+        assert 'SUBSTR' in selects[0].upper()
+
+    def test_unknown_field(self, authenticated_client, task):
+        """unknown fields are refused"""
+        response = authenticated_client.get(reverse('task-list'), {'fields': 'title,author'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'fields' in response.data
+
+    def test_writes_ignore_fields(self, authenticated_client, task):
+        """fields does not restrict the input of writes"""
+        url = reverse('task-detail', kwargs={'pk': task.id})
+        response = authenticated_client.patch(url + '?fields=id', {'title': 'Nouveau'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['title'] == 'Nouveau'
@@ -0,0 +1,121 @@
+import io
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from tasks.models import Task
+from tasks.views import TaskViewSet
+
+
+NDJSON = '\n'.join([
+    json.dumps({'title': '  Première  ', 'description': '  Note  ', 'is_completed': True}),
+    '',
+    json.dumps({'title': '   '}),
+    '{pas du json',
+    json.dumps({'title': 'Troisième'}),
+    json.dumps(['pas', 'un', 'objet']),
+]) + '\n'
+
+CSV = (
+    'title,description,is_completed\n'
+    'Acheter du pain,,false\n'
+    ',Sans titre,false\n'
+    '"Appeler, Paul","Sur deux\nlignes",true\n'
+)
+
+
+@pytest.mark.django_db
+class TestTaskImport:
+    """Tests pour l'import en flux des tâches"""
+
+    def test_import_ndjson(self, authenticated_client, user):
+        """valid lines are created, malformed ones are reported by line"""
+        url = reverse('task-import')
+        response = authenticated_client.generic('POST', url, NDJSON, content_type='application/x-ndjson')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['created'] == 2
+        assert response.data['rejected'] == 3
+        assert [error['line'] for error in response.data['errors']] == [3, 4, 6]
+        assert 'title' in response.data['errors'][0]['errors']
+        assert response.data['rows_per_second'] is not None
+        first = Task.objects.get(title='Première')
+        assert first.description == 'Note'
+        assert first.is_completed is True
+        assert first.author == user
+
+    def test_import_csv_upload(self, authenticated_client, user):
+        """a CSV file can be uploaded as multipart"""
+        url = reverse('task-import')
+        upload = SimpleUploadedFile('taches.csv', CSV.encode('utf-8'), content_type='text/csv')
+        response = authenticated_client.post(url, {'file': upload}, format='multipart')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['created'] == 2
+        assert response.data['rejected'] == 1
+        assert Task.objects.get(title='Appeler, Paul').description == 'Sur deux\nlignes'
+
+    def test_import_invalid_utf8(self, authenticated_client, user):
+        """a line that is not UTF-8 is rejected and the import goes on"""
+        body = b''.join([
+            json.dumps({'title': 'Avant'}).encode() + b'\n',
+            b'{"title": "Caf\xe9"}\n',
+            json.dumps({'title': 'Après'}).encode() + b'\n',
+        ])
+        url = reverse('task-import')
+        response = authenticated_client.generic('POST', url, body, content_type='application/x-ndjson')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data['created'] == 2
+        assert response.data['rejected'] == 1
+        assert response.data['errors'][0]['line'] == 2
+        assert set(Task.objects.filter(author=user).values_list('title', flat=True)) == {'Avant', 'Après'}
+
+    def test_import_csv_invalid_utf8(self, authenticated_client, user):
+        """a CSV record with bytes that are not UTF-8 is rejected by line"""
+        body = 'title\nAvant\n'.encode() + b'Caf\xe9\n' + 'Après\n'.encode()
+        upload = SimpleUploadedFile('taches.csv', body, content_type='text/csv')
+        response = authenticated_client.post(reverse('task-import'), {'file': upload}, format='multipart')
+
+        assert response.data['created'] == 2
+        assert [error['line'] for error in response.data['errors']] == [3]
+
+    def test_import_batches(self, authenticated_client, user, monkeypatch):
+        """rows are inserted in batches"""
+        monkeypatch.setattr(TaskViewSet, 'import_batch_size', 2)
+        body = ''.join(json.dumps({'title': f'Tâche {i}'}) + '\n' for i in range(5))
+        url = reverse('task-import')
+        response = authenticated_client.generic('POST', url, body, content_type='application/x-ndjson')
+
+        assert response.data['created'] == 5
+        assert Task.objects.filter(author=user).count() == 5
+
+    def test_import_export_round_trip(self, authenticated_client, multiple_tasks, user):
+        """an export can be imported back"""
+        exported = b''.join(authenticated_client.get(reverse('task-export'), {'format': 'csv'}).streaming_content)
+        url = reverse('task-import')
+        response = authenticated_client.generic('POST', url, exported, content_type='text/csv')
+
+        assert response.data['created'] == 5
+        assert Task.objects.filter(author=user).count() == 10
+
+    def test_import_unsupported_type(self, authenticated_client):
+        """an unknown body type is refused"""
+        url = reverse('task-import')
+        response = authenticated_client.generic('POST', url, 'x', content_type='text/plain')
+
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    def test_import_command(self, user, tmp_path):
+        """the management command imports a file for a user"""
+        path = tmp_path / 'taches.ndjson'
+        path.write_text(NDJSON, encoding='utf-8')
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_tasks', str(path), email=user.email, stdout=stdout, stderr=stderr)
+
+        assert Task.objects.filter(author=user).count() == 2
+        assert '2 task(s) created, 3 rejected' in stdout.getvalue()
+        assert 'line 4' in stderr.getvalue()
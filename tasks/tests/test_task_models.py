@@ -1,4 +1,11 @@
+import time
+import uuid
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
+from django.db import connection
+from core.utils.utils import uuid7
 from tasks.models import Task
 
 
@@ -60,3 +67,48 @@ class TestTaskModel:
         user.delete()
         
         assert not Task.objects.filter(id=task_id).exists()
+
+
+class TestUuid7:
+    """Tests pour les identifiants ordonnés dans le temps"""
+
+    def test_version_and_variant(self):
+        """Un UUID version 7, de la variante RFC"""
+        value = uuid7()
+        assert isinstance(value, uuid.UUID)
+        assert value.version == 7
+        assert value.variant == uuid.RFC_4122
+
+    def test_timestamp(self):
+        """Les 48 premiers bits sont l'heure Unix en millisecondes"""
+        before = time.time_ns() // 1_000_000
+        value = uuid7()
+        after = time.time_ns() // 1_000_000
+        assert before <= value.int >> 80 <= after + 1
+
+    def test_strictly_increasing(self):
+        """Les identifiants croissent strictement, même dans la même milliseconde"""
+        values = [uuid7() for _ in range(10000)]
+        assert values == sorted(values)
+        assert len(set(values)) == len(values)
+
+
+@pytest.mark.django_db
+class TestTaskPrimaryKey:
+    """Tests pour la clé primaire des tâches"""
+
+    def test_ids_follow_creation_order(self, user):
+        """Les tâches créées ensuite ont des identifiants plus grands"""
+        tasks = [Task.objects.create(title='Tâche %d' % index, author=user) for index in range(5)]
+        assert all(task.id.version == 7 for task in tasks)
+        assert list(Task.objects.order_by('id')) == tasks
+
+    def test_benchmark_command(self):
+        """La commande compare les générateurs et supprime ses tables"""
+        stdout = StringIO()
+        call_command('benchmark_task_keys', rows=2000, batch_size=500, stdout=stdout)
+
+        output = stdout.getvalue()
+        assert 'uuid4: 2000 rows' in output
+        assert 'uuid7: 2000 rows' in output
+        assert not [table for table in connection.introspection.table_names() if table.startswith('benchmark_')]
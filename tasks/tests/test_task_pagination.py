@@ -0,0 +1,188 @@
+from base64 import b64encode
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from tasks.models import Task
+
+
+def walk_pages(client, url, params):
+    """Follow the `next` links and collect every task title"""
+    titles = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        titles.extend(item['title'] for item in response.data['data'])
+        next_link = response.data['links']['next']
+        if next_link is None:
+            return titles, response
+        response = client.get(next_link)
+
+
+@pytest.fixture
+def many_tasks(user):
+    """25 tâches, dont plusieurs avec la même date de création"""
+    tasks = [Task.objects.create(title=f'Tâche {i:02d}', author=user) for i in range(25)]
+    same_time = timezone.now()
+    Task.objects.filter(id__in=[t.id for t in tasks[5:10]]).update(created_at=same_time)
+    return tasks
+
+
+@pytest.mark.django_db
+class TestCursorPagination:
+    """Tests pour la pagination par curseur"""
+
+    def test_cursor_envelope(self, authenticated_client, multiple_tasks):
+        """the cursor envelope keeps links/data and has no count"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'pagination': 'cursor'})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['data']) == 5
+        assert response.data['links'] == {'next': None, 'previous': None}
+        assert 'count' not in response.data
+
+    def test_cursor_walks_every_task_once(self, authenticated_client, many_tasks):
+        """following next links returns every task exactly once, ties included"""
+        url = reverse('task-list')
+        titles, _ = walk_pages(authenticated_client, url, {'pagination': 'cursor', 'page_size': 7})
+
+        expected = list(
+            Task.objects.order_by('-created_at', '-id').values_list('title', flat=True)
+        )
+        assert titles == expected
+
+    @pytest.mark.parametrize('order_by', ['created_at', '-created_at', 'updated_at', '-updated_at'])
+    def test_cursor_honours_order_by(self, authenticated_client, many_tasks, order_by):
+        """every order_by value allowed by TaskFilter is paged on"""
+        url = reverse('task-list')
+        params = {'pagination': 'cursor', 'page_size': 4, 'order_by': order_by}
+        titles, _ = walk_pages(authenticated_client, url, params)
+
+        id_order = '-id' if order_by.startswith('-') else 'id'
+        expected = list(Task.objects.order_by(order_by, id_order).values_list('title', flat=True))
+        assert titles == expected
+
+    def test_cursor_previous_link(self, authenticated_client, many_tasks):
+        """the previous link returns the page before"""
+        url = reverse('task-list')
+        first = authenticated_client.get(url, {'pagination': 'cursor', 'page_size': 10})
+        second = authenticated_client.get(first.data['links']['next'])
+        back = authenticated_client.get(second.data['links']['previous'])
+
+        assert back.data['data'] == first.data['data']
+        assert back.data['links']['previous'] is None
+
+    def test_cursor_never_counts(self, authenticated_client, many_tasks):
+        """no COUNT query is run in cursor mode"""
+        url = reverse('task-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(url, {'pagination': 'cursor', 'page_size': 5})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert not any('COUNT(' in query['sql'] for query in queries.captured_queries)
+
+    def test_invalid_cursor(self, authenticated_client, many_tasks):
+        """a malformed cursor is rejected"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'pagination': 'cursor', 'cursor': 'garbage'})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cursor_with_invalid_id(self, authenticated_client, many_tasks):
+        """a well formed cursor whose id is not a UUID is rejected"""
+        url = reverse('task-list')
+        cursor = {'o': '-created_at', 'v': timezone.now().isoformat(), 'id': 'garbage', 'r': 0}
+        encoded = b64encode(json.dumps(cursor).encode()).decode()
+        response = authenticated_client.get(url, {'pagination': 'cursor', 'cursor': encoded})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_cursor_with_search(self, authenticated_client, many_tasks):
+        """relevance ordered search results cannot be walked with a cursor"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'pagination': 'cursor', 'search': 'tâche'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'search' in response.json()
+
+    def test_cursor_only_own_tasks(self, authenticated_client, task, other_user_task):
+        """the cursor mode keeps the author scoping"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'pagination': 'cursor'})
+
+        assert [item['title'] for item in response.data['data']] == [task.title]
+
+
+@pytest.mark.django_db
+class TestPageNumberPagination:
+    """Tests pour la pagination par numéro de page"""
+
+    def test_default_envelope_unchanged(self, authenticated_client, many_tasks):
+        """the version 1 envelope keeps its keys and page numbers"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'page': 2, 'page_size': 10})
+
+        assert set(response.data) == {
+            'links', 'max_page_size', 'count', 'total_pages', 'current_page_count', 'data'
+        }
+        links = response.data['links']
+        assert links['next_num'] == 3
+        assert links['previous_num'] == 1
+        assert 'page=3' in links['next']
+        assert 'page=' not in links['previous']
+        assert response.data['count'] == 25
+        assert response.data['total_pages'] == 3
+
+    def test_count_false_skips_count(self, authenticated_client, many_tasks):
+        """?count=false runs no COUNT and still finds the next page"""
+        url = reverse('task-list')
+        params = {'count': 'false', 'order_by': 'created_at', 'page_size': 10}
+        with CaptureQueriesContext(connection) as queries:
+            titles, last = walk_pages(authenticated_client, url, params)
+
+        assert len(titles) == len(set(titles)) == 25
+        assert last.data['count'] is None
+        assert last.data['total_pages'] is None
+        assert last.data['links']['next_num'] is None
+        assert last.data['links']['previous_num'] == 2
+        assert not [q for q in queries.captured_queries if 'COUNT(' in q['sql'].upper()]
+
+    def test_count_false_page_out_of_range(self, authenticated_client, many_tasks):
+        """a page past the end is a 404 without count as well"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'count': 'false', 'page': 4, 'page_size': 10})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_count_false_last_page(self, authenticated_client, many_tasks):
+        """page=last needs the count and is a 404 with an explicit message without it"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'count': 'false', 'page': 'last', 'page_size': 10})
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert 'count=false' in str(response.data)
+
+    def test_envelope_v2(self, authenticated_client, many_tasks):
+        """version 2 groups page numbers and drops count when not asked"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'envelope': 2, 'page': 2, 'page_size': 10})
+
+        assert set(response.data) == {'links', 'page', 'data'}
+        assert response.data['page'] == {
+            'number': 2, 'size': 10, 'next': 3, 'previous': 1, 'count': 25, 'total_pages': 3,
+        }
+
+        response = authenticated_client.get(url, {'envelope': 2, 'count': 'false'})
+        assert response.data['page'] == {'number': 1, 'size': 20, 'next': 2, 'previous': None}
+
+    def test_unknown_envelope(self, authenticated_client, many_tasks):
+        """an unknown envelope version is refused"""
+        response = authenticated_client.get(reverse('task-list'), {'envelope': 9})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'envelope' in response.data
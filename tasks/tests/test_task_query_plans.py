@@ -0,0 +1,60 @@
+import pytest
+from django.db import connection
+from tasks.filters import TaskFilter
+from tasks.models import Task
+
+
+FILTERS = [
+    {},
+    {'is_completed': 'true'},
+    {'is_completed': 'false'},
+    {'start_date': '2024-01-01T00:00:00Z'},
+    {'start_date': '2024-01-01T00:00:00Z', 'end_date': '2025-01-01T00:00:00Z'},
+    {'start_date': '2024-01-01T00:00:00Z', 'end_date': '2025-01-01T00:00:00Z', 'is_completed': 'true'},
+]
+ORDERINGS = [None, 'created_at', '-created_at', 'updated_at', '-updated_at']
+
+
+def explain(queryset):
+    """Return the query plan, with sequential scans disabled on PostgreSQL
+    so tiny test tables do not hide a missing index"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return queryset.explain()
+
+
+def uses_full_scan(plan):
+    if connection.vendor == 'postgresql':
+        return 'Seq Scan' in plan
+    return any(
+        line.split('SCAN', 1)[1].split()[0] == 'tasks_task' and 'INDEX' not in line
+        for line in plan.splitlines() if 'SCAN' in line
+    )
+
+
+def uses_sort(plan):
+    if connection.vendor == 'postgresql':
+        return 'Sort' in plan
+    return 'TEMP B-TREE' in plan
+
+
+@pytest.mark.django_db
+class TestTaskListQueryPlans:
+    """Les requêtes de liste passent par un index"""
+
+    @pytest.mark.parametrize('ordering', ORDERINGS)
+    @pytest.mark.parametrize('params', FILTERS)
+    def test_list_uses_index(self, user, params, ordering):
+        """each filter combination is served by an index, never a full scan"""
+        params = dict(params)
+        if ordering:
+            params['order_by'] = ordering
+        queryset = TaskFilter(params, queryset=Task.objects.filter(author=user)).qs
+        plan = explain(queryset)
+
+        assert not uses_full_scan(plan), plan
+        assert 'INDEX' in plan.upper(), plan
+        # Without an updated_at range the index order is the result order.
+        if 'start_date' not in params:
+            assert not uses_sort(plan), plan
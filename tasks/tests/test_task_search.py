@@ -0,0 +1,102 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from tasks import search
+from tasks.models import Task
+
+
+@pytest.fixture
+def searchable_tasks(user):
+    """Tâches avec des titres et descriptions variés"""
+    return [
+        Task.objects.create(title='Acheter du pain', description='Boulangerie du coin', author=user),
+        Task.objects.create(title='Réviser le rapport', description='Relire le pain point client', author=user),
+        Task.objects.create(title='Appeler Paul', description='Pour le rapport annuel', author=user),
+    ]
+
+
+def search_titles(client, value, **params):
+    url = reverse('task-list')
+    response = client.get(url, {'search': value, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return [item['title'] for item in response.data['data']]
+
+
+@pytest.mark.django_db
+class TestTaskSearch:
+    """Tests pour la recherche plein texte"""
+
+    def test_search_title_and_description(self, authenticated_client, searchable_tasks):
+        """a term matches both titles and descriptions"""
+        titles = search_titles(authenticated_client, 'rapport')
+
+        assert sorted(titles) == ['Appeler Paul', 'Réviser le rapport']
+
+    def test_search_ranks_title_matches_first(self, authenticated_client, searchable_tasks):
+        """a title match ranks above a description match"""
+        titles = search_titles(authenticated_client, 'pain')
+
+        assert titles == ['Acheter du pain', 'Réviser le rapport']
+
+    def test_search_prefix_and_all_terms(self, authenticated_client, searchable_tasks):
+        """terms match as prefixes and must all be present"""
+        assert search_titles(authenticated_client, 'bouland') == []
+        assert search_titles(authenticated_client, 'boulan') == ['Acheter du pain']
+        assert search_titles(authenticated_client, 'rapport annuel') == ['Appeler Paul']
+
+    def test_search_is_case_and_accent_insensitive(self, authenticated_client, searchable_tasks):
+        """case and accents are ignored"""
+        assert search_titles(authenticated_client, 'REVISER') == ['Réviser le rapport']
+
+    def test_search_tracks_updates_and_deletes(self, authenticated_client, searchable_tasks):
+        """the index follows updates and deletions"""
+        first, second, _ = searchable_tasks
+        first.title = 'Acheter des croissants'
+        first.save()
+        second.delete()
+
+        assert search_titles(authenticated_client, 'croissants') == ['Acheter des croissants']
+        assert search_titles(authenticated_client, 'pain') == []
+
+    def test_search_only_own_tasks(self, authenticated_client, searchable_tasks, other_user_task):
+        """the search keeps the author scoping"""
+        assert search_titles(authenticated_client, 'utilisateur') == []
+
+    def test_search_with_count(self, authenticated_client, searchable_tasks):
+        """the paginated count follows the search"""
+        url = reverse('task-list')
+        response = authenticated_client.get(url, {'search': 'rapport'})
+
+        assert response.data['count'] == 2
+
+    def test_search_without_terms(self, authenticated_client, searchable_tasks):
+        """a value without any word falls back to a substring match"""
+        assert search_titles(authenticated_client, '%') == []
+
+    def test_backfill_command(self, user):
+        """the backfill command indexes rows written without the triggers"""
+        search.uninstall(connection)
+        try:
+            Task.objects.create(title='Ancienne tâche', author=user)
+        finally:
+            call_command('backfill_task_search', stdout=io.StringIO())
+
+        queryset = search.search_tasks(Task.objects.all(), 'ancienne')
+        assert [task.title for task in queryset] == ['Ancienne tâche']
+
+    def test_reindex_after_table_rebuild(self, authenticated_client, searchable_tasks, user):
+        """a migration rebuilding tasks_task renumbers its rows and drops the triggers"""
+        from django.db import migrations
+
+        with connection.cursor() as cursor:
+            for statement in search.SQLITE_UNINSTALL[:3]:
+                cursor.execute(statement)
+            cursor.execute('UPDATE tasks_task SET rowid = rowid + 100')
+        search.reindex_after_migrate(plan=[(migrations.Migration('0099_rebuild', 'tasks'), False)])
+        Task.objects.create(title='Acheter du lait', author=user)
+
+        assert search_titles(authenticated_client, 'acheter') == ['Acheter du lait', 'Acheter du pain']
@@ -70,4 +70,42 @@ class TestTaskSerializer:
         assert data['is_completed'] == task.is_completed
         assert 'created_at' in data
         assert 'updated_at' in data
-        
\ No newline at end of file
+        
+
+@pytest.mark.django_db
+class TestTaskValuesSerializer:
+    """Tests pour le chemin de lecture rapide"""
+
+    def test_output_is_byte_identical(self, multiple_tasks, task):
+        """the fast path renders exactly like TaskSerializer"""
+        from rest_framework.renderers import JSONRenderer
+        from tasks.serializers import TaskValuesSerializer
+
+        Task.objects.filter(pk=task.pk).update(description=None)
+        queryset = Task.objects.all()
+        fast = TaskValuesSerializer()
+        expected = JSONRenderer().render(TaskSerializer(queryset, many=True).data)
+        actual = JSONRenderer().render(fast.to_representation(list(fast.get_queryset(queryset))))
+
+        assert actual == expected
+
+    def test_list_uses_values(self, authenticated_client, multiple_tasks):
+        """the list endpoint output matches TaskSerializer"""
+        from django.urls import reverse
+
+        response = authenticated_client.get(reverse('task-list'))
+        expected = TaskSerializer(Task.objects.all(), many=True).data
+
+        assert response.json()['data'] == [dict(item) for item in expected]
+
+    def test_datetime_formatter_without_tz(self, settings):
+        """without USE_TZ, aware datetimes are rendered in naive UTC like DRF"""
+        import datetime
+
+        from rest_framework.fields import DateTimeField
+        from core.utils.serializers_fields import get_datetime_formatter
+
+        settings.USE_TZ = False
+        value = datetime.datetime(2024, 5, 1, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=2)))
+
+        assert get_datetime_formatter()(value) == DateTimeField().to_representation(value) == '2024-05-01T10:30:00'
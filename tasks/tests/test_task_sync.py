@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from tasks.models import TaskTombstone
+from tasks.sync import encode_cursor
+
+
+@pytest.fixture(autouse=True)
+def no_settle_delay(settings):
+    """Les changements sont visibles immédiatement dans les tests"""
+    settings.TASK_SYNC_SETTLE_SECONDS = 0
+
+
+def sync(client, since=None, **params):
+    url = reverse('task-changes')
+    if since:
+        params['since'] = since
+    response = client.get(url, params)
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+@pytest.mark.django_db
+class TestTaskChanges:
+    """Tests pour la synchronisation différentielle"""
+
+    def test_initial_sync(self, authenticated_client, multiple_tasks, other_user_task):
+        """the first sync returns every own task, oldest change first"""
+        data = sync(authenticated_client)
+
+        assert [item['title'] for item in data['changes']] == [f'Tâche {i}' for i in range(1, 6)]
+        assert data['deleted'] == []
+        assert data['cursor']
+        assert data['has_more'] is False
+
+    def test_only_changes_since_cursor(self, authenticated_client, multiple_tasks):
+        """updates, creations and deletions after the cursor are returned"""
+        cursor = sync(authenticated_client)['cursor']
+
+        authenticated_client.patch(reverse('task-detail', kwargs={'pk': multiple_tasks[1].pk}), {'title': 'Modifiée'})
+        authenticated_client.post(reverse('task-list'), {'title': 'Créée'})
+        authenticated_client.delete(reverse('task-detail', kwargs={'pk': multiple_tasks[3].pk}))
+        data = sync(authenticated_client, cursor)
+
+        assert [item['title'] for item in data['changes']] == ['Modifiée', 'Créée']
+        assert [item['id'] for item in data['deleted']] == [str(multiple_tasks[3].pk)]
+        assert sync(authenticated_client, data['cursor'])['changes'] == []
+
+    def test_bulk_delete_tombstones(self, authenticated_client, multiple_tasks):
+        """bulk deletions are logged as well"""
+        cursor = sync(authenticated_client)['cursor']
+        ids = [str(task.pk) for task in multiple_tasks[:2]]
+        authenticated_client.delete(reverse('task-bulk'), ids, format='json')
+        data = sync(authenticated_client, cursor)
+
+        assert sorted(item['id'] for item in data['deleted']) == sorted(ids)
+
+    def test_sync_pages_in_order(self, authenticated_client, multiple_tasks):
+        """a small limit pages through the changes with has_more"""
+        cursor = sync(authenticated_client)['cursor']
+        for task in multiple_tasks:
+            task.title += ' bis'
+            task.save()
+        authenticated_client.delete(reverse('task-detail', kwargs={'pk': multiple_tasks[0].pk}))
+
+        seen, deleted, has_more = [], [], True
+        while has_more:
+            data = sync(authenticated_client, cursor, limit=2)
+            seen += [item['title'] for item in data['changes']]
+            deleted += [item['id'] for item in data['deleted']]
+            cursor, has_more = data['cursor'], data['has_more']
+
+        assert seen == [f'Tâche {i} bis' for i in range(2, 6)]
+        assert deleted == [str(multiple_tasks[0].pk)]
+
+    def test_settle_window(self, authenticated_client, task, settings):
+        """changes newer than the settle window are held back"""
+        settings.TASK_SYNC_SETTLE_SECONDS = 60
+        data = sync(authenticated_client)
+
+        assert data['changes'] == []
+
+    def test_invalid_cursor(self, authenticated_client):
+        """a malformed cursor is rejected"""
+        response = authenticated_client.get(reverse('task-changes'), {'since': 'nope'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_naive_cursor(self, authenticated_client, task):
+        """a cursor whose timestamp has no timezone is rejected"""
+        naive = datetime(2020, 1, 1)
+        response = authenticated_client.get(reverse('task-changes'), {'since': encode_cursor(naive, task.pk)})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_expired_cursor(self, authenticated_client, task):
+        """a cursor older than the tombstone retention asks for a full resync"""
+        old = timezone.now() - timedelta(days=365)
+        response = authenticated_client.get(reverse('task-changes'), {'since': encode_cursor(old, task.pk)})
+
+        assert response.status_code == status.HTTP_410_GONE
+
+    def test_tombstones_are_scoped(self, authenticated_client, task, other_user_task, another_user):
+        """a user never sees another user's deletions"""
+        cursor = sync(authenticated_client)['cursor']
+        TaskTombstone.objects.create(task_id=other_user_task.pk, author=another_user)
+
+        assert sync(authenticated_client, cursor)['deleted'] == []
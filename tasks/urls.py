@@ -1,10 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .async_views import AsyncTaskView, TaskEventStreamView
 from .views import TaskViewSet
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='task')
 
 urlpatterns = [
+    # Before the router, whose detail route would take "events" for an id
+    path('tasks/events/', TaskEventStreamView.as_view(), name='task-events'),
     path('', include(router.urls)),
-]
\ No newline at end of file
+    path('async/tasks/', AsyncTaskView.as_view(), name='async-task-list'),
+    path('async/tasks/<str:pk>/', AsyncTaskView.as_view(), name='async-task-detail'),
+]
@@ -1,23 +1,420 @@
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
+from rest_framework.exceptions import UnsupportedMediaType, ValidationError
+from rest_framework.pagination import _positive_int
 from rest_framework.response import Response
 from rest_framework.decorators import action as action_decorator
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Task
-from .serializers import TaskSerializer
-from .filters import TaskFilter
+from core.exceptions import Gone, PreconditionFailed
+from core.metrics import count_cache_lookup
+from core.pagination import StandardCursorPagination
+from core.renderers import CSVRenderer, NDJSONRenderer
+from core.timing import ServerTimingMixin, timed
+from .cache import bump_version, get_cache, get_response_key
+from .counters import get_counter, tasks_removed
+from .events import DELETED, publish
+from .conditional import check_preconditions, get_list_validators, get_task_validators, set_validators
+from .models import Task, TaskArchive
+from .serializers import TaskSerializer, TaskTombstoneSerializer, TaskValuesSerializer, select_fields
+from .export import stream_csv, stream_ndjson
+from .filters import TaskArchiveFilter, TaskFilter
+from .importer import READERS, import_tasks
+from .sync import InvalidCursor, decode_cursor, get_changes, is_expired, record_deletions
 from rest_framework import permissions
 
-class TaskViewSet(viewsets.ModelViewSet):
+
+def parse_fields(value):
+    """
+    Names listed in a `fields` query parameter, in TaskSerializer order,
+    or None if there are none
+    """
+    if not value:
+        return None
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - set(TaskSerializer.Meta.fields)
+    if unknown:
+        raise ValidationError({'fields': ["Champ(s) inconnu(s) : %s" % ", ".join(sorted(unknown))]})
+    return [name for name in TaskSerializer.Meta.fields if name in names] or None
+
+
+def parse_archived(value):
+    """Whether an `archived` query parameter asks for the archive"""
+    return (value or '').lower() in ('true', '1', 'yes', 'on')
+
+
+def delete_task(task):
+    """Delete `task`, leaving a tombstone for the delta sync"""
+    pk, author_id = task.pk, task.author_id
+    with transaction.atomic():
+        record_deletions([(pk, author_id)])
+        task.delete()
+        tasks_removed([(author_id, task.is_completed)])
+        publish(DELETED, [(pk, author_id)])
+    bump_version(author_id)
+
+
+def parse_uuid(value):
+    """Return `value` as a UUID, or None if it is not one"""
+    try:
+        return uuid.UUID(str(value))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class TaskViewSet(ServerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet for all Crud opération on Task model
     """
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     filter_backends = [DjangoFilterBackend]
-    filterset_class = TaskFilter
     permission_classes = [permissions.IsAuthenticated]
+    bulk_max_size = 500
+    changes_page_size = 100
+    changes_max_page_size = 500
+    export_chunk_size = 2000
+    import_batch_size = 1000
+    import_media_types = {
+        'application/x-ndjson': 'ndjson',
+        'application/jsonl': 'ndjson',
+        'text/csv': 'csv',
+    }
+    # Most queries per action, whatever the page size (core/query_budget.py):
+    # the JWT user lookup, the conditional GET validator and the counter
+    # come before the page itself
+    query_budgets = {
+        'list': 4,
+        'retrieve': 2,
+        'create': 3,
+        'update': 4,
+        'partial_update': 4,
+        'destroy': 5,
+        'changes': 2,
+    }
     
     def get_queryset(self):
-        """Get queryset for the current user"""
-        return Task.objects.filter(author=self.request.user)
-    
\ No newline at end of file
+        """Get queryset for the current user, in the archive with `?archived=true`"""
+        model = TaskArchive if self.is_archive_request() else Task
+        queryset = model.objects.filter(author=self.request.user)
+        fields = self.get_requested_fields()
+        if fields and self.action == 'retrieve':
+            queryset = select_fields(queryset, fields)
+        return queryset
+
+    def get_requested_fields(self):
+        """
+        Fields listed in `?fields=`, in serializer order, for reads only;
+        None when all default fields are wanted
+        """
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = None
+            if self.request.method in permissions.SAFE_METHODS:
+                self._requested_fields = parse_fields(self.request.query_params.get('fields'))
+        return self._requested_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        return context
+
+    @property
+    def paginator(self):
+        """Keyset paginator when `?pagination=cursor` is given, page numbers otherwise"""
+        if not hasattr(self, '_paginator') and self.request.query_params.get('pagination') == 'cursor':
+            self._paginator = StandardCursorPagination()
+        return super().paginator
+
+    @property
+    def filterset_class(self):
+        return TaskArchiveFilter if self.is_archive_request() else TaskFilter
+
+    def is_archive_request(self):
+        """Reads of archived tasks; the archive is read only"""
+        request = getattr(self, 'request', None)
+        return (
+            request is not None
+            and request.method in permissions.SAFE_METHODS
+            and parse_archived(request.query_params.get('archived'))
+        )
+
+    def get_pagination_count(self):
+        """Size of the list from the user's task counters, when they can tell it"""
+        if self.is_archive_request():
+            return None
+        filterset = DjangoFilterBackend().get_filterset(self.request, self.get_queryset(), self)
+        field = filterset.get_counter_field() if filterset is not None else None
+        if field is None:
+            return None
+        return getattr(get_counter(self.request.user.pk), field)
+
+    def get_object(self):
+        """
+        Get the task, once per request, and enforce If-Match /
+        If-Unmodified-Since on writes
+        """
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+            if self.request.method not in permissions.SAFE_METHODS:
+                etag, last_modified = get_task_validators(self._object)
+                if check_preconditions(self.request, etag, last_modified) is not None:
+                    raise PreconditionFailed()
+        return self._object
+
+    def get_cached_response(self, handler, get_validators, request, *args, **kwargs):
+        """
+        Answer a conditional GET with a 304 before serializing anything,
+        then serve `handler`'s JSON response from the per-user cache,
+        filling it on a miss
+        """
+        cache_key = None
+        if request.accepted_renderer.format == 'json':
+            pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+            cache_key = get_response_key(request, request.user.pk, self.action, pk)
+            cached = get_cache().get(cache_key)
+            count_cache_lookup(request, cached is not None)
+            if cached is not None:
+                content, content_type, etag, last_modified = cached
+                response = check_preconditions(request, etag, last_modified)
+                if response is None:
+                    response = HttpResponse(content, content_type=content_type)
+                return set_validators(response, etag, last_modified)
+
+        etag, last_modified = get_validators()
+        response = check_preconditions(request, etag, last_modified)
+        if response is not None:
+            return set_validators(response, etag, last_modified)
+
+        def store(rendered):
+            get_cache().set(
+                cache_key,
+                (rendered.content, rendered['Content-Type'], etag, last_modified),
+                settings.TASK_CACHE_TIMEOUT,
+            )
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            set_validators(response, etag, last_modified)
+            if cache_key:
+                response.add_post_render_callback(store)
+        return response
+
+    def list_values(self, request, *args, **kwargs):
+        """List through the `.values()` fast path instead of TaskSerializer"""
+        serializer = TaskValuesSerializer(
+            self.get_requested_fields(), getattr(request.accepted_renderer, 'native_types', ()),
+        )
+        queryset = serializer.get_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            with timed('serialize'):
+                data = serializer.to_representation(page)
+            return self.get_paginated_response(data)
+        rows = list(queryset)
+        with timed('serialize'):
+            data = serializer.to_representation(rows)
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            self.list_values,
+            lambda: get_list_validators(self.get_queryset(), request),
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve,
+            lambda: get_task_validators(self.get_object()),
+            request, *args, **kwargs
+        )
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        return set_validators(response, *get_task_validators(self.get_object()))
+
+    def perform_destroy(self, instance):
+        delete_task(instance)
+
+    def get_bulk_items(self, request):
+        """Return the request body as a batch, or an error response"""
+        items = request.data
+        if not isinstance(items, list):
+            return None, Response(
+                {'detail': "Une liste est attendue"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.bulk_max_size:
+            return None, Response(
+                {'detail': f"{self.bulk_max_size} éléments au maximum par requête"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return items, None
+
+    def get_bulk_error_response(self, serializer, missing=()):
+        """Per item report of a rejected batch: nothing has been written"""
+        results = []
+        for index, errors in enumerate(serializer.errors):
+            if not errors:
+                # Valid, but not written since the batch is all or nothing
+                results.append({'index': index, 'status': status.HTTP_424_FAILED_DEPENDENCY})
+            elif index in missing:
+                results.append({'index': index, 'status': status.HTTP_404_NOT_FOUND, 'errors': errors})
+            else:
+                results.append({'index': index, 'status': status.HTTP_400_BAD_REQUEST, 'errors': errors})
+        return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+
+    @action_decorator(detail=False, methods=['post'], url_path='bulk', url_name='bulk')
+    def bulk_create(self, request):
+        """
+        POST /api/tasks/bulk/
+        [{"title": "...", "description": "...", "is_completed": false}, ...]
+        """
+        items, error_response = self.get_bulk_items(request)
+        if error_response:
+            return error_response
+        serializer = self.get_serializer(data=items, many=True)
+        if not serializer.is_valid():
+            return self.get_bulk_error_response(serializer)
+        with transaction.atomic():
+            serializer.save()
+        results = [
+            {'index': index, 'status': status.HTTP_201_CREATED, 'data': data}
+            for index, data in enumerate(serializer.data)
+        ]
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        """
+        PATCH /api/tasks/bulk/
+        [{"id": "...", "is_completed": true}, ...]
+        """
+        items, error_response = self.get_bulk_items(request)
+        if error_response:
+            return error_response
+        ids = [parse_uuid(item.get('id')) if isinstance(item, dict) else None for item in items]
+        with transaction.atomic():
+            tasks = list(
+                self.get_queryset()
+                .filter(id__in=[pk for pk in ids if pk])
+                .select_for_update()
+            )
+            serializer = self.get_serializer(tasks, data=items, many=True, partial=True)
+            if not serializer.is_valid():
+                found = {task.pk for task in tasks}
+                missing = {index for index, pk in enumerate(ids) if pk not in found}
+                return self.get_bulk_error_response(serializer, missing)
+            serializer.save()
+        results = [
+            {'index': index, 'status': status.HTTP_200_OK, 'data': data}
+            for index, data in enumerate(serializer.data)
+        ]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request):
+        """
+        DELETE /api/tasks/bulk/
+        ["<id>", "<id>", ...]
+
+        Unknown ids are reported as 404 without failing the batch.
+        """
+        items, error_response = self.get_bulk_items(request)
+        if error_response:
+            return error_response
+        ids = [parse_uuid(item) for item in items]
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(id__in=[pk for pk in ids if pk])
+            found = dict(queryset.values_list('id', 'is_completed'))
+            record_deletions([(pk, request.user.pk) for pk in found])
+            queryset.delete()
+            tasks_removed((request.user.pk, is_completed) for is_completed in found.values())
+            publish(DELETED, [(pk, request.user.pk) for pk in found])
+            bump_version(request.user.pk)
+        results = [
+            {'index': index, 'status': status.HTTP_204_NO_CONTENT if pk in found else status.HTTP_404_NOT_FOUND}
+            for index, pk in enumerate(ids)
+        ]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action_decorator(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        GET /api/tasks/changes/?since=<cursor>&limit=100
+
+        Tasks created or updated and tasks deleted since the cursor, oldest
+        first. Pass the returned cursor back as `since`; repeat while
+        `has_more` is true.
+        """
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = decode_cursor(since)
+            except InvalidCursor:
+                raise ValidationError({'since': ["Curseur invalide"]})
+            if is_expired(since):
+                raise Gone("Curseur expiré, une synchronisation complète est nécessaire")
+        try:
+            limit = _positive_int(
+                request.query_params['limit'], strict=True, cutoff=self.changes_max_page_size
+            )
+        except (KeyError, ValueError):
+            limit = self.changes_page_size
+
+        tasks, tombstones, cursor, has_more = get_changes(request.user, since, limit)
+        context = self.get_serializer_context()
+        return Response({
+            'changes': TaskSerializer(tasks, many=True, context=context).data,
+            'deleted': TaskTombstoneSerializer(tombstones, many=True, context=context).data,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+    @action_decorator(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """
+        GET /api/tasks/export/?format=ndjson|csv
+
+        Streams every task matching the TaskFilter parameters, unpaginated.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if request.accepted_renderer.format == 'csv':
+            stream, extension = stream_csv(queryset, chunk_size=self.export_chunk_size), 'csv'
+        else:
+            stream, extension = stream_ndjson(queryset, chunk_size=self.export_chunk_size), 'ndjson'
+        response = StreamingHttpResponse(stream, content_type=f'{request.accepted_renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="tasks.{extension}"'
+        return response
+
+    @action_decorator(detail=False, methods=['post'], url_path='import', url_name='import')
+    def import_file(self, request):
+        """
+        POST /api/tasks/import/
+
+        Body: NDJSON (application/x-ndjson) or CSV (text/csv) sent as is,
+        or a multipart upload in a `file` field (.ndjson / .csv). The body
+        is read line by line and never loaded whole.
+        """
+        media_type = request.content_type.split(';')[0].strip().lower()
+        if media_type == 'multipart/form-data':
+            upload = request.FILES.get('file')
+            if upload is None:
+                raise ValidationError({'file': ["Fichier requis"]})
+            input_format = upload.name.rsplit('.', 1)[-1].lower()
+            lines = upload
+        else:
+            input_format = self.import_media_types.get(media_type)
+            lines = request.stream or []
+        if input_format not in READERS:
+            raise UnsupportedMediaType(media_type, "Format attendu : NDJSON ou CSV")
+
+        report = import_tasks(READERS[input_format](lines), request.user, batch_size=self.import_batch_size)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)